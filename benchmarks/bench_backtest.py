@@ -0,0 +1,75 @@
+"""Benchmark: throughput del backtest y del sweep en paralelo sobre ticks sintéticos.
+
+Genera --ticks BBO de --venues exchanges con un random walk común más ruido
+por venue (así aparecen cruces breves entre venues), los guarda en .npy y mide
+una pasada de run_backtest y un sweep de --scenarios combinaciones con 1 y con
+--processes procesos. Con el throughput por proceso se estima cuánto tarda una
+semana de datos a --rate ticks/s.
+
+    python -m benchmarks.bench_backtest [--ticks 1000000] [--venues 3] [--scenarios 8] [--processes 4]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from src.backtest import TICK_DTYPE, run_backtest, save_ticks, sweep
+
+WEEK = 7 * 86400
+
+
+def make_ticks(count, venues):
+    rng = np.random.default_rng(1)
+    ticks = np.zeros(count, dtype=TICK_DTYPE)
+    ticks['ts'] = np.cumsum(rng.exponential(0.02, count))
+    names = np.array([f"venue{i}".encode() for i in range(venues)])
+    ticks['exchange'] = names[rng.integers(0, venues, count)]
+    mid = 65000 + np.cumsum(rng.normal(0, 2, count))
+    noise = rng.normal(0, 8, count)
+    half = rng.uniform(0.05, 1.0, count)
+    ticks['bid'] = np.round(mid + noise - half, 2)
+    ticks['ask'] = np.round(mid + noise + half, 2)
+    return ticks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ticks", type=int, default=1000000)
+    parser.add_argument("--venues", type=int, default=3)
+    parser.add_argument("--scenarios", type=int, default=8, help="sweep size (order latency x min profit)")
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    parser.add_argument("--rate", type=float, default=20, help="ticks/s of the week to extrapolate to")
+    args = parser.parse_args()
+
+    ticks = make_ticks(args.ticks, args.venues)
+    fees = {f"venue{i}": 0.0002 for i in range(args.venues)}
+    start = time.perf_counter()
+    result = run_backtest(ticks, fees=fees)
+    single = time.perf_counter() - start
+    print(f"{args.ticks} ticks, {args.venues} venues: {single:.2f}s ({args.ticks / single:,.0f} ticks/s), "
+          f"{result['opportunities']} opportunities, fill rate {result['fill_rate'] or 0:.2f}")
+
+    latencies = [0.001 * 2 ** i for i in range(max(1, args.scenarios // 2))]
+    grid = {'fees': [fees], 'order_latency': latencies, 'min_profit': [0.0, 5.0][:max(1, args.scenarios // len(latencies))]}
+    with tempfile.TemporaryDirectory(prefix="bench_backtest_") as directory:
+        path = os.path.join(directory, "ticks.npy")
+        save_ticks(path, ticks)
+        timings = {}
+        for processes in sorted({1, args.processes}):
+            start = time.perf_counter()
+            results = sweep(path, grid, processes)
+            timings[processes] = time.perf_counter() - start
+            print(f"sweep of {len(results)} scenarios with {processes} process(es): {timings[processes]:.2f}s")
+    if len(timings) > 1:
+        print(f"  speedup {timings[1] / timings[args.processes]:.1f}x")
+
+    week_ticks = args.rate * WEEK
+    per_scenario = week_ticks / (args.ticks / single)
+    print(f"a week at {args.rate:.0f} ticks/s = {week_ticks / 1e6:.1f}M ticks: {per_scenario / 60:.1f} min per scenario, "
+          f"{per_scenario * len(results) / args.processes / 60:.1f} min for the sweep on {args.processes} processes")
+
+
+if __name__ == "__main__":
+    main()
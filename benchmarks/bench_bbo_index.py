@@ -0,0 +1,56 @@
+"""Benchmark: mejor par neto entre venues, argmax de la matriz vs índice incremental.
+
+Mide por separado la lectura del mejor par (lo que hace check_opportunity_loop en
+cada evaluación) y el coste extra de mantener el índice en cada tick; la matriz
+se sigue actualizando en todo caso para top_pairs.
+
+    python -m benchmarks.bench_bbo_index [--iterations 200000]
+"""
+import argparse
+import random
+import time
+
+from src.bbo_index import BestPriceIndex
+from src.spreads import SpreadMatrix
+
+VENUES = (2, 5, 10, 25, 50)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200000)
+    args = parser.parse_args()
+
+    random.seed(1)
+    print(f"{'venues':>6} {'argmax':>10} {'index':>10} {'speedup':>8} {'update':>10}")
+    for count in VENUES:
+        venues = [f"venue{i}" for i in range(count)]
+        fees = {v: random.choice((0.0006, 0.001, 0.0026)) for v in venues}
+        ticks = []
+        for _ in range(args.iterations):
+            bid = 65000 + random.uniform(-5, 5)
+            ticks.append((random.choice(venues), bid, bid + random.uniform(0.01, 2)))
+
+        matrix = SpreadMatrix(fees)
+        for exchange, bid, ask in ticks:
+            matrix.update(exchange, bid, ask)
+        start = time.perf_counter()
+        for _ in ticks:
+            matrix.best_pair()
+        t_argmax = (time.perf_counter() - start) / args.iterations
+
+        index = BestPriceIndex(fees)
+        start = time.perf_counter()
+        for exchange, bid, ask in ticks:
+            index.update(exchange, bid, ask)
+        t_update = (time.perf_counter() - start) / args.iterations
+        start = time.perf_counter()
+        for _ in ticks:
+            index.best_pair()
+        t_index = (time.perf_counter() - start) / args.iterations
+
+        print(f"{count:>6} {t_argmax * 1e6:>8.2f}us {t_index * 1e6:>8.2f}us {t_argmax / t_index:>7.1f}x {t_update * 1e6:>8.2f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark: decodificación de frames de websocket por exchange.
+
+Compara json.loads + acceso por claves (lo que hacían los listeners), orjson
+si está instalado y los decoders tipados de msgspec. Los frames son sintéticos
+y siguen el formato documentado de cada exchange.
+
+    python -m benchmarks.bench_decoders [--iterations 50000] [--levels 20]
+"""
+import argparse
+import json
+import random
+import time
+
+from src.decoders import binance_decoder, bybit_decoder, coinbase_decoder, kraken_decoder, kucoin_decoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _levels(levels, fmt):
+    return [fmt(65000 + random.uniform(-50, 50), random.uniform(0, 2)) for _ in range(levels)]
+
+
+def make_frames(levels):
+    pair = lambda p, q: [f"{p:.2f}", f"{q:.8f}"]
+    return {
+        'binance': (binance_decoder, {}, json.dumps({
+            "e": "depthUpdate", "E": 1700000000000, "s": "BTCUSDT", "U": 100, "u": 120,
+            "b": _levels(levels, pair), "a": _levels(levels, pair)})),
+        'coinbase': (coinbase_decoder, {}, json.dumps({
+            "channel": "l2_data", "client_id": "", "timestamp": "2024-01-01T00:00:00Z", "sequence_num": 5,
+            "events": [{"type": "update", "product_id": "BTC-USD", "updates": _levels(levels * 2, lambda p, q: {
+                "side": random.choice(("bid", "offer")), "event_time": "2024-01-01T00:00:00Z",
+                "price_level": f"{p:.2f}", "new_quantity": f"{q:.8f}"})}]})),
+        'bybit': (bybit_decoder, {}, json.dumps({
+            "topic": "orderbook.50.BTCUSDT", "type": "delta", "ts": 1700000000000, "cts": 1700000000000,
+            "data": {"s": "BTCUSDT", "b": _levels(levels, pair), "a": _levels(levels, pair), "u": 7, "seq": 9}})),
+        # Kraken sends numbers, not strings; f-strings keep the trailing zeros it emits
+        'kraken': (kraken_decoder, {'parse_float': str}, '{"channel":"book","type":"update","data":[{"symbol":"BTC/USD","bids":[%s],"asks":[%s],"checksum":1,"timestamp":"2024-01-01T00:00:00Z"}]}' % tuple(
+            ','.join(_levels(levels, lambda p, q: f'{{"price":{p:.1f},"qty":{q:.8f}}}')) for _ in range(2))),
+        'kucoin': (kucoin_decoder, {}, json.dumps({
+            "type": "message", "topic": "/market/level2:BTC-USDT", "subject": "trade.l2update",
+            "data": {"changes": {"asks": _levels(levels, lambda p, q: [f"{p:.1f}", f"{q:.8f}", "7"]),
+                                 "bids": _levels(levels, lambda p, q: [f"{p:.1f}", f"{q:.8f}", "7"])},
+                     "sequenceStart": 7, "sequenceEnd": 7, "symbol": "BTC-USDT", "time": 1}})),
+    }
+
+
+def bench(fn, frame, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(frame)
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50000)
+    parser.add_argument("--levels", type=int, default=20)
+    args = parser.parse_args()
+
+    random.seed(1)
+    print(f"{'exchange':>9} {'bytes':>6} {'json':>10} {'orjson':>10} {'msgspec':>10} {'speedup':>8}")
+    for exchange, (decoder, json_kwargs, text) in make_frames(args.levels).items():
+        frame = text.encode()
+        t_json = bench(lambda f: json.loads(f, **json_kwargs), frame, args.iterations)
+        # orjson has no parse_float, so it cannot keep Kraken's exact price text
+        t_orjson = bench(orjson.loads, frame, args.iterations) if orjson and not json_kwargs else None
+        t_msgspec = bench(decoder.decode, frame, args.iterations)
+        orjson_col = f"{t_orjson * 1e6:>8.2f}us" if t_orjson else f"{'-':>10}"
+        print(f"{exchange:>9} {len(frame):>6} {t_json * 1e6:>8.2f}us {orjson_col} "
+              f"{t_msgspec * 1e6:>8.2f}us {t_json / t_msgspec:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Benchmark: latencia tick-a-decisión del detector, polling vs eventos.
+
+Un productor simula ticks de BBO a intervalos aleatorios (ráfagas incluidas) y
+el detector los evalúa de dos formas: durmiendo 0.5 s entre revisiones, como
+el check_opportunity_loop anterior, o despertando con un asyncio.Event como
+LivePriceWatcher.wait_for_change. Se reporta la latencia desde el tick más
+antiguo pendiente hasta la decisión, y cuántas evaluaciones se hicieron.
+
+    python -m benchmarks.bench_detector [--ticks 400] [--mean-gap 0.01]
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from src.metrics import LatencyRecorder
+
+POLL_INTERVAL = 0.5
+
+
+class Ticks:
+    def __init__(self):
+        self.changed = asyncio.Event()
+        self.tick_time = None
+
+    def signal(self):
+        if self.tick_time is None:
+            self.tick_time = time.perf_counter()
+        self.changed.set()
+
+    def take(self):
+        self.changed.clear()
+        tick_time, self.tick_time = self.tick_time, None
+        return tick_time
+
+
+async def producer(ticks, count, mean_gap):
+    for _ in range(count):
+        # One in ten ticks arrives as a burst of several updates from the same frame
+        for _ in range(random.randint(2, 6) if random.random() < 0.1 else 1):
+            ticks.signal()
+        await asyncio.sleep(random.expovariate(1 / mean_gap))
+
+
+async def polling_detector(ticks, recorder, evaluations):
+    while True:
+        tick_time = ticks.take()
+        evaluations[0] += 1
+        if tick_time is not None:
+            recorder.record(time.perf_counter() - tick_time)
+        await asyncio.sleep(POLL_INTERVAL)
+
+
+async def event_detector(ticks, recorder, evaluations):
+    while True:
+        try:
+            await asyncio.wait_for(ticks.changed.wait(), POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        tick_time = ticks.take()
+        evaluations[0] += 1
+        if tick_time is not None:
+            recorder.record(time.perf_counter() - tick_time)
+
+
+async def run(detector, count, mean_gap):
+    random.seed(1)
+    ticks = Ticks()
+    recorder = LatencyRecorder(detector.__name__)
+    evaluations = [0]
+    task = asyncio.create_task(detector(ticks, recorder, evaluations))
+    start = time.perf_counter()
+    await producer(ticks, count, mean_gap)
+    elapsed = time.perf_counter() - start
+    task.cancel()
+    return recorder, evaluations[0], elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ticks", type=int, default=400)
+    parser.add_argument("--mean-gap", type=float, default=0.01, help="seconds between ticks")
+    args = parser.parse_args()
+
+    for detector in (polling_detector, event_detector):
+        recorder, evaluations, elapsed = asyncio.run(run(detector, args.ticks, args.mean_gap))
+        print(f"{recorder.format()} | evaluations={evaluations} in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
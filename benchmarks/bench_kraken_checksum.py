@@ -0,0 +1,84 @@
+"""Benchmark: checksum de Kraken por update, sort completo frente a caché top 10.
+
+    python -m benchmarks.bench_kraken_checksum [--updates 20000] [--depth 25]
+"""
+import argparse
+import random
+import time
+import zlib
+
+from benchmarks.bench_kraken_depth import make_snapshot, make_updates
+from src.kraken_checksum import KrakenChecksum
+from src.orderbook import OrderBook
+
+
+def old_checksum_str(order_book):
+    def clean(val):
+        # Remove decimal and leading zeros
+        s = str(val).replace('.', '')
+        return s.lstrip('0') or '0'
+    asks = sorted(order_book['asks'].items(), key=lambda x: float(x[0]))[:10]
+    bids = sorted(order_book['bids'].items(), key=lambda x: -float(x[0]))[:10]
+    parts = []
+    for price, qty in asks:
+        parts.append(f"{clean(price)}{clean(qty)}")
+    for price, qty in bids:
+        parts.append(f"{clean(price)}{clean(qty)}")
+    return ''.join(parts)
+
+
+def run_sorted(snapshot, updates, depth):
+    order_book = {
+        'bids': {price: qty for price, qty in snapshot[0]},
+        'asks': {price: qty for price, qty in snapshot[1]}
+    }
+    # Only the checksum itself is timed; book maintenance is measured in bench_kraken_depth
+    elapsed = 0.0
+    for bids, asks in updates:
+        for price, qty in bids:
+            if float(qty) == 0:
+                order_book['bids'].pop(price, None)
+            else:
+                order_book['bids'][price] = qty
+        for price, qty in asks:
+            if float(qty) == 0:
+                order_book['asks'].pop(price, None)
+            else:
+                order_book['asks'][price] = qty
+        start = time.perf_counter()
+        zlib.crc32(old_checksum_str(order_book).encode())
+        elapsed += time.perf_counter() - start
+    return elapsed
+
+
+def run_cached(snapshot, updates, depth):
+    order_book = OrderBook(max_depth=depth)
+    order_book.load(*snapshot)
+    checksum = KrakenChecksum(order_book)
+    elapsed = 0.0
+    for bids, asks in updates:
+        order_book.update_bids(bids)
+        order_book.update_asks(asks)
+        order_book.trim()
+        start = time.perf_counter()
+        checksum.compute()
+        elapsed += time.perf_counter() - start
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--updates", type=int, default=20000)
+    parser.add_argument("--depth", type=int, default=25)
+    args = parser.parse_args()
+
+    random.seed(1)
+    snapshot = make_snapshot(args.depth)
+    updates = make_updates(args.updates, args.depth)
+    for name, runner in (("sorted rebuild", run_sorted), ("top-10 cache", run_cached)):
+        elapsed = runner(snapshot, updates, args.depth)
+        print(f"{name:>15}: {elapsed / args.updates * 1e6:8.2f} us/checksum")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Benchmark: coste por update del libro de Kraken acotado a distintas profundidades.
+
+Compara el truncado antiguo (sort completo + reconstrucción del dict en cada
+mensaje) con OrderBook(max_depth=...) y un trim() por mensaje, que expulsa los niveles
+sobrantes en O(log n) cada uno.
+
+    python -m benchmarks.bench_kraken_depth [--updates 20000]
+"""
+import argparse
+import random
+import time
+
+from src.orderbook import OrderBook
+
+DEPTHS = (10, 25, 100, 500)
+
+
+def make_snapshot(depth, mid=65000.0):
+    bids = [(f"{mid - (i + 1) * 0.1:.1f}", f"{random.uniform(0.001, 2):.8f}") for i in range(depth)]
+    asks = [(f"{mid + (i + 1) * 0.1:.1f}", f"{random.uniform(0.001, 2):.8f}") for i in range(depth)]
+    return bids, asks
+
+
+def make_updates(count, depth, mid=65000.0):
+    # Kraken sends the new level plus the deletion of the level pushed out of depth,
+    # but a local book still overflows transiently whenever an insert arrives first
+    updates = []
+    for _ in range(count):
+        offset = random.randint(1, 2 * depth) * 0.1
+        qty = "0.00000000" if random.random() < 0.1 else f"{random.uniform(0.001, 2):.8f}"
+        if random.random() < 0.5:
+            updates.append(([(f"{mid - offset:.1f}", qty)], []))
+        else:
+            updates.append(([], [(f"{mid + offset:.1f}", qty)]))
+    return updates
+
+
+def run_sorted_truncate(snapshot, updates, depth):
+    order_book = {
+        'bids': {price: qty for price, qty in snapshot[0]},
+        'asks': {price: qty for price, qty in snapshot[1]}
+    }
+    start = time.perf_counter()
+    for bids, asks in updates:
+        for price, qty in bids:
+            if float(qty) == 0:
+                order_book['bids'].pop(price, None)
+            else:
+                order_book['bids'][price] = qty
+        for price, qty in asks:
+            if float(qty) == 0:
+                order_book['asks'].pop(price, None)
+            else:
+                order_book['asks'][price] = qty
+        if len(order_book['bids']) > depth:
+            order_book['bids'] = dict(sorted(order_book['bids'].items(), key=lambda x: -float(x[0]))[:depth])
+        if len(order_book['asks']) > depth:
+            order_book['asks'] = dict(sorted(order_book['asks'].items(), key=lambda x: float(x[0]))[:depth])
+    return time.perf_counter() - start
+
+
+def run_bounded(snapshot, updates, depth):
+    order_book = OrderBook(max_depth=depth)
+    order_book.load(*snapshot)
+    start = time.perf_counter()
+    for bids, asks in updates:
+        order_book.update_bids(bids)
+        order_book.update_asks(asks)
+        order_book.trim()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--updates", type=int, default=20000)
+    args = parser.parse_args()
+
+    random.seed(1)
+    print(f"{'depth':>6} {'sort+truncate':>16} {'OrderBook':>12}")
+    for depth in DEPTHS:
+        snapshot = make_snapshot(depth)
+        updates = make_updates(args.updates, depth)
+        old = run_sorted_truncate(snapshot, updates, depth) / args.updates * 1e6
+        new = run_bounded(snapshot, updates, depth) / args.updates * 1e6
+        print(f"{depth:>6} {old:>13.2f} us {new:>9.2f} us")
+
+
+if __name__ == "__main__":
+    main()
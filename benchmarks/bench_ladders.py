@@ -0,0 +1,63 @@
+"""Benchmark: tamaño ejecutable de todos los pares, walk en Python frente a arrays NumPy.
+
+Para V venues x N niveles compara recorrer los V*(V-1) pares con walk_books
+(exportando listas de floats) con exportar cada libro una vez con ladder_arrays
+y llamar a pair_size por par, como hace LivePriceWatcher.get_pair_size.
+
+    python -m benchmarks.bench_ladders [--venues 5] [--levels 100] [--iterations 2000]
+"""
+import argparse
+import random
+import time
+
+from benchmarks.bench_vwap import ask_levels, bid_levels, make_book, walk_books
+from src.ladders import ladder_arrays, pair_size
+
+
+def run_python(books, fees, levels):
+    results = {}
+    ladders = {v: (bid_levels(b, levels), ask_levels(b, levels)) for v, b in books.items()}
+    for buy in books:
+        for sell in books:
+            if buy != sell:
+                result = walk_books(ladders[buy][1], ladders[sell][0], fees[buy], fees[sell])
+                if result is not None:
+                    results[(buy, sell)] = result
+    return results
+
+
+def run_numpy(books, fees, levels):
+    results = {}
+    ladders = {v: ladder_arrays(b, levels) for v, b in books.items()}
+    for buy in books:
+        for sell in books:
+            if buy != sell:
+                result = pair_size(ladders[buy], ladders[sell], fees[buy], fees[sell])
+                if result is not None:
+                    results[(buy, sell)] = result
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--venues", type=int, default=5)
+    parser.add_argument("--levels", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    # Mid dispersion between venues (USDT): how deep the books cross into each other
+    for scenario, dispersion in (("shallow cross", 0.05), ("mid cross", 0.5), ("deep cross", 2.0)):
+        random.seed(1)
+        books = {f"venue{i}": make_book(65000.0 + random.uniform(-dispersion, dispersion), args.levels) for i in range(args.venues)}
+        fees = {venue: 0.0 for venue in books}
+        print(f"{scenario} ({args.venues} venues x {args.levels} levels, mids +/-{dispersion}):")
+        for name, runner in (("python walk", run_python), ("numpy pairs", run_numpy)):
+            start = time.perf_counter()
+            for _ in range(args.iterations):
+                results = runner(books, fees, args.levels)
+            elapsed = time.perf_counter() - start
+            print(f"  {name:>13}: {elapsed / args.iterations * 1e6:9.1f} us per evaluation ({len(results)} profitable pairs)")
+
+
+if __name__ == "__main__":
+    main()
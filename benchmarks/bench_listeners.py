@@ -0,0 +1,393 @@
+"""Benchmark: camino parse → libro → BBO → update_price de cada listener con frames realistas.
+
+Cada exchange se ejecuta por separado con su listener real (src.live_price_*)
+a través del ReplayEngine, sin detector, con frames sintéticos en el formato de
+cada stream (Binance depth@100ms, Coinbase l2_data, Kraken v2 book con checksum,
+Bybit orderbook.50, KuCoin level2) o con los de una captura del FrameRecorder.
+Por mensaje se mide el tiempo desde que recv() devuelve el frame hasta que el
+listener vuelve a pedir el siguiente, es decir, todo su procesamiento (los
+mensajes que piden un snapshot REST se cuentan aparte). Se reporta:
+  - mensajes/s (solo tiempo del listener) y p50/p99/max por mensaje
+  - una segunda pasada con tracemalloc: pico medio de memoria asignada por
+    mensaje y bytes retenidos por mensaje
+
+Con --json se guardan los resultados; con --baseline se comparan con unos
+anteriores y el proceso sale con código 1 si msgs/s o p99 empeoran más de
+--tolerance, para detectar regresiones en review. La misma medida como suite
+pytest-benchmark está en benchmarks/test_bench_listeners.py.
+
+    python -m benchmarks.bench_listeners [--exchanges binance,kraken] [--messages 20000]
+    python -m benchmarks.bench_listeners --capture data/captures --prefix btc
+    python -m benchmarks.bench_listeners --json after.json --baseline before.json [--tolerance 0.15]
+"""
+import argparse
+import asyncio
+import bisect
+import contextlib
+import io
+import json
+import logging
+import random
+import sys
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+
+from src.metrics import LatencyRecorder
+from src.orderbook import OrderBook
+from src.kraken_checksum import KrakenChecksum
+from src.recorder import read_session
+from src.replay import ReplayEngine, ReplaySocket, replay_watcher
+
+EXCHANGES = ('binance', 'coinbase', 'kraken', 'bybit', 'kucoin')
+SYMBOL = "BTC"
+# Seconds a frame recorded after a REST snapshot waits for the listener to fetch it (KuCoin buffers for 1 s first)
+GATE_TIMEOUT = 3.0
+
+
+class BookModel:
+    """Libro sintético en ticks: un mid que hace un random walk y cambios de cantidad concentrados cerca del BBO"""
+
+    def __init__(self, rng, mid, levels=200):
+        self.rng = rng
+        self.mid = mid
+        self.bids = {mid - i: rng.randint(1, 20000) for i in range(1, levels + 1)}
+        self.asks = {mid + i: rng.randint(1, 20000) for i in range(1, levels + 1)}
+
+    def snapshot(self, depth):
+        return (sorted(self.bids.items(), reverse=True)[:depth], sorted(self.asks.items())[:depth])
+
+    def step(self, changes):
+        """[(ticks, qty)] cambiados en bids y en asks; qty 0 = nivel borrado"""
+        bids, asks = {}, {}
+        move = self.rng.random()
+        if move < 0.15:
+            self.mid += 1
+            if self.mid in self.asks:
+                del self.asks[self.mid]
+                asks[self.mid] = 0
+        elif move < 0.3:
+            self.mid -= 1
+            if self.mid in self.bids:
+                del self.bids[self.mid]
+                bids[self.mid] = 0
+        for _ in range(changes):
+            is_bid = self.rng.random() < 0.5
+            book, changed = (self.bids, bids) if is_bid else (self.asks, asks)
+            offset = 1 + min(int(self.rng.expovariate(0.1)), 199)
+            price = self.mid - offset if is_bid else self.mid + offset
+            if price in book and self.rng.random() < 0.3:
+                del book[price]
+                changed[price] = 0
+            else:
+                book[price] = changed[price] = self.rng.randint(1, 20000)
+        return list(bids.items()), list(asks.items())
+
+
+def text(ticks, qty, price_decimals):
+    # qty is in units of 1e-4 BTC
+    return f"{ticks / 10 ** price_decimals:.{price_decimals}f}", f"{qty / 10 ** 4:.8f}"
+
+
+def binance_frames(count, rng):
+    model = BookModel(rng, 6500000)
+    update_id = 50000000
+    for i in range(count):
+        bids, asks = model.step(rng.randint(5, 30))
+        first, update_id = update_id + 1, update_id + len(bids) + len(asks)
+        yield 'ws', json.dumps({"e": "depthUpdate", "E": 1700000000000 + i * 100, "s": "BTCUSDT", "U": first, "u": update_id,
+                                "b": [text(*level, 2) for level in bids], "a": [text(*level, 2) for level in asks]})
+        if i == 0:
+            # Fetched after the first event; it already includes it, so the buffered event is discarded
+            snap_bids, snap_asks = model.snapshot(100)
+            yield 'snapshot', {"lastUpdateId": update_id, "bids": [text(*level, 2) for level in snap_bids],
+                               "asks": [text(*level, 2) for level in snap_asks]}
+
+
+def coinbase_frames(count, rng):
+    model = BookModel(rng, 6500000, levels=1000)
+
+    def updates(side, levels):
+        return [{"side": side, "event_time": "2023-11-14T22:13:20.000000Z", "price_level": price, "new_quantity": qty}
+                for price, qty in (text(*level, 2) for level in levels)]
+
+    def message(seq, channel, events):
+        return json.dumps({"channel": channel, "client_id": "", "timestamp": "2023-11-14T22:13:20.000000Z",
+                           "sequence_num": seq, "events": events})
+
+    yield 'ws', message(0, "subscriptions", [{"subscriptions": {"level2": ["BTC-USD"], "heartbeats": ["heartbeats"]}}])
+    snap_bids, snap_asks = model.snapshot(1000)
+    yield 'ws', message(1, "l2_data", [{"type": "snapshot", "product_id": "BTC-USD",
+                                        "updates": updates("bid", snap_bids) + updates("offer", snap_asks)}])
+    for seq in range(2, count):
+        if seq % 100 == 0:
+            yield 'ws', message(seq, "heartbeats", [{"current_time": "2023-11-14 22:13:20", "heartbeat_counter": seq}])
+            continue
+        bids, asks = model.step(rng.randint(1, 5))
+        yield 'ws', message(seq, "l2_data", [{"type": "update", "product_id": "BTC-USD",
+                                              "updates": updates("bid", bids) + updates("offer", asks)}])
+
+
+def kraken_frames(count, rng, depth=25):
+    model = BookModel(rng, 650000)
+
+    def levels(side):
+        # JSON numbers, as Kraken sends them (the decoder keeps their text)
+        return "[" + ",".join('{"price":%s,"qty":%s}' % text(*level, 1) for level in side) + "]"
+
+    def message(kind, bids, asks, checksum):
+        return ('{"channel":"book","type":"%s","data":[{"symbol":"BTC/USDT","bids":%s,"asks":%s,"checksum":%d,'
+                '"timestamp":"2023-11-14T22:13:20.000000Z"}]}' % (kind, levels(bids), levels(asks), checksum))
+
+    yield 'ws', json.dumps({"method": "subscribe", "result": {"channel": "book", "depth": depth, "snapshot": True,
+                                                              "symbol": "BTC/USDT"}, "success": True})
+    snap_bids, snap_asks = model.snapshot(depth)
+    # The expected checksums come from the same bounded book the listener keeps
+    book = OrderBook(max_depth=depth)
+    book.load([text(*level, 1) for level in snap_bids], [text(*level, 1) for level in snap_asks])
+    checksum = KrakenChecksum(book)
+    yield 'ws', message("snapshot", snap_bids, snap_asks, checksum.compute())
+    for _ in range(2, count):
+        bids, asks = model.step(rng.randint(1, 3))
+        for level in bids:
+            book.set_bid(*text(*level, 1))
+        for level in asks:
+            book.set_ask(*text(*level, 1))
+        book.trim()
+        yield 'ws', message("update", bids, asks, checksum.compute())
+
+
+def bybit_frames(count, rng):
+    model = BookModel(rng, 6500000)
+
+    def message(kind, bids, asks, update_id):
+        return json.dumps({"topic": "orderbook.50.BTCUSDT", "type": kind, "ts": 1700000000000 + update_id,
+                           "data": {"s": "BTCUSDT", "b": [text(*level, 2) for level in bids],
+                                    "a": [text(*level, 2) for level in asks], "u": update_id, "seq": 70000000 + update_id},
+                           "cts": 1700000000000 + update_id})
+
+    yield 'ws', json.dumps({"success": True, "ret_msg": "subscribe", "conn_id": "bench", "op": "subscribe"})
+    yield 'ws', message("snapshot", *model.snapshot(50), 1000)
+    for update_id in range(1001, 999 + count):
+        yield 'ws', message("delta", *model.step(rng.randint(2, 20)), update_id)
+
+
+def kucoin_frames(count, rng, buffered=5, behind=2):
+    model = BookModel(rng, 6500000, levels=500)
+    sequence = 10000000
+
+    def changes(levels):
+        nonlocal sequence
+        rows = []
+        for level in levels:
+            sequence += 1
+            rows.append([*text(*level, 2), str(sequence)])
+        return rows
+
+    yield 'ws', json.dumps({"id": "bench", "type": "welcome"})
+    yield 'ws', json.dumps({"id": "00001", "type": "ack"})
+    snapshot = None
+    for i in range(2, count):
+        first = sequence + 1
+        bids, asks = model.step(rng.randint(1, 3))
+        data = {"changes": {"asks": changes(asks), "bids": changes(bids)}, "sequenceEnd": sequence, "sequenceStart": first,
+                "symbol": "BTC-USDT", "time": 1700000000000 + i}
+        yield 'ws', json.dumps({"type": "message", "topic": "/market/level2:BTC-USDT", "subject": "trade.l2update", "data": data})
+        if i - 2 == buffered - behind - 1:
+            snap_bids, snap_asks = model.snapshot(500)
+            snapshot = {"code": "200000", "data": {"time": 1700000000000, "sequence": str(sequence),
+                                                   "bids": [text(*level, 2) for level in snap_bids],
+                                                   "asks": [text(*level, 2) for level in snap_asks]}}
+        if i - 2 == buffered - 1:
+            # Fetched while the listener buffers: it lags the buffered events by `behind`
+            yield 'snapshot', snapshot
+
+
+GENERATORS = {
+    'binance': binance_frames,
+    'coinbase': coinbase_frames,
+    'kraken': kraken_frames,
+    'bybit': bybit_frames,
+    'kucoin': kucoin_frames,
+}
+
+
+def synthetic_records(exchange, count, seed=1):
+    """Registros (ts_ns, source, channel, payload) como los de read_session"""
+    records = []
+    for i, (channel, payload) in enumerate(GENERATORS[exchange](count, random.Random(seed))):
+        data = payload if isinstance(payload, str) else json.dumps(payload)
+        records.append((1700000000000000000 + i * 1000000, exchange, channel, data.encode()))
+    return records
+
+
+class TimedSocket(ReplaySocket):
+    """ReplaySocket que mide el procesamiento de cada frame y retiene los frames grabados tras un snapshot hasta que el listener lo pide"""
+
+    returned = None
+
+    async def recv(self):
+        engine = self.engine
+        entered = time.perf_counter_ns()
+        if self.returned is not None:
+            engine.measure(entered - self.returned, self.fetched != engine.fetches)
+        needed = bisect.bisect_right(engine.gates[self.source], engine.replayed[self.source])
+        while engine.fetches < needed:
+            engine.fetched_event.clear()
+            try:
+                await asyncio.wait_for(engine.fetched_event.wait(), GATE_TIMEOUT)
+            except asyncio.TimeoutError:
+                break
+        frame = await super().recv()
+        self.fetched = engine.fetches
+        if engine.trace:
+            tracemalloc.reset_peak()
+            engine.traced = tracemalloc.get_traced_memory()[0]
+            if engine.traced_start is None:
+                engine.traced_start = engine.traced
+        self.returned = time.perf_counter_ns()
+        return frame
+
+
+class BenchEngine(ReplayEngine):
+    socket_class = TimedSocket
+
+    def __init__(self, records, trace=False):
+        records = list(records)
+        self.gates = defaultdict(list)  # {source: ws frames recorded before each of its snapshots}
+        frames = Counter()
+        for _, source, channel, _ in records:
+            if channel == 'snapshot':
+                self.gates[source].append(frames[source])
+            else:
+                frames[source] += 1
+        super().__init__(records)
+        self.trace = trace
+        self.fetches = 0
+        self.fetched_event = asyncio.Event()
+        self.latency = LatencyRecorder("listener", window=None)
+        self.snapshot_messages = 0
+        self.peaks = []
+        self.traced = self.traced_start = self.traced_end = None
+
+    def measure(self, elapsed_ns, fetched_snapshot):
+        if self.trace:
+            current, peak = tracemalloc.get_traced_memory()
+            self.peaks.append(peak - self.traced)
+            self.traced_end = current
+        if fetched_snapshot:
+            self.snapshot_messages += 1
+        else:
+            self.latency.record(elapsed_ns / 1e9)
+
+    def _fetcher(self, source):
+        fetch = super()._fetcher(source)
+
+        async def counted(*args, **kwargs):
+            snapshot = await fetch(*args, **kwargs)
+            self.fetches += 1
+            self.fetched_event.set()
+            return snapshot
+        return counted
+
+
+async def run_exchange(exchange, records, trace=False):
+    engine = BenchEngine(records, trace)
+    watcher = replay_watcher(SYMBOL)
+    # Connection/snapshot prints from the listeners would drown the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        if trace:
+            tracemalloc.start()
+        try:
+            stats = await engine.run(watcher, [exchange], detector=False)
+        finally:
+            if trace:
+                tracemalloc.stop()
+    return engine, stats
+
+
+def bench(exchange, records):
+    """Pasada cronometrada y pasada con tracemalloc de un exchange"""
+    engine, stats = asyncio.run(run_exchange(exchange, records))
+    summary = engine.latency.summary()
+    if summary is None:
+        raise RuntimeError(f"{exchange}: no messages processed")
+    busy = sum(engine.latency.samples)
+    result = {
+        'messages': stats['by_exchange'].get(exchange, 0),
+        'msgs_per_s': summary['count'] / busy,
+        'p50_us': summary['p50'] * 1000,
+        'p99_us': summary['p99'] * 1000,
+        'max_us': summary['max'] * 1000,
+        'snapshot_messages': engine.snapshot_messages,
+        'connects': stats['connects'].get(exchange, 0),
+        'bbo': stats['prices'].get(exchange),
+    }
+    traced, _ = asyncio.run(run_exchange(exchange, records, trace=True))
+    if traced.peaks:
+        result['peak_bytes_per_msg'] = sum(traced.peaks) / len(traced.peaks)
+        result['retained_bytes_per_msg'] = (traced.traced_end - traced.traced_start) / len(traced.peaks)
+    return result
+
+
+def regressions(results, baseline, tolerance):
+    found = []
+    for exchange, result in results.items():
+        before = baseline.get(exchange)
+        if before is None:
+            continue
+        if result['msgs_per_s'] < before['msgs_per_s'] * (1 - tolerance):
+            found.append(f"{exchange}: {before['msgs_per_s']:,.0f} -> {result['msgs_per_s']:,.0f} msgs/s")
+        if result['p99_us'] > before['p99_us'] * (1 + tolerance):
+            found.append(f"{exchange}: p99 {before['p99_us']:.1f} -> {result['p99_us']:.1f} us")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--exchanges", default=",".join(EXCHANGES))
+    parser.add_argument("--messages", type=int, default=20000, help="synthetic frames per exchange")
+    parser.add_argument("--capture", help="directory with FrameRecorder segments to use instead of synthetic frames")
+    parser.add_argument("--prefix", help="segment prefix of the capture")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="results of a previous run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative regression")
+    args = parser.parse_args()
+
+    # The listeners must not write to the live bot logs: warnings go to stderr and setup_logging becomes a no-op
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
+    exchanges = args.exchanges.split(',')
+    if args.capture:
+        by_source = defaultdict(list)
+        for record in read_session(args.capture, args.prefix):
+            by_source[record[1]].append(record)
+        sources = {exchange: by_source[exchange] for exchange in exchanges if by_source.get(exchange)}
+    else:
+        sources = {exchange: synthetic_records(exchange, args.messages) for exchange in exchanges}
+
+    results = {}
+    for exchange, records in sources.items():
+        result = results[exchange] = bench(exchange, records)
+        line = (f"{exchange:9} {result['messages']:>7} msgs {result['msgs_per_s']:>9,.0f} msgs/s "
+                f"p50 {result['p50_us']:6.1f} us p99 {result['p99_us']:7.1f} us max {result['max_us']:8.1f} us")
+        if 'peak_bytes_per_msg' in result:
+            line += (f" | peak {result['peak_bytes_per_msg'] / 1024:5.1f} KB/msg"
+                     f" retained {result['retained_bytes_per_msg']:6.1f} B/msg")
+        print(line)
+        if result['bbo'] is None or None in result['bbo'] or result['connects'] != 1:
+            print(f"  warning: {exchange} did not run cleanly (connects={result['connects']}, bbo={result['bbo']})")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f), args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
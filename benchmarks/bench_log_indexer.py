@@ -0,0 +1,113 @@
+"""Benchmark: resumen de errores y oportunidades, re-escaneo por petición vs índice incremental.
+
+Genera un directorio con logs arb_op_* y de bots, y mide lo que costaba cada
+petición (tail de 1000/500 líneas + regex sobre cada archivo) frente al
+LogIndexer: la carga inicial, una pasada incremental tras añadir líneas y la
+lectura del resumen que hacen los endpoints.
+
+    python -m benchmarks.bench_log_indexer [--size-mb 64] [--append 1000] [--requests 200]
+"""
+import argparse
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+from src.log_indexer import ERROR_PATTERN, OPPORTUNITY_PATTERN, LogIndexer, classify_error
+from src.logtail import tail_lines
+
+FILES = ("arb_op_btc.log", "arb_op_eth.log", "btc_bot.log", "eth_bot.log")
+
+
+def make_lines(name, count):
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S,000')
+    symbol = "BTC" if "btc" in name else "ETH"
+    lines = []
+    for _ in range(count):
+        if random.random() < 0.05:
+            lines.append(f"{now} - src.live_price_binance_ws - ERROR - Connection closed\n")
+        elif name.startswith('arb_op_'):
+            lines.append(f"{now} - INFO - {symbol} Arbitrage opportunity! Profit: {random.uniform(0.01, 20):.2f} USDT | "
+                         f"Buy on binance at 65000.5 | Sell on coinbase at 65010.0 | Size: n/a\n")
+        else:
+            lines.append(f"{now} - src.main - INFO - Best bid/ask updated on bybit\n")
+    return "".join(lines)
+
+
+def make_logs(path, size_mb):
+    per_file = size_mb * 1024 * 1024 // len(FILES)
+    for name in FILES:
+        written = 0
+        with open(f"{path}/{name}", 'w') as f:
+            while written < per_file:
+                chunk = make_lines(name, 1000)
+                f.write(chunk)
+                written += len(chunk)
+
+
+def scan_summary(path):
+    # What each request did before: tail every file and re-run the regexes
+    opportunities = {}
+    errors = {}
+    for name in FILES:
+        if name.startswith('arb_op_'):
+            for line in tail_lines(f"{path}/{name}", 1000):
+                match = 'Arbitrage opportunity!' in line and OPPORTUNITY_PATTERN.search(line)
+                if match:
+                    stats = opportunities.setdefault(match.group(2), {'count': 0, 'total_profit': 0.0})
+                    stats['count'] += 1
+                    stats['total_profit'] += float(match.group(3))
+        for line in tail_lines(f"{path}/{name}", 500):
+            if ERROR_PATTERN.match(line):
+                key = classify_error(name, line)
+                errors[key] = errors.get(key, 0) + 1
+    return opportunities, errors
+
+
+def timed(fn, *args, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(*args)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--append", type=int, default=1000, help="lines appended per file before the incremental pass")
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    random.seed(1)
+    path = tempfile.mkdtemp(prefix="bench_log_indexer_")
+    try:
+        make_logs(path, args.size_mb)
+        index = LogIndexer(path)
+        t_initial = timed(index.poll)
+        for name in FILES:
+            with open(f"{path}/{name}", 'a') as f:
+                f.write(make_lines(name, args.append))
+        t_incremental = timed(index.poll)
+        t_idle = timed(index.poll, repeat=args.requests)
+
+        def indexed_request():
+            index.opportunities_summary()
+            index.error_summary()
+
+        t_scan = timed(scan_summary, path, repeat=args.requests)
+        t_indexed = timed(indexed_request, repeat=args.requests)
+        lines = sum(1 for name in FILES for _ in open(f"{path}/{name}"))
+
+        print(f"{args.size_mb} MB in {len(FILES)} files, {lines} lines")
+        print(f"initial index:                 {t_initial * 1e3:>10.1f}ms (once, at startup)")
+        print(f"incremental pass (+{args.append}/file): {t_incremental * 1e3:>8.2f}ms")
+        print(f"idle pass (no new data):       {t_idle * 1e6:>10.1f}us")
+        print(f"per request, re-scan:          {t_scan * 1e3:>10.2f}ms")
+        print(f"per request, indexed:          {t_indexed * 1e6:>10.1f}us  ({t_scan / t_indexed:.0f}x)")
+    finally:
+        shutil.rmtree(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Benchmark: throughput del event loop con logging síncrono vs QueueHandler/QueueListener y modo quiet.
+
+Simula el camino caliente de un listener: por cada mensaje un cambio de BBO
+que se imprime, y cada --every mensajes una oportunidad que se registra con
+logger.info y el json de precios, como check_opportunity_loop. Se compara:
+
+    sync   FileHandler en el event loop + print por mensaje (lo anterior)
+    queue  QueueHandler/QueueListener + print por mensaje
+    quiet  QueueHandler/QueueListener + HotPathLog en modo quiet
+
+stdout se redirige a un archivo con buffer de línea, como una consola. Se
+mide con escrituras a page cache y con un disco que se bloquea --stall-ms
+cada --stall-every escrituras (writeback, volumen de red), que es cuando la
+escritura síncrona bloquea el event loop.
+
+    python -m benchmarks.bench_logging [--messages 200000] [--every 50] [--stall-every 1000] [--stall-ms 20]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import queue
+import sys
+import tempfile
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+from src.logging_config import HotPathLog
+
+FORMAT = '%(asctime)s %(levelname)s %(name)s %(message)s'
+
+
+class StallingStream:
+    """Archivo que se bloquea stall_ms cada stall_every escrituras"""
+
+    def __init__(self, stream, stall_every, stall_ms):
+        self.stream = stream
+        self.stall_every = stall_every
+        self.stall = stall_ms / 1000
+        self.writes = 0
+
+    def write(self, data):
+        self.writes += 1
+        if self.stall and self.writes % self.stall_every == 0:
+            time.sleep(self.stall)
+        return self.stream.write(data)
+
+    def flush(self):
+        self.stream.flush()
+
+    def close(self):
+        self.stream.close()
+
+
+def configure(mode, path, stall_every=0, stall_ms=0):
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(logging.INFO)
+    file_handler = logging.FileHandler(path)
+    if stall_ms:
+        file_handler.stream = StallingStream(file_handler.stream, stall_every, stall_ms)
+    file_handler.setFormatter(logging.Formatter(FORMAT))
+    if mode == "sync":
+        root.addHandler(file_handler)
+        return None
+    log_queue = queue.SimpleQueue()
+    root.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+async def hot_path(messages, every, hot_log, logger):
+    prices = {ex: {'bid': 65000.0, 'ask': 65000.5, 'timestamp': 1700000000.0, 'status': 'connected'}
+              for ex in ('coinbase', 'binance', 'bybit', 'kraken', 'kucoin')}
+    worst = 0.0
+    for i in range(messages):
+        start = time.perf_counter()
+        bid = 65000.0 + (i % 100) * 0.01
+        hot_log("bbo", "%s Binance: highest bid=%s, lowest ask=%s", "BTC", bid, bid + 0.5)
+        if i % every == 0:
+            logger.info(f"BTC Arbitrage opportunity! Profit: 1.00 USDT | Buy on binance at {bid} | "
+                        f"Sell on bybit at {bid + 2} | Prices: {json.dumps(prices)}")
+            hot_log("opportunity", "Arbitrage opportunity! Profit: %.2f USDT", 1.0)
+        # One scheduling point per frame, like awaiting the websocket
+        await asyncio.sleep(0)
+        worst = max(worst, time.perf_counter() - start)
+    return worst
+
+
+def run(mode, args, workdir, stall_ms):
+    log_path = os.path.join(workdir, f"{mode}.log")
+    listener = configure(mode, log_path, args.stall_every, stall_ms)
+    logger = logging.getLogger("bench.hot")
+    hot_log = HotPathLog(logger, quiet=(mode == "quiet"))
+    stdout = sys.stdout
+    sys.stdout = open(os.path.join(workdir, f"{mode}.out"), "w", buffering=1)
+    try:
+        start = time.perf_counter()
+        worst = asyncio.run(hot_path(args.messages, args.every, hot_log, logger))
+        elapsed = time.perf_counter() - start
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+    if listener is not None:
+        drain = time.perf_counter()
+        listener.stop()
+        drain = time.perf_counter() - drain
+    else:
+        drain = 0.0
+    return elapsed, worst, drain
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=200000)
+    parser.add_argument("--every", type=int, default=50, help="one opportunity log line every N messages")
+    parser.add_argument("--stall-every", type=int, default=1000)
+    parser.add_argument("--stall-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    for label, stall_ms in (("page cache", 0), (f"disk stalls {args.stall_ms}ms every {args.stall_every} writes", args.stall_ms)):
+        with tempfile.TemporaryDirectory(prefix="bench_logging_") as workdir:
+            results = {mode: run(mode, args, workdir, stall_ms) for mode in ("sync", "queue", "quiet")}
+        base = results["sync"][0]
+        print(f"{label}:")
+        print(f"  {'mode':<6} {'msgs/s':>10} {'us/msg':>8} {'speedup':>8} {'worst msg':>10} {'drain':>9}")
+        for mode, (elapsed, worst, drain) in results.items():
+            print(f"  {mode:<6} {args.messages / elapsed:>10.0f} {elapsed / args.messages * 1e6:>8.2f} "
+                  f"{base / elapsed:>7.2f}x {worst * 1e3:>8.2f}ms {drain * 1e3:>7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Benchmark: últimas N líneas de un log grande, readlines() completo vs lectura inversa por bloques.
+
+Genera un log sintético con líneas como las de arb_op_*.log (oportunidad con
+el json de precios) hasta --size-mb y mide read_recent_logs con ambos métodos.
+
+    python -m benchmarks.bench_logtail [--size-mb 1024] [--path /tmp/bench_arb_op.log] [--keep]
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+from src.logtail import tail_lines
+
+LINES = (200, 500, 1000)
+
+
+def make_log(path, size_mb):
+    random.seed(1)
+    prices = {ex: {'bid': 65000.0, 'ask': 65000.5, 'timestamp': 1700000000.0, 'status': 'connected'}
+              for ex in ('coinbase', 'binance', 'bybit', 'kraken', 'kucoin')}
+    target = size_mb * 1024 * 1024
+    written = 0
+    with open(path, 'w') as f:
+        while written < target:
+            block = []
+            for _ in range(1000):
+                profit = random.uniform(0.01, 20)
+                block.append(f"2024-01-01 12:00:00,000 INFO src.main BTC Arbitrage opportunity! Profit: {profit:.2f} USDT | "
+                             f"Buy on binance at 65000.5 | Sell on coinbase at 65010.0 | Size: n/a | "
+                             f"Current time: 1700000000.0 | Prices: {json.dumps(prices)}\n")
+            chunk = "".join(block)
+            f.write(chunk)
+            written += len(chunk)
+
+
+def readlines_tail(path, n):
+    # The previous DashboardManager.read_recent_logs
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        all_lines = f.readlines()
+        return all_lines[-n:] if len(all_lines) > n else all_lines
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=1024)
+    parser.add_argument("--path", default="/tmp/bench_arb_op.log")
+    parser.add_argument("--keep", action="store_true", help="keep the generated log")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path) or os.path.getsize(args.path) < args.size_mb * 1024 * 1024:
+        print(f"Generating {args.size_mb} MB log at {args.path}...")
+        make_log(args.path, args.size_mb)
+    size_mb = os.path.getsize(args.path) / 1024 / 1024
+
+    print(f"{'lines':>6} {'readlines':>12} {'tail':>10} {'speedup':>10}  ({size_mb:.0f} MB file)")
+    try:
+        for n in LINES:
+            expected, t_full = timed(readlines_tail, args.path, n)
+            result, t_tail = timed(tail_lines, args.path, n)
+            assert result == expected
+            print(f"{n:>6} {t_full * 1e3:>10.1f}ms {t_tail * 1e3:>8.3f}ms {t_full / t_tail:>9.0f}x")
+    finally:
+        if not args.keep:
+            os.remove(args.path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Benchmark: consultas del dashboard sobre la base SQLite de oportunidades con millones de filas.
+
+Genera --rows oportunidades sintéticas repartidas en --days días y mide las
+consultas que hacen /api/opportunities y /api/opportunities/history, además
+del throughput del OpportunityWriter (record + flush por lotes).
+
+    python -m benchmarks.bench_opportunity_store [--rows 10000000] [--days 30] [--path /tmp/bench_opportunities.db] [--keep]
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+
+from src.opportunity_store import INSERT, OpportunityStore, OpportunityWriter, open_db
+
+SYMBOLS = ("BTC", "ETH")
+VENUES = ("binance", "bybit", "coinbase", "kraken", "kucoin")
+
+
+def make_db(path, rows, days):
+    random.seed(1)
+    conn = open_db(path)
+    start = time.time() - days * 86400
+    step = days * 86400 / rows
+    chunk = 100000
+    for offset in range(0, rows, chunk):
+        batch = []
+        for i in range(offset, min(offset + chunk, rows)):
+            buy, sell = random.sample(VENUES, 2)
+            price = 65000.0 + random.uniform(-500, 500)
+            spread = random.uniform(0.5, 30)
+            batch.append((start + i * step, random.choice(SYMBOLS), buy, price, sell, price + spread,
+                          spread / price * 100, spread - price * 0.002, 0.001, 0.001,
+                          random.uniform(0.001, 0.5), price, price + spread, spread * 0.1, random.uniform(0.05, 2)))
+        with conn:
+            conn.executemany(INSERT, batch)
+    conn.close()
+
+
+def timed(fn, repeat):
+    fn()  # warm the page cache
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeat
+
+
+async def writer_throughput(path, rows):
+    writer = OpportunityWriter(path)
+    start = time.perf_counter()
+    for _ in range(rows):
+        writer.record("BTC", "binance", 65000.0, "bybit", 65010.0, 5.0, buy_fee=0.001, sell_fee=0.001, latency=0.0003)
+    recorded = time.perf_counter() - start
+    await writer.flush()
+    return recorded, time.perf_counter() - start - recorded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--path", default="/tmp/bench_opportunities.db")
+    parser.add_argument("--keep", action="store_true", help="keep the generated database")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        print(f"Generating {args.rows} rows at {args.path}...")
+        start = time.perf_counter()
+        make_db(args.path, args.rows, args.days)
+        print(f"  {time.perf_counter() - start:.0f}s, {os.path.getsize(args.path) / 1024 / 1024:.0f} MB")
+
+    try:
+        store = OpportunityStore(args.path)
+        now = time.time()
+        since = now - 86400
+        queries = {
+            "summary by symbol (24h)": lambda: store.summary(since),
+            "recent 10 (24h)": lambda: store.history(since=since, limit=10),
+            "history BTC, 100 rows": lambda: store.history(symbol="BTC", limit=100),
+            "history pair, 1h window": lambda: store.history(buy_exchange="binance", sell_exchange="bybit",
+                                                             since=now - 3600, limit=5000),
+            "by pair (24h)": lambda: store.by_pair(since),
+            "by pair BTC (7d)": lambda: store.by_pair(now - 7 * 86400, symbol="BTC"),
+        }
+        print(f"{'query':<28} {'latency':>12} {'rows':>8}")
+        for name, query in queries.items():
+            result, elapsed = timed(query, args.repeat)
+            print(f"{name:<28} {elapsed * 1e3:>10.2f}ms {len(result):>8}")
+
+        recorded, flushed = asyncio.run(writer_throughput(args.path, 10000))
+        print(f"writer: record {recorded / 10000 * 1e6:.2f}us/row on the loop, flush of 10000 rows {flushed * 1e3:.1f}ms in a thread")
+        store.close()
+    finally:
+        if not args.keep:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(args.path + suffix):
+                    os.remove(args.path + suffix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Microbenchmark: coste por mensaje del libro dict + max()/min() frente a OrderBook.
+
+Simula un libro level2 de Coinbase (miles de niveles por lado) y aplica
+mensajes de actualización pequeños, leyendo el mejor bid/ask tras cada uno
+como hacen los listeners.
+
+    python -m benchmarks.bench_orderbook [--levels 5000] [--messages 20000]
+"""
+import argparse
+import random
+import time
+
+from src.orderbook import OrderBook
+
+
+def make_book(levels, mid=65000.0, tick=0.01):
+    bids = [(f"{mid - (i + 1) * tick:.2f}", f"{random.uniform(0.001, 2):.8f}") for i in range(levels)]
+    asks = [(f"{mid + (i + 1) * tick:.2f}", f"{random.uniform(0.001, 2):.8f}") for i in range(levels)]
+    return bids, asks
+
+
+def make_messages(count, levels, mid=65000.0, tick=0.01, per_message=4):
+    messages = []
+    for _ in range(count):
+        bids, asks = [], []
+        for _ in range(per_message):
+            offset = random.randint(1, levels) * tick
+            qty = "0" if random.random() < 0.3 else f"{random.uniform(0.001, 2):.8f}"
+            if random.random() < 0.5:
+                bids.append((f"{mid - offset:.2f}", qty))
+            else:
+                asks.append((f"{mid + offset:.2f}", qty))
+        messages.append((bids, asks))
+    return messages
+
+
+def run_dict(snapshot, messages):
+    order_book = {
+        'bids': {price: qty for price, qty in snapshot[0]},
+        'asks': {price: qty for price, qty in snapshot[1]}
+    }
+    start = time.perf_counter()
+    for bids, asks in messages:
+        for price, qty in bids:
+            if float(qty) == 0:
+                order_book['bids'].pop(price, None)
+            else:
+                order_book['bids'][price] = qty
+        for price, qty in asks:
+            if float(qty) == 0:
+                order_book['asks'].pop(price, None)
+            else:
+                order_book['asks'][price] = qty
+        max(float(p) for p in order_book['bids'].keys())
+        min(float(p) for p in order_book['asks'].keys())
+    return time.perf_counter() - start
+
+
+def run_orderbook(snapshot, messages):
+    order_book = OrderBook()
+    order_book.load(*snapshot)
+    start = time.perf_counter()
+    for bids, asks in messages:
+        order_book.update_bids(bids)
+        order_book.update_asks(asks)
+        order_book.best_bid()
+        order_book.best_ask()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--levels", type=int, default=5000, help="niveles por lado del snapshot")
+    parser.add_argument("--messages", type=int, default=20000)
+    args = parser.parse_args()
+
+    random.seed(1)
+    snapshot = make_book(args.levels)
+    messages = make_messages(args.messages, args.levels)
+
+    for name, runner in (("dict + max/min", run_dict), ("OrderBook", run_orderbook)):
+        elapsed = runner(snapshot, messages)
+        print(f"{name:>15}: {elapsed / args.messages * 1e6:10.2f} us/msg  ({args.messages / elapsed:,.0f} msg/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Benchmark: coste de CPU del FrameRecorder al ritmo de Coinbase level2 para BTC.
+
+Genera frames l2_data sintéticos con el tamaño y número de updates típicos y
+los emite a --rate frames/s durante --seconds segundos en un event loop, con
+y sin grabación. La diferencia de CPU del proceso (incluye el hilo escritor)
+entre ambas pasadas, dividida por la duración, es el overhead en % de un core.
+También mide el throughput máximo del escritor por codec disponible.
+
+    python -m benchmarks.bench_recorder [--rate 500] [--seconds 10] [--frames 200000]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+
+from src.recorder import FrameRecorder, default_codec, zstandard, lz4
+
+
+def make_frames(count):
+    random.seed(1)
+    frames = []
+    for seq in range(count):
+        updates = [{
+            "side": random.choice(("bid", "offer")),
+            "event_time": "2024-01-01T12:00:00.123456Z",
+            "price_level": f"{65000 + random.uniform(-50, 50):.2f}",
+            "new_quantity": f"{random.uniform(0, 2):.8f}",
+        } for _ in range(random.randint(1, 8))]
+        frames.append(json.dumps({
+            "channel": "l2_data", "client_id": "", "timestamp": "2024-01-01T12:00:00.123456789Z",
+            "sequence_num": seq, "events": [{"type": "update", "product_id": "BTC-USD", "updates": updates}]
+        }))
+    return frames
+
+
+async def paced(frames, rate, seconds, recorder):
+    interval = 1 / rate
+    start = time.perf_counter()
+    count = int(rate * seconds)
+    for i in range(count):
+        frame = frames[i % len(frames)]
+        if recorder is not None:
+            recorder.record('coinbase', 'ws', frame)
+        # Stand-in for the listener's own work so both runs share the same loop shape
+        json.loads(frame)
+        delay = start + (i + 1) * interval - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+    return count
+
+
+def cpu_run(frames, rate, seconds, codec, directory):
+    recorder = FrameRecorder(directory, prefix="bench", codec=codec).start() if codec else None
+    cpu = time.process_time()
+    wall = time.perf_counter()
+    asyncio.run(paced(frames, rate, seconds, recorder))
+    if recorder is not None:
+        recorder.close()
+    return time.process_time() - cpu, time.perf_counter() - wall, recorder
+
+
+def throughput(frames, codec, directory):
+    recorder = FrameRecorder(directory, prefix=f"max-{codec}", codec=codec, queue_size=len(frames) + 1, batch_interval=0)
+    for frame in frames:
+        recorder.record('coinbase', 'ws', frame)
+    start = time.perf_counter()
+    recorder.start()
+    recorder.close()
+    elapsed = time.perf_counter() - start
+    raw = sum(len(frame) for frame in frames)
+    compressed = sum(os.path.getsize(path) for path in recorder.segments)
+    return len(frames) / elapsed, raw / compressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=int, default=500, help="frames per second (Coinbase BTC level2 is a few hundred)")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--frames", type=int, default=200000, help="frames for the max-throughput test")
+    args = parser.parse_args()
+
+    frames = make_frames(20000)
+    avg = sum(len(frame) for frame in frames) / len(frames)
+    codec = default_codec()
+    with tempfile.TemporaryDirectory(prefix="bench_recorder_") as directory:
+        base_cpu, base_wall, _ = cpu_run(frames, args.rate, args.seconds, None, directory)
+        rec_cpu, rec_wall, recorder = cpu_run(frames, args.rate, args.seconds, codec, directory)
+        overhead = (rec_cpu - base_cpu) / rec_wall * 100
+        print(f"{args.rate} frames/s for {args.seconds:.0f}s, {avg:.0f} B/frame avg, codec {codec}")
+        print(f"  cpu without recorder: {base_cpu / base_wall * 100:6.2f}% of a core")
+        print(f"  cpu with recorder:    {rec_cpu / rec_wall * 100:6.2f}% of a core")
+        print(f"  recorder overhead:    {overhead:6.2f}% of a core "
+              f"({(rec_cpu - base_cpu) / (args.rate * args.seconds) * 1e6:.1f} us/frame), dropped {recorder.dropped}")
+
+        big = (frames * (args.frames // len(frames) + 1))[:args.frames]
+        codecs = ['gzip'] + (['lz4'] if lz4 is not None else []) + (['zstd'] if zstandard is not None else [])
+        print("max writer throughput:")
+        for name in codecs:
+            rate, ratio = throughput(big, name, directory)
+            print(f"  {name:<5} {rate:>10.0f} frames/s  compression {ratio:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Benchmark: matriz de spread neto N x N, actualización fila/columna vs recálculo completo.
+
+Cada iteración es un tick de un venue seguido de la consulta de los mejores pares.
+
+    python -m benchmarks.bench_spreads [--iterations 50000] [--top 5]
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from src.spreads import SpreadMatrix
+
+VENUES = (2, 5, 10, 25, 50)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50000)
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    random.seed(1)
+    print(f"{'venues':>6} {'full':>10} {'row/col':>10} {'top_pairs':>10}")
+    for count in VENUES:
+        venues = [f"venue{i}" for i in range(count)]
+        fees = {v: random.choice((0.0006, 0.001, 0.0026)) for v in venues}
+        ticks = []
+        for _ in range(args.iterations):
+            bid = 65000 + random.uniform(-50, 50)
+            ticks.append((random.randrange(count), bid, bid + random.uniform(0.01, 2)))
+
+        # Full recompute: the outer subtraction over every venue on each tick
+        fee = np.array([fees[v] for v in venues])
+        bids = np.full(count, np.nan)
+        asks = np.full(count, np.nan)
+        start = time.perf_counter()
+        for i, bid, ask in ticks:
+            bids[i], asks[i] = bid, ask
+            spread = (bids * (1 - fee))[None, :] - (asks * (1 + fee))[:, None]
+            np.fill_diagonal(spread, np.nan)
+        t_full = (time.perf_counter() - start) / args.iterations
+
+        matrix = SpreadMatrix(fees)
+        for v in venues:
+            matrix.update(v, 65000.0, 65001.0)
+        start = time.perf_counter()
+        for i, bid, ask in ticks:
+            matrix.update(venues[i], bid, ask)
+        t_update = (time.perf_counter() - start) / args.iterations
+
+        start = time.perf_counter()
+        for _ in range(args.iterations // 10):
+            matrix.top_pairs(args.top)
+        t_top = (time.perf_counter() - start) / (args.iterations // 10)
+
+        print(f"{count:>6} {t_full * 1e6:>8.2f}us {t_update * 1e6:>8.2f}us {t_top * 1e6:>8.2f}us")
+
+
+if __name__ == "__main__":
+    main()
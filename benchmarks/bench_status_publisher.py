@@ -0,0 +1,95 @@
+"""Benchmark: bloqueo del event loop al publicar estado en Redis, síncrono vs agrupado.
+
+Simula varios venues emitiendo ticks a un ritmo fijo durante unos segundos y
+mide el lag del event loop con monitor_loop_lag en dos modos:
+  sync  - un setex de status más uno por exchange en cada tick con el cliente
+          redis síncrono (el comportamiento anterior de update_price)
+  async - StatusPublisher: los ticks solo marcan el estado y se vuelca cada
+          STATUS_FLUSH_INTERVAL en un pipeline de redis.asyncio
+
+Necesita un Redis accesible en --redis-url (por defecto REDIS_URL o localhost).
+
+    python -m benchmarks.bench_status_publisher [--rate 2000] [--seconds 5] [--venues 5]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+import redis
+
+from src.metrics import LatencyRecorder, monitor_loop_lag
+from src.status_publisher import StatusPublisher
+
+
+class Watcher:
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.prices = {}
+        self.publisher = None
+
+    def status_data(self):
+        return {'symbol': self.symbol, 'last_update': time.time(),
+                'exchanges': {exchange: dict(data) for exchange, data in self.prices.items()}}
+
+    def write_status_file(self, status_data):
+        pass
+
+
+async def run(mode, args):
+    watcher = Watcher("BENCH")
+    venues = [f"venue{i}" for i in range(args.venues)]
+    lag = LatencyRecorder(f"{mode} loop lag")
+    sync_client = redis.from_url(args.redis_url, decode_responses=True) if mode == "sync" else None
+    publisher = StatusPublisher(watcher, args.redis_url) if mode == "async" else None
+    tasks = [asyncio.create_task(monitor_loop_lag(lag, 0.01))]
+    if publisher:
+        tasks.append(asyncio.create_task(publisher.run()))
+        await asyncio.sleep(0.1)
+    lag.reset()
+
+    commands = 0
+    ticks = 0
+    gap = 1 / args.rate
+    deadline = time.perf_counter() + args.seconds
+    next_tick = time.perf_counter()
+    while time.perf_counter() < deadline:
+        exchange = random.choice(venues)
+        bid = 65000 + random.uniform(-5, 5)
+        watcher.prices[exchange] = {'bid': bid, 'ask': bid + 0.5, 'timestamp': time.time(), 'status': 'connected'}
+        if sync_client:
+            sync_client.set(f"status:{watcher.symbol}", json.dumps(watcher.status_data()), ex=60)
+            for name, data in watcher.prices.items():
+                sync_client.set(f"exchange:{watcher.symbol}:{name}", json.dumps(data), ex=60)
+            commands += 1 + len(watcher.prices)
+        else:
+            publisher.mark_dirty()
+        ticks += 1
+        next_tick += gap
+        await asyncio.sleep(max(next_tick - time.perf_counter(), 0))
+
+    round_trips = commands if sync_client else publisher.flush_latency.count
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return lag, ticks, round_trips
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=int, default=2000, help="ticks per second")
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--venues", type=int, default=5)
+    parser.add_argument("--redis-url", default=os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    args = parser.parse_args()
+
+    random.seed(1)
+    for mode in ("sync", "async"):
+        lag, ticks, round_trips = asyncio.run(run(mode, args))
+        print(f"{lag.format()} | ticks={ticks}/{int(args.rate * args.seconds)} | redis round trips={round_trips}")
+
+
+if __name__ == "__main__":
+    main()
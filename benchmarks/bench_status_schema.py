@@ -0,0 +1,88 @@
+"""Benchmark: esquema de estado en Redis, blobs JSON vs hash por símbolo.
+
+Escritura: bytes de payload y round trips por flush cuando un venue cambia,
+con las claves JSON legacy (status + una por exchange) frente a HSET de los
+campos cambiados en state:{symbol}.
+Lectura: lo que hace el dashboard por refresco, un GET + json.loads por
+símbolo frente a un único pipeline de HGETALL.
+
+Necesita un Redis accesible en --redis-url (por defecto REDIS_URL o localhost).
+
+    python -m benchmarks.bench_status_schema [--symbols 10] [--venues 5] [--iterations 500]
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+import redis
+
+from src.status_schema import STATUS_KEY, STATE_KEY, flatten_status, unflatten_status, changed_fields
+
+
+def make_status(symbol, venues):
+    bid = random.uniform(100, 70000)
+    return {
+        'symbol': symbol,
+        'last_update': time.time(),
+        'last_update_readable': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'exchanges': {v: {'bid': bid, 'ask': bid + 0.5, 'timestamp': time.time(), 'status': 'connected'} for v in venues},
+        'top_pairs': [{'buy': venues[0], 'sell': venues[1], 'net_spread': 0.5, 'net_spread_pct': 0.001}],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=10)
+    parser.add_argument("--venues", type=int, default=5)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--redis-url", default=os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    args = parser.parse_args()
+
+    random.seed(1)
+    client = redis.from_url(args.redis_url, decode_responses=True)
+    symbols = [f"BENCH{i}" for i in range(args.symbols)]
+    venues = [f"venue{i}" for i in range(args.venues)]
+    statuses = {s: make_status(s, venues) for s in symbols}
+
+    # Write: one venue ticks between flushes
+    status = statuses[symbols[0]]
+    published = flatten_status(status)
+    json_bytes = hash_bytes = 0
+    for _ in range(args.iterations):
+        venue = random.choice(venues)
+        status['exchanges'][venue] = dict(status['exchanges'][venue], bid=random.uniform(100, 70000), timestamp=time.time())
+        status['last_update'] = time.time()
+        json_bytes += len(json.dumps(status)) + sum(len(json.dumps(d)) for d in status['exchanges'].values())
+        fields = flatten_status(status)
+        hash_bytes += sum(len(k) + len(v) for k, v in changed_fields(published, fields).items())
+        published = fields
+    print(f"write per flush: json {json_bytes / args.iterations:.0f} B in {1 + args.venues} SETs | "
+          f"hash {hash_bytes / args.iterations:.0f} B in 1 HSET + EXPIRE")
+
+    for symbol, data in statuses.items():
+        client.set(STATUS_KEY.format(symbol=symbol), json.dumps(data), ex=300)
+        client.hset(STATE_KEY.format(symbol=symbol), mapping=flatten_status(data))
+        client.expire(STATE_KEY.format(symbol=symbol), 300)
+
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        for symbol in symbols:
+            json.loads(client.get(STATUS_KEY.format(symbol=symbol)))
+    t_json = (time.perf_counter() - start) / args.iterations
+
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        with client.pipeline(transaction=False) as pipe:
+            for symbol in symbols:
+                pipe.hgetall(STATE_KEY.format(symbol=symbol))
+            [unflatten_status(fields) for fields in pipe.execute()]
+    t_hash = (time.perf_counter() - start) / args.iterations
+
+    print(f"read {args.symbols} symbols: json {t_json * 1e3:.3f}ms in {args.symbols} round trips | "
+          f"hash {t_hash * 1e3:.3f}ms in 1 round trip")
+
+
+if __name__ == "__main__":
+    main()
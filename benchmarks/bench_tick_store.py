@@ -0,0 +1,106 @@
+"""Benchmark: consultas de un día de ticks de BTC en 5 venues sobre el almacén columnar.
+
+Escribe --rate ticks/s por venue durante 24 h (random walk común más ruido por
+venue) con TickStoreWriter y profundidad --depth, y mide:
+  - coste de append() en el event loop con un OrderBook real (lectura de niveles incluida)
+  - throughput de escritura del volcado
+  - escaneo del día completo (BBO de los 5 venues), history() para un gráfico y
+    spread_stats() de los 20 pares, primera lectura y con la caché de páginas caliente
+
+    python -m benchmarks.bench_tick_store [--rate 20] [--venues 5] [--depth 5]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from src.orderbook import OrderBook
+from src.tick_store import TickStore, TickStoreWriter
+
+DAY = 86400
+T0 = 1700006400.0
+
+
+def make_book(depth):
+    book = OrderBook(2, 8)
+    book.load([(f"{65000 - i:.2f}", "0.5") for i in range(depth * 4)],
+              [(f"{65001 + i:.2f}", "0.5") for i in range(depth * 4)])
+    return book
+
+
+def write_day(directory, venues, rate, depth, chunk=200000):
+    rng = np.random.default_rng(1)
+    count = int(rate * DAY)
+    writer = TickStoreWriter("BTC", directory, depth=depth, buffer=chunk + 1)
+    book = make_book(depth)
+    elapsed = rows = 0
+    for v in range(venues):
+        ts = T0 + np.sort(rng.uniform(0, DAY, count))
+        mid = 65000 + np.cumsum(rng.normal(0, 1, count)) + rng.normal(0, 5, count)
+        for offset in range(0, count, chunk):
+            for t, m in zip(ts[offset:offset + chunk].tolist(), mid[offset:offset + chunk].tolist()):
+                writer.append(f"venue{v}", round(m - 0.5, 2), round(m + 0.5, 2), t, book)
+            batch = list(writer.pending)
+            writer.pending.clear()
+            start = time.perf_counter()
+            writer._write(batch)
+            elapsed += time.perf_counter() - start
+            rows += len(batch)
+    return rows, elapsed
+
+
+def append_cost(depth, count=100000, flush_every=1000):
+    writer = TickStoreWriter("BTC", "/nonexistent", depth=depth)
+    book = make_book(depth)
+    start = time.perf_counter()
+    for i in range(count):
+        writer.append("venue0", 65000.0, 65001.0, T0 + i, book)
+        if i % flush_every == 0:
+            # The live writer drains the queue every second, so it never holds more than ~a second of rows
+            writer.pending.clear()
+    return (time.perf_counter() - start) / count
+
+
+def query(store, venues):
+    timings = {}
+    start = time.perf_counter()
+    data = store.scan_all("BTC", T0, T0 + DAY)
+    total = sum(float(np.nansum(values['bid'])) for values in data.values())  # touch every page
+    timings['scan'] = time.perf_counter() - start
+    start = time.perf_counter()
+    store.history("BTC", T0, T0 + DAY, points=1000)
+    timings['history'] = time.perf_counter() - start
+    start = time.perf_counter()
+    stats = store.spread_stats("BTC", T0, T0 + DAY, fees={f"venue{v}": 0.001 for v in range(venues)})
+    timings['spread_stats'] = time.perf_counter() - start
+    return timings, sum(len(values['ts']) for values in data.values()), len(stats), total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=20, help="BBO changes per second per venue")
+    parser.add_argument("--venues", type=int, default=5)
+    parser.add_argument("--depth", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"append(): {append_cost(args.depth) * 1e6:.2f} us with depth {args.depth}, "
+          f"{append_cost(0) * 1e6:.2f} us BBO only")
+    directory = tempfile.mkdtemp(prefix="bench_tick_store_")
+    try:
+        rows, elapsed = write_day(directory, args.venues, args.rate, args.depth)
+        size = sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(directory) for name in names)
+        print(f"wrote {rows:,} rows ({size / 1e6:.0f} MB) in {elapsed:.1f}s: {rows / elapsed:,.0f} rows/s")
+        store = TickStore(directory)
+        for label in ("first read", "warm"):
+            timings, scanned, pairs, _ = query(store, args.venues)
+            print(f"{label}: scan {scanned:,} ticks {timings['scan'] * 1000:.0f} ms | history {timings['history'] * 1000:.0f} ms"
+                  f" | spread_stats ({pairs} pairs) {timings['spread_stats'] * 1000:.0f} ms")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark: stream Redis de ticks, XADD uno a uno vs lotes en pipeline, y lectura con consumer group.
+
+Produce --ticks ticks en ticks:BENCH con un XADD (MAXLEN ~) por round trip y
+después con TickStream.flush, que los agrupa en un pipeline cada
+--batch ticks. Luego los consume con read_ticks y reporta ticks/s.
+
+Necesita un Redis accesible en --redis-url (por defecto REDIS_URL o localhost).
+
+    python -m benchmarks.bench_tick_stream [--ticks 20000] [--batch 200]
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+
+import redis.asyncio as aioredis
+
+from src.tick_stream import TickStream, TICK_STREAM_KEY, read_ticks
+
+
+class Watcher:
+    symbol = "BENCH"
+    books = {}
+
+
+class Publisher:
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+
+
+def make_ticks(count):
+    ticks = []
+    for _ in range(count):
+        bid = 65000 + random.uniform(-5, 5)
+        ticks.append((random.choice(("binance", "coinbase", "kraken", "bybit", "kucoin")), bid, bid + 0.5, time.time()))
+    return ticks
+
+
+async def run(args):
+    client = aioredis.from_url(args.redis_url, decode_responses=True)
+    key = TICK_STREAM_KEY.format(symbol=Watcher.symbol)
+    ticks = make_ticks(args.ticks)
+
+    await client.delete(key)
+    start = time.perf_counter()
+    for exchange, bid, ask, ts in ticks:
+        await client.xadd(key, {'exchange': exchange, 'bid': repr(bid), 'ask': repr(ask), 'ts': repr(ts)},
+                          maxlen=args.ticks * 2, approximate=True)
+    t_single = time.perf_counter() - start
+
+    await client.delete(key)
+    stream = TickStream(Watcher(), Publisher(client), maxlen=args.ticks * 2, buffer=args.ticks)
+    start = time.perf_counter()
+    for i, tick in enumerate(ticks, 1):
+        stream.append(*tick)
+        if i % args.batch == 0:
+            await stream.flush()
+    await stream.flush()
+    t_batched = time.perf_counter() - start
+
+    print(f"produce {args.ticks} ticks: single XADD {args.ticks / t_single:,.0f}/s | "
+          f"pipelined x{args.batch} {args.ticks / t_batched:,.0f}/s ({t_single / t_batched:.1f}x)")
+
+    consumed = 0
+    start = time.perf_counter()
+    async for batch in read_ticks(client, Watcher.symbol, "bench", "consumer-1", count=args.batch, start_id='0'):
+        consumed += len(batch)
+        if consumed >= args.ticks:
+            break
+    t_read = time.perf_counter() - start
+    print(f"consume {consumed} ticks via consumer group: {consumed / t_read:,.0f}/s")
+
+    await client.delete(key)
+    await client.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ticks", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=200)
+    parser.add_argument("--redis-url", default=os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    args = parser.parse_args()
+
+    random.seed(1)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Benchmark: coste de evaluar el tamaño ejecutable (VWAP) por cambio de BBO.
+
+Mide lo que hace check_opportunity_loop por oportunidad (LivePriceWatcher.get_pair_size:
+ladder_arrays de los dos libros y pair_size) frente al recorrido nivel a nivel
+en Python sobre listas de floats, que fue la primera implementación.
+
+    python -m benchmarks.bench_vwap [--iterations 20000]
+"""
+import argparse
+import random
+import time
+
+from src.ladders import ladder_arrays, pair_size
+from src.orderbook import OrderBook
+
+DEPTHS = (10, 20, 50, 100, 500)
+
+
+def bid_levels(order_book, n):
+    """Los n mejores bids como [(price, size), ...] en floats"""
+    price_scale = 10 ** order_book.price_decimals
+    qty_scale = 10 ** order_book.qty_decimals
+    return [(-ticks / price_scale, lots / qty_scale) for ticks, lots in order_book.bids.items()[:n]]
+
+
+def ask_levels(order_book, n):
+    price_scale = 10 ** order_book.price_decimals
+    qty_scale = 10 ** order_book.qty_decimals
+    return [(ticks / price_scale, lots / qty_scale) for ticks, lots in order_book.asks.items()[:n]]
+
+
+def walk_books(asks, bids, buy_fee, sell_fee):
+    """Tamaño máximo rentable comprando en `asks` y vendiendo en `bids`, recorriendo ambos libros a la vez.
+
+    Los niveles son [(price, size), ...] del mejor al peor. Retorna dict con
+    size, buy_vwap, sell_vwap y profit, o None si ni el primer nivel es rentable.
+    """
+    i = j = 0
+    ask_left = asks[0][1] if asks else 0.0
+    bid_left = bids[0][1] if bids else 0.0
+    size = cost = proceeds = 0.0
+
+    while i < len(asks) and j < len(bids):
+        ask_price = asks[i][0]
+        bid_price = bids[j][0]
+        if bid_price * (1 - sell_fee) <= ask_price * (1 + buy_fee):
+            break
+        take = ask_left if ask_left < bid_left else bid_left
+        size += take
+        cost += take * ask_price
+        proceeds += take * bid_price
+        ask_left -= take
+        bid_left -= take
+        if ask_left <= 0:
+            i += 1
+            if i < len(asks):
+                ask_left = asks[i][1]
+        if bid_left <= 0:
+            j += 1
+            if j < len(bids):
+                bid_left = bids[j][1]
+
+    if size <= 0:
+        return None
+    return {
+        'size': size,
+        'buy_vwap': cost / size,
+        'sell_vwap': proceeds / size,
+        'profit': proceeds * (1 - sell_fee) - cost * (1 + buy_fee)
+    }
+
+
+def make_book(mid, levels):
+    order_book = OrderBook(2, 8)
+    order_book.load(
+        [(f"{mid - (i + 1) * 0.01:.2f}", f"{random.uniform(0.001, 0.5):.8f}") for i in range(levels)],
+        [(f"{mid + (i + 1) * 0.01:.2f}", f"{random.uniform(0.001, 0.5):.8f}") for i in range(levels)],
+    )
+    return order_book
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    random.seed(1)
+    print(f"{'levels':>6} {'python walk':>14} {'pair_size':>12} {'size':>12}")
+    for levels in DEPTHS:
+        # Sell venue bids sit above buy venue asks for roughly half the ladder
+        buy_book = make_book(65000.0, levels)
+        sell_book = make_book(65000.0 + levels * 0.01, levels)
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            walked = walk_books(ask_levels(buy_book, levels), bid_levels(sell_book, levels), 0.0, 0.0)
+        t_walk = (time.perf_counter() - start) / args.iterations
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            result = pair_size(ladder_arrays(buy_book, levels), ladder_arrays(sell_book, levels), 0.0, 0.0)
+        t_arrays = (time.perf_counter() - start) / args.iterations
+        # Levels where bid == ask add no profit, so both can stop at different (equally good) sizes
+        assert abs(result['profit'] - walked['profit']) < 1e-6
+        print(f"{levels:>6} {t_walk * 1e6:>11.2f} us {t_arrays * 1e6:>9.2f} us {result['size']:>12.6f}")
+
+
+if __name__ == "__main__":
+    main()
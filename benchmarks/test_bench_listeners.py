@@ -0,0 +1,51 @@
+"""Suite pytest-benchmark del camino parse → libro → BBO → update_price de cada listener.
+
+Usa los mismos frames sintéticos y el mismo motor que bench_listeners; cada ronda
+es una sesión completa de MESSAGES mensajes. En extra_info quedan mensajes/s,
+p50/p99 por mensaje y los bytes asignados por mensaje, y con --benchmark-compare
+se detectan regresiones contra una ejecución guardada. El tiempo de cada ronda de
+KuCoin incluye el segundo que su listener acumula el stream antes de pedir el
+snapshot; su coste por mensaje está en extra_info.
+
+    pip install pytest-benchmark
+    python -m pytest benchmarks --benchmark-only --benchmark-autosave
+    python -m pytest benchmarks --benchmark-only --benchmark-compare --benchmark-compare-fail=mean:15%
+"""
+import asyncio
+import logging
+import sys
+
+import pytest
+
+from benchmarks.bench_listeners import EXCHANGES, run_exchange, synthetic_records
+
+pytest.importorskip("pytest_benchmark")
+
+MESSAGES = 2000
+
+
+@pytest.fixture(autouse=True)
+def quiet_listeners(monkeypatch):
+    # src.main reads the symbol from argv and configures file logging on import
+    monkeypatch.setattr(sys, 'argv', ['bench', 'BTC'])
+    monkeypatch.setattr(logging.getLogger(), 'handlers', [*logging.getLogger().handlers, logging.NullHandler()])
+
+
+@pytest.mark.parametrize("exchange", EXCHANGES)
+def test_listener(benchmark, exchange):
+    records = synthetic_records(exchange, MESSAGES)
+    engine, stats = benchmark.pedantic(lambda: asyncio.run(run_exchange(exchange, records)), rounds=5, warmup_rounds=1)
+    assert stats['connects'].get(exchange) == 1 and None not in stats['prices'][exchange]
+
+    summary = engine.latency.summary()
+    benchmark.extra_info.update({
+        'messages': stats['by_exchange'][exchange],
+        'msgs_per_s': summary['count'] / sum(engine.latency.samples),
+        'p50_us': summary['p50'] * 1000,
+        'p99_us': summary['p99'] * 1000,
+    })
+    # Allocations from a separate traced session, outside the timed rounds
+    traced, _ = asyncio.run(run_exchange(exchange, records, trace=True))
+    if traced.peaks:
+        benchmark.extra_info['peak_bytes_per_msg'] = sum(traced.peaks) / len(traced.peaks)
+        benchmark.extra_info['retained_bytes_per_msg'] = (traced.traced_end - traced.traced_start) / len(traced.peaks)
@@ -1,2 +1,104 @@
+import os
+
 STALE_TIME = 10 #seconds
-MAX_WS_RECONNECTS = 10 #attempts
\ No newline at end of file
+MAX_WS_RECONNECTS = 10 #attempts
+
+# Decimales (precio, cantidad) iniciales del libro local por exchange: tick = 10**-precio, lot = 10**-cantidad.
+# Un mercado con más decimales no falla: el libro amplía su precisión al primer valor que lo necesite.
+# Kraken no aparece porque se infiere del snapshot para reproducir su formato exacto (checksum).
+BOOK_PRECISION = {
+    'binance': (8, 8),
+    'coinbase': (8, 8),
+    'bybit': (8, 8),
+    'kucoin': (8, 8),
+}
+
+
+# Profundidad del libro de Kraken (valores admitidos por la API v2: 10, 25, 100, 500)
+KRAKEN_BOOK_DEPTH = 25
+
+# Niveles por lado usados para calcular el tamaño ejecutable (VWAP) de una oportunidad
+OPPORTUNITY_DEPTH_LEVELS = 20
+# Nocional mínimo (USDT) ejecutable para registrar una oportunidad
+MIN_OPPORTUNITY_NOTIONAL = 10
+
+# El detector se despierta con cada cambio de BBO; sin cambios revisa precios caducados cada N segundos
+DETECTOR_IDLE_TIMEOUT = 0.5
+# Cada cuántos segundos se registra la latencia tick-a-decisión del detector
+LATENCY_REPORT_INTERVAL = 60
+
+# Comisiones taker por exchange (formato ccxt fetch_trading_fees) usadas para el spread neto.
+# Son las públicas de nivel base (Coinbase 1.2%, Kraken 0.26%, Binance 0.1%), no las de la cuenta,
+# así que solo se usan con USE_EXCHANGE_FEES=1; por defecto todos los venues pagan DEFAULT_TAKER_FEE
+USE_EXCHANGE_FEES = os.getenv("USE_EXCHANGE_FEES", "0").lower() in ("1", "true", "yes")
+EXCHANGE_FEES_PATH = os.path.join(os.path.dirname(__file__), "exchange_fees.json") if USE_EXCHANGE_FEES else None
+# Comisión de la cuenta (la que usaba el detector) para exchanges sin comisión propia, y overrides por exchange (ej. {'kraken': 0.0016})
+DEFAULT_TAKER_FEE = 0.0006
+TAKER_FEE_OVERRIDES = {}
+# Pares (buy, sell) con mejor spread neto que se exponen al detector y al dashboard
+TOP_SPREAD_PAIRS = 5
+
+# Cadencia (segundos) con la que se vuelca el estado agrupado a Redis, y TTL de las claves
+STATUS_FLUSH_INTERVAL = 0.25
+STATUS_TTL = 60
+# Intervalo (segundos) del monitor de bloqueo del event loop
+LOOP_LAG_INTERVAL = 0.1
+# Cada cuántos segundos se publican en Redis (latency:{symbol}) los histogramas de latencia por venue
+LATENCY_PUBLISH_INTERVAL = 10
+# Escribir también las claves JSON legacy (status:{symbol}, exchange:{symbol}:{exchange}) además del hash state:{symbol}
+REDIS_STATUS_JSON = True
+
+# Stream Redis ticks:{symbol} con cada cambio de BBO: longitud aproximada máxima, cadencia de volcado (s),
+# niveles por lado a incluir (0 = solo BBO) y ticks que se retienen en memoria si Redis no responde
+TICK_STREAM_MAXLEN = 100000
+TICK_STREAM_FLUSH_INTERVAL = 0.05
+TICK_STREAM_DEPTH = 0
+TICK_STREAM_BUFFER = 10000
+
+# Base SQLite (WAL) donde el detector registra cada oportunidad; vacía para desactivarla.
+# Cadencia de escritura por lotes (s) y filas retenidas en memoria si la escritura falla
+OPPORTUNITY_DB_PATH = os.getenv("OPPORTUNITY_DB", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "opportunities.db"))
+OPPORTUNITY_FLUSH_INTERVAL = 1.0
+OPPORTUNITY_BUFFER = 10000
+
+# Escritura de logs a archivo desde un hilo aparte (QueueHandler/QueueListener) en vez de en el event loop
+LOG_QUEUE = True
+# Modo quiet: los print del camino caliente (cada BBO, cada evaluación) pasan a logger.info limitado
+# a uno cada HOT_PATH_LOG_INTERVAL segundos por tipo de mensaje. Se activa con QUIET_MODE=1
+QUIET_MODE = os.getenv("QUIET_MODE", "0").lower() in ("1", "true", "yes")
+HOT_PATH_LOG_INTERVAL = 5.0
+
+# Grabación de frames crudos de websocket y snapshots REST para reproducir sesiones (RECORD_FRAMES=1).
+# Codec None = zstd si está instalado, si no lz4, si no gzip. Rotación por bytes sin comprimir o por tiempo (s),
+# frames en cola antes de descartar, y cada cuánto (s) se vuelca el bloque comprimido a disco
+RECORD_FRAMES = os.getenv("RECORD_FRAMES", "0").lower() in ("1", "true", "yes")
+RECORD_DIR = os.getenv("RECORD_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "captures"))
+RECORD_CODEC = None
+RECORD_SEGMENT_BYTES = 256 * 1024 * 1024
+RECORD_SEGMENT_SECONDS = 3600
+RECORD_QUEUE = 100000
+RECORD_FLUSH_INTERVAL = 1.0
+# Cada cuánto (s) el hilo grabador vacía la cola y comprime el lote
+RECORD_BATCH_INTERVAL = 0.05
+
+# Replay: segundos que un exchange espera su turno en el orden grabado antes de adelantarse a otro
+REPLAY_PATIENCE = 0.05
+
+# Backtest: latencia (s) de envío de órdenes por defecto (número o {exchange: s}) y nocional (USDT) por operación
+BACKTEST_ORDER_LATENCY = 0.05
+BACKTEST_NOTIONAL = 1000
+
+# Almacén columnar de ticks (BBO + top-N niveles por lado) por símbolo, venue y día UTC, leído con memmap (TICK_STORE=1).
+# Cadencia de volcado (s) y filas retenidas en memoria si la escritura falla
+TICK_STORE = os.getenv("TICK_STORE", "0").lower() in ("1", "true", "yes")
+TICK_STORE_DIR = os.getenv("TICK_STORE_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "ticks"))
+TICK_STORE_DEPTH = 5
+TICK_STORE_FLUSH_INTERVAL = 1.0
+TICK_STORE_BUFFER = 100000
+
+# Endpoint Prometheus (GET /metrics) servido por cada proceso src.main con aiohttp; METRICS_PORT=0 lo desactiva
+METRICS_HOST = os.getenv("METRICS_HOST", "0.0.0.0")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+# Límites `le` (segundos) de los histogramas de latencia exportados, de 50 us a 10 s
+METRICS_LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                           1.0, 2.5, 5.0, 10.0)
@@ -1,4 +1,5 @@
 import ccxt
+import numpy as np
 from tabulate import tabulate
 
 def simulate_trade(exchange: str, symbol: str, side: str, amount: float, order_type: str, limit_price: float = None, depth: int = 10):
@@ -37,8 +38,6 @@ def simulate_trade(exchange: str, symbol: str, side: str, amount: float, order_t
     try:
         ticker = ex_obj.fetch_ticker(symbol)
         book = ex_obj.fetch_order_book(symbol, limit=depth)
-        asks = [{"price": price, "amount": vol} for price, vol in book['asks']]
-        bids = [{"price": price, "amount": vol} for price, vol in book['bids']]
 
         # Mostrar precio, asks (ventas) y bids (compras)
         print(f"📈 Precio actual (último trade): {ticker['last']} USDT")
@@ -56,30 +55,25 @@ def simulate_trade(exchange: str, symbol: str, side: str, amount: float, order_t
     except Exception as e:
         return None, 0, f"❌ Error al obtener order book: {e}"
     
-    levels = asks if side == 'buy' else bids
-    remaining = amount
-    total_cost = 0
-    total_filled = 0
+    levels = book['asks'] if side == 'buy' else book['bids']
+    prices = np.array([level[0] for level in levels], dtype=float)
+    sizes = np.array([level[1] for level in levels], dtype=float)
 
     # === 3. Filtrar si es limit order
     if order_type == 'limit':
         if limit_price is None:
             raise ValueError("Se requiere 'limit_price' para orden límite.")
-        if side == 'buy':
-            levels = [l for l in levels if l["price"] <= limit_price]
-        else:
-            levels = [l for l in levels if l["price"] >= limit_price]
+        mask = prices <= limit_price if side == 'buy' else prices >= limit_price
+        prices, sizes = prices[mask], sizes[mask]
 
-    # === 4. Simulación de ejecución
-    for level in levels:
-        price = level["price"]
-        available = level["amount"]
-        trade_size = min(remaining, available)
-        total_cost += trade_size * price
-        remaining -= trade_size
-        total_filled += trade_size
-        if remaining <= 0:
-            break
+    # === 4. Simulación de ejecución (vectorizada: cumsum + searchsorted en vez de recorrer niveles)
+    cum_size = np.cumsum(sizes)
+    total_filled = float(min(amount, cum_size[-1])) if len(cum_size) else 0
+    total_cost = 0
+    if total_filled > 0:
+        level = np.searchsorted(cum_size, total_filled)
+        prev_size = cum_size[level - 1] if level > 0 else 0.0
+        total_cost = float(np.dot(prices[:level], sizes[:level]) + (total_filled - prev_size) * prices[level])
 
     # === 5. Resultados
     if total_filled == 0:
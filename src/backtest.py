@@ -0,0 +1,363 @@
+"""Backtest del detector de oportunidades sobre ticks grabados, con modelo de comisiones y latencias.
+
+    python -m src.backtest ticks data/captures --symbol BTC --out data/btc_ticks.npy
+    python -m src.backtest ticks --redis --symbol BTC --out data/btc_ticks.npy
+    python -m src.backtest ticks --store --symbol BTC [--since 1700000000 --until 1700086400] --out data/btc_ticks.npy
+    python -m src.backtest run data/btc_ticks.npy [--min-profit 1] [--order-latency 0.05] [--feed-latency 0.02]
+    python -m src.backtest sweep data/btc_ticks.npy --grid '{"min_profit": [0, 1, 5], "order_latency": [0.01, 0.1]}'
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import math
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from config.settings import (
+    STALE_TIME, EXCHANGE_FEES_PATH, DEFAULT_TAKER_FEE, TAKER_FEE_OVERRIDES, BACKTEST_ORDER_LATENCY, BACKTEST_NOTIONAL,
+    TICK_STORE_DIR
+)
+from src.spreads import SpreadMatrix, load_taker_fees
+
+# One row per BBO change, in receive-time order; a venue without bid/ask (disconnected) has nan prices
+TICK_DTYPE = np.dtype([('ts', 'f8'), ('exchange', 'S16'), ('bid', 'f8'), ('ask', 'f8')])
+CHUNK = 100000
+
+
+def make_ticks(rows):
+    """[(ts, exchange, bid, ask), ...] -> array TICK_DTYPE ordenado por ts"""
+    ticks = np.array([(ts, exchange.encode(), math.nan if bid is None else bid, math.nan if ask is None else ask)
+                      for ts, exchange, bid, ask in rows], dtype=TICK_DTYPE)
+    return ticks[np.argsort(ticks['ts'], kind='stable')]
+
+
+def save_ticks(path, ticks):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    np.save(path, ticks)
+
+
+def load_ticks(path):
+    """Ticks guardados con save_ticks, mapeados en memoria (los procesos de un sweep comparten las páginas)"""
+    return np.load(path, mmap_mode='r')
+
+
+def ticks_from_capture(directory, symbol, prefix=None, exchanges=None):
+    """Ticks de una captura del FrameRecorder, pasando los frames por los listeners reales (src.replay)"""
+    from src.replay import ReplayEngine, replay_watcher
+    from src.recorder import read_session
+
+    engine = ReplayEngine(read_session(directory, prefix or symbol.lower()))
+    watcher = replay_watcher(symbol)
+    rows = []
+
+    def append(exchange, bid, ask, timestamp):
+        # Capture receive time of the frame, not the wall clock of the replay
+        rows.append((engine.clock_ns / 1e9, exchange, bid, ask))
+    watcher.tick_stream.append = append
+    asyncio.run(engine.run(watcher, exchanges, detector=False))
+    return make_ticks(rows)
+
+
+def ticks_from_store(symbol, start=None, end=None, venues=None, directory=TICK_STORE_DIR):
+    """Ticks de todos los venues del TickStore columnar entre start y end (epoch)"""
+    from src.tick_store import TickStore
+
+    data = TickStore(directory).scan_all(symbol, start, end, venues)
+    ticks = np.zeros(sum(len(values['ts']) for values in data.values()), dtype=TICK_DTYPE)
+    offset = 0
+    for venue, values in data.items():
+        rows = slice(offset, offset + len(values['ts']))
+        ticks['ts'][rows] = values['ts']
+        ticks['exchange'][rows] = venue.encode()
+        ticks['bid'][rows] = values['bid']
+        ticks['ask'][rows] = values['ask']
+        offset = rows.stop
+    return ticks[np.argsort(ticks['ts'], kind='stable')]
+
+
+async def ticks_from_redis(redis_client, symbol, start='-', end='+', count=10000):
+    """Ticks del stream Redis ticks:{symbol} entre dos IDs (cliente redis.asyncio con decode_responses=True)"""
+    from src.tick_stream import TICK_STREAM_KEY, parse_tick
+
+    key = TICK_STREAM_KEY.format(symbol=symbol)
+    rows = []
+    while True:
+        entries = await redis_client.xrange(key, start, end, count=count)
+        for _, fields in entries:
+            tick = parse_tick(fields)
+            rows.append((tick['ts'], tick['exchange'], tick['bid'], tick['ask']))
+        if len(entries) < count:
+            return make_ticks(rows)
+        start = f"({entries[-1][0]}"
+
+
+def per_venue(value, venue):
+    """Parámetro global (número) o por exchange ({exchange: valor}, 0 si falta)"""
+    return value.get(venue, 0.0) if isinstance(value, dict) else value
+
+
+class Quotes:
+    """BBO real de cada venue en cualquier instante, por búsqueda binaria sobre sus ticks"""
+
+    def __init__(self, ticks):
+        self.venues = {}
+        for name in np.unique(ticks['exchange']):
+            rows = ticks[ticks['exchange'] == name]
+            self.venues[name.decode()] = (np.asarray(rows['ts']), np.asarray(rows['bid']), np.asarray(rows['ask']))
+
+    def at(self, venue, t):
+        """(bid, ask) vigente en `venue` en el instante t; nan si aún no había precio"""
+        ts, bid, ask = self.venues[venue]
+        i = int(np.searchsorted(ts, t, side='right')) - 1
+        if i < 0:
+            return math.nan, math.nan
+        return float(bid[i]), float(ask[i])
+
+
+def execute(quotes, t, buy, sell, buy_limit, sell_limit, buy_fee, sell_fee, order_latency, notional):
+    """Dos órdenes IOC limitadas a los precios vistos, que llegan a cada venue tras su latencia de órdenes.
+
+    Una pata se llena si al llegar el precio real es igual o mejor que el límite.
+    Si solo se llena una, la posición se cierra a mercado en el otro venue al
+    precio que encontró su orden (o en el mismo venue si el otro no tiene precio).
+    Devuelve (patas llenadas, PnL realizado).
+    """
+    qty = notional / buy_limit
+    buy_arrival = t + per_venue(order_latency, buy)
+    sell_arrival = t + per_venue(order_latency, sell)
+    buy_price = quotes.at(buy, buy_arrival)[1]
+    sell_price = quotes.at(sell, sell_arrival)[0]
+    bought = buy_price <= buy_limit
+    sold = sell_price >= sell_limit
+    if bought and sold:
+        return 2, qty * (sell_price * (1 - sell_fee) - buy_price * (1 + buy_fee))
+    if bought:
+        if math.isnan(sell_price):
+            sell_price, sell_fee = quotes.at(buy, buy_arrival)[0], buy_fee
+        if math.isnan(sell_price):
+            sell_price = buy_price
+        return 1, qty * (sell_price * (1 - sell_fee) - buy_price * (1 + buy_fee))
+    if sold:
+        if math.isnan(buy_price):
+            buy_price, buy_fee = quotes.at(sell, sell_arrival)[1], sell_fee
+        if math.isnan(buy_price):
+            buy_price = sell_price
+        return 1, qty * (sell_price * (1 - sell_fee) - buy_price * (1 + buy_fee))
+    return 0, 0.0
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else None
+
+
+def run_backtest(ticks, fees=None, default_fee=DEFAULT_TAKER_FEE, min_profit=0.0, stale_time=STALE_TIME,
+                 feed_latency=0.0, order_latency=BACKTEST_ORDER_LATENCY, notional=BACKTEST_NOTIONAL):
+    """Reproduce la decisión de check_opportunity_loop tick a tick y simula la ejecución de cada oportunidad.
+
+    El detector ve cada tick `feed_latency` segundos después de su ts (número o
+    {exchange: s}) y evalúa el mejor par de la SpreadMatrix con las comisiones
+    `fees` ({exchange: taker}, por defecto las mismas que el bot en vivo), con el
+    mismo umbral (round(profit, 2) > min_profit) y la misma regla de precios
+    caducados (stale_time) que el detector en vivo. Una oportunidad dura
+    mientras el mismo par siga por encima del umbral y se opera una vez, al
+    empezar, con execute().
+    """
+    if fees is None:
+        fees = load_taker_fees(EXCHANGE_FEES_PATH, TAKER_FEE_OVERRIDES)
+    quotes = Quotes(ticks)
+    names, codes = np.unique(ticks['exchange'], return_inverse=True)
+    names = [name.decode() for name in names]
+    seen = ticks['ts'] + np.array([per_venue(feed_latency, name) for name in names])[codes]
+    order = np.argsort(seen, kind='stable')
+
+    spreads = SpreadMatrix(fees, default_fee)
+    last_seen = {}  # {exchange: time the detector saw its last price}
+    quotes_seen = {}  # {exchange: (bid, ask)} as seen by the detector
+    episode = None  # [buy, sell, start]
+    durations = []
+    pairs = Counter()
+    trades = legs = filled = stale = 0
+    theoretical = realized = 0.0
+
+    for offset in range(0, len(order), CHUNK):
+        rows = order[offset:offset + CHUNK]
+        for t, code, bid, ask in zip(seen[rows].tolist(), codes[rows].tolist(),
+                                     ticks['bid'][rows].tolist(), ticks['ask'][rows].tolist()):
+            venue = names[code]
+            if bid != bid or ask != ask:
+                spreads.remove(venue)
+                last_seen.pop(venue, None)
+            else:
+                spreads.update(venue, bid, ask)
+                last_seen[venue] = t
+                quotes_seen[venue] = (bid, ask)
+
+            best = spreads.best_pair() if len(last_seen) >= 2 else None
+            if best is None or round(best[2], 2) <= min_profit:
+                if episode is not None:
+                    durations.append(t - episode[2])
+                    episode = None
+                continue
+            buy, sell, spread = best
+            buy_time, sell_time = last_seen[buy], last_seen[sell]
+            if abs(buy_time - sell_time) > stale_time or t - buy_time > stale_time or t - sell_time > stale_time:
+                # The live detector marks the venue with the older price as disconnected until its next tick
+                older = sell if buy_time > sell_time else buy
+                spreads.remove(older)
+                last_seen.pop(older)
+                stale += 1
+                if episode is not None:
+                    durations.append(t - episode[2])
+                    episode = None
+                continue
+            if episode is not None and episode[0] == buy and episode[1] == sell:
+                continue
+            if episode is not None:
+                durations.append(t - episode[2])
+            episode = [buy, sell, t]
+
+            pairs[f"{buy}->{sell}"] += 1
+            buy_limit, sell_limit = quotes_seen[buy][1], quotes_seen[sell][0]
+            theoretical += notional / buy_limit * spread
+            legs_filled, pnl = execute(quotes, t, buy, sell, buy_limit, sell_limit, spreads.fee(buy), spreads.fee(sell),
+                                       order_latency, notional)
+            trades += 1
+            legs += legs_filled
+            filled += legs_filled == 2
+            realized += pnl
+
+    if episode is not None:
+        # Still open when the data ends: counted up to the last tick
+        durations.append(float(seen[order[-1]]) - episode[2])
+    return {
+        'ticks': len(ticks),
+        'opportunities': trades,
+        'filled': filled,
+        'fill_rate': filled / trades if trades else None,
+        'leg_fill_rate': legs / (2 * trades) if trades else None,
+        'theoretical_pnl': theoretical,
+        'realized_pnl': realized,
+        'capture': realized / theoretical if theoretical else None,
+        'stale': stale,
+        'duration_p50': percentile(durations, 50),
+        'duration_p90': percentile(durations, 90),
+        'duration_max': max(durations) if durations else None,
+        'pairs': dict(pairs.most_common()),
+    }
+
+
+def scenarios(grid):
+    """Producto cartesiano de {parámetro: [valores]} como lista de kwargs para run_backtest"""
+    keys = sorted(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+
+
+_worker_ticks = None
+
+
+def _load_worker(path):
+    global _worker_ticks
+    _worker_ticks = load_ticks(path)
+
+
+def _run_scenario(params):
+    return params, run_backtest(_worker_ticks, **params)
+
+
+def sweep(path, grid, processes=None):
+    """Ejecuta run_backtest para cada combinación de `grid` en un pool de procesos sobre los ticks de `path`.
+
+    Cada proceso mapea el archivo una sola vez; los resultados vuelven en el
+    orden de scenarios(grid) como [(params, resultado), ...].
+    """
+    with ProcessPoolExecutor(processes, initializer=_load_worker, initargs=(path,)) as pool:
+        return list(pool.map(_run_scenario, scenarios(grid)))
+
+
+def _latency_arg(value):
+    # "0.05" for every venue or a JSON object per venue
+    return json.loads(value) if value.lstrip().startswith('{') else float(value)
+
+
+def format_result(params, result):
+    fill_rate = "-" if result['fill_rate'] is None else f"{result['fill_rate'] * 100:5.1f}%"
+    p50 = "-" if result['duration_p50'] is None else f"{result['duration_p50'] * 1000:.0f}ms"
+    return (f"{json.dumps(params, sort_keys=True):<60} opps {result['opportunities']:>6}  fill {fill_rate:>6}  "
+            f"theoretical {result['theoretical_pnl']:>10.2f}  realized {result['realized_pnl']:>10.2f}  "
+            f"duration p50 {p50:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    extract = commands.add_parser("ticks", help="extract BBO ticks from a capture directory or the Redis stream")
+    extract.add_argument("directory", nargs="?", help="FrameRecorder capture directory")
+    extract.add_argument("--redis", action="store_true", help="read the ticks:{symbol} stream instead of a capture")
+    extract.add_argument("--store", action="store_true", help="read the columnar tick store instead of a capture")
+    extract.add_argument("--since", type=float, help="epoch, for --store")
+    extract.add_argument("--until", type=float, help="epoch, for --store")
+    extract.add_argument("--symbol", default="BTC")
+    extract.add_argument("--prefix", help="segment prefix (default: the symbol in lowercase)")
+    extract.add_argument("--exchanges", help="comma separated; default: every exchange in the capture")
+    extract.add_argument("--out", required=True, help=".npy file to write")
+
+    for name in ("run", "sweep"):
+        command = commands.add_parser(name)
+        command.add_argument("ticks", help=".npy file written by the ticks command")
+        command.add_argument("--json", action="store_true", help="print the full results as JSON")
+        if name == "run":
+            command.add_argument("--min-profit", type=float, default=0.0, help="USDT per unit, as the detector rounds it")
+            command.add_argument("--stale-time", type=float, default=STALE_TIME)
+            command.add_argument("--feed-latency", type=_latency_arg, default=0.0, help="seconds, or JSON {exchange: s}")
+            command.add_argument("--order-latency", type=_latency_arg, default=BACKTEST_ORDER_LATENCY)
+            command.add_argument("--notional", type=float, default=BACKTEST_NOTIONAL)
+            command.add_argument("--fees", type=json.loads, help='JSON {exchange: taker fee}; default: the live bot fees')
+        else:
+            command.add_argument("--grid", type=json.loads, required=True,
+                                 help='JSON {run_backtest parameter: [values]}, e.g. {"min_profit": [0, 1]}')
+            command.add_argument("--processes", type=int, help="default: one per CPU")
+    args = parser.parse_args()
+
+    if args.command == "ticks":
+        if args.redis:
+            import redis.asyncio as aioredis
+            client = aioredis.from_url(os.getenv('REDIS_URL', 'redis://localhost:6379/0'), decode_responses=True)
+            ticks = asyncio.run(ticks_from_redis(client, args.symbol.upper()))
+        elif args.store:
+            exchanges = args.exchanges.split(',') if args.exchanges else None
+            ticks = ticks_from_store(args.symbol.upper(), args.since, args.until, exchanges)
+        elif args.directory:
+            # Listener logging goes to stderr instead of the live bot's log files
+            logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
+            exchanges = args.exchanges.split(',') if args.exchanges else None
+            ticks = ticks_from_capture(args.directory, args.symbol.upper(), args.prefix, exchanges)
+        else:
+            parser.error("a capture directory, --redis or --store is required")
+        save_ticks(args.out, ticks)
+        print(f"{len(ticks)} ticks written to {args.out}", file=sys.stderr)
+        return
+
+    if args.command == "run":
+        params = {'min_profit': args.min_profit, 'stale_time': args.stale_time, 'feed_latency': args.feed_latency,
+                  'order_latency': args.order_latency, 'notional': args.notional}
+        if args.fees is not None:
+            params['fees'] = args.fees
+        results = [(params, run_backtest(load_ticks(args.ticks), **params))]
+    else:
+        results = sweep(args.ticks, args.grid, args.processes)
+    if args.json:
+        print(json.dumps([{'params': params, 'result': result} for params, result in results], indent=2))
+    else:
+        for params, result in sorted(results, key=lambda item: item[1]['realized_pnl'], reverse=True):
+            print(format_result(params, result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+from sortedcontainers import SortedList
+
+
+class BestPriceIndex:
+    """Mejor bid y mejor ask netos de comisión entre venues, mantenido incrementalmente.
+
+    Cada venue aporta como mucho una entrada por lado, con su precio ya neto de
+    su comisión taker (bid * (1 - fee), ask * (1 + fee)). Actualizarla cuesta
+    O(log n) y best_pair() solo mira las dos primeras entradas de cada lado, así
+    que el detector no recorre todos los venues ni la matriz en cada evaluación.
+    A igual precio gana el nombre de venue menor para que el resultado sea
+    determinista.
+    """
+
+    def __init__(self, fees=None, default_fee=0.0):
+        self.fees = fees or {}
+        self.default_fee = default_fee
+        self.bids = SortedList()  # (-net_bid, exchange): index 0 is the highest bid
+        self.asks = SortedList()  # (net_ask, exchange)
+        self._entries = {}  # {exchange: (bid_key, ask_key)}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, exchange):
+        return exchange in self._entries
+
+    def update(self, exchange, bid, ask):
+        """Reemplaza el BBO del venue.
+
+        Un venue sin bid o sin ask (libro incompleto) no se indexa, y un lado
+        con precio <= 0 tampoco.
+        """
+        self.remove(exchange)
+        if bid is None or ask is None:
+            return
+        fee = self.fees.get(exchange, self.default_fee)
+        bid_key = (-bid * (1 - fee), exchange) if bid > 0 else None
+        ask_key = (ask * (1 + fee), exchange) if ask > 0 else None
+        if bid_key is not None:
+            self.bids.add(bid_key)
+        if ask_key is not None:
+            self.asks.add(ask_key)
+        self._entries[exchange] = (bid_key, ask_key)
+
+    def remove(self, exchange):
+        entry = self._entries.pop(exchange, None)
+        if entry is None:
+            return
+        bid_key, ask_key = entry
+        if bid_key is not None:
+            self.bids.remove(bid_key)
+        if ask_key is not None:
+            self.asks.remove(ask_key)
+
+    def best_bid(self):
+        """(exchange, net_price) del mejor bid, o None"""
+        if not self.bids:
+            return None
+        neg_price, exchange = self.bids[0]
+        return exchange, -neg_price
+
+    def best_ask(self):
+        if not self.asks:
+            return None
+        price, exchange = self.asks[0]
+        return exchange, price
+
+    def best_pair(self):
+        """(buy, sell, net_spread) del mejor par entre venues distintos, o None; igual que SpreadMatrix.best_pair"""
+        if not self.bids or not self.asks:
+            return None
+        neg_bid, sell = self.bids[0]
+        ask, buy = self.asks[0]
+        if buy != sell:
+            return buy, sell, -neg_bid - ask
+        # Same venue on both sides: the best pair uses the runner-up on one side
+        best = None
+        if len(self.asks) > 1:
+            next_ask, next_buy = self.asks[1]
+            best = (next_buy, sell, -neg_bid - next_ask)
+        if len(self.bids) > 1:
+            next_neg_bid, next_sell = self.bids[1]
+            if best is None or -next_neg_bid - ask > best[2]:
+                best = (buy, next_sell, -next_neg_bid - ask)
+        return best
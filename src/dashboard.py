@@ -1,16 +1,25 @@
 # filepath: /Users/poldeperezcabrero/Projects/bot_arbitratge/src/dashboard.py
-from flask import Flask, render_template, jsonify, request, session, redirect, url_for, flash
+from flask import Flask, render_template, jsonify, request, session, redirect, url_for, flash, Response, stream_with_context
 from werkzeug.security import check_password_hash, generate_password_hash
 from functools import wraps
 import os
 import time
 import json
-from datetime import datetime, timedelta
+from datetime import datetime
 import re
 import redis
-from collections import defaultdict
 import docker
 from dotenv import load_dotenv
+from src.status_schema import STATUS_KEY, STATE_KEY, LATENCY_KEY, unflatten_status
+from src.status_stream import StatusBroadcaster
+from src.logtail import tail_lines
+from src.log_indexer import LogIndexer
+from src.opportunity_store import OpportunityStore
+from src.tick_store import TickStore
+from src.spreads import load_taker_fees
+from config.settings import (
+    OPPORTUNITY_DB_PATH, TICK_STORE_DIR, EXCHANGE_FEES_PATH, DEFAULT_TAKER_FEE, TAKER_FEE_OVERRIDES
+)
 
 # Configurar paths correctos
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -48,6 +57,12 @@ class DashboardManager:
             self.logs_path = os.path.join(PROJECT_ROOT, 'logs')
         # Crear directorio de logs si no existe
         os.makedirs(self.logs_path, exist_ok=True)
+        # Errores y oportunidades se indexan en segundo plano a medida que se escriben los logs
+        self.log_index = LogIndexer(self.logs_path)
+        self.log_index.start()
+        self.opportunity_store = None
+        self.tick_store = TickStore(TICK_STORE_DIR)
+        self.fees = load_taker_fees(EXCHANGE_FEES_PATH, TAKER_FEE_OVERRIDES)
 
         self.active_symbols = [s.strip().upper() for s in os.getenv("DASHBOARD_SYMBOLS", "BTC,ETH").split(',') if s.strip()]
         
@@ -102,59 +117,39 @@ class DashboardManager:
             if not os.path.exists(filepath):
                 return [f"Log file not found: {filepath}"]
             
-            with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                all_lines = f.readlines()
-                return all_lines[-lines:] if len(all_lines) > lines else all_lines
+            # Seek from EOF: cost depends on the lines requested, not on the file size
+            return tail_lines(filepath, lines)
         except Exception as e:
             return [f"Error reading log file: {e}"]
     
     # ...resto del código igual...
     def get_error_summary(self):
-        """Resume errores por exchange y crypto"""
-        error_count = defaultdict(int)
-        recent_errors = []
-        
-        for log_file in self.get_log_files():
-            lines = self.read_recent_logs(log_file, 500)
-            for line in lines:
-                if re.match(r'^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}.*ERROR', line):
-                    # Extraer crypto del nombre del archivo
-                    crypto = "Unknown"
-                    if "btc" in log_file.lower():
-                        crypto = "BTC"
-                    elif "eth" in log_file.lower():
-                        crypto = "ETH"
-                    
-                    # Extraer exchange del contenido o nombre de archivo
-                    exchange = "Unknown"
-                    line_lower = line.lower()
-                    if "live_price_adv_cb_ws" in line_lower:
-                        exchange = "Coinbase"
-                    elif "live_price_binance_ws" in line_lower:
-                        exchange = "Binance"
-                    elif "live_price_bybit_ws" in line_lower:
-                        exchange = "Bybit"
-                    elif "live_price_kucoin_ws" in line_lower:
-                        exchange = "Kucoin"
-                    
-                    key = f"{crypto}-{exchange}"
-                    error_count[key] += 1
-                    
-                    if len(recent_errors) < 50:
-                        recent_errors.append({
-                            'timestamp': self.extract_timestamp(line),
-                            'crypto': crypto,
-                            'exchange': exchange,
-                            'message': line.strip()[:200]
-                        })
-        
-        return dict(error_count), recent_errors[-20:]
+        """Resume errores por exchange y crypto (últimas 24 h, desde el índice)"""
+        return self.log_index.error_summary()
     
     def extract_timestamp(self, log_line):
         """Extrae timestamp de una línea de log"""
         match = re.match(r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})', log_line)
         return match.group(1) if match else "Unknown"
     
+    def read_status_redis(self):
+        """{symbol: status_data} de todos los símbolos activos en un round trip.
+
+        Lee los hashes state:{symbol} con un pipeline de HGETALL; solo si falta
+        alguno se piden las claves JSON legacy status:{symbol} con un MGET.
+        """
+        with self.redis_client.pipeline(transaction=False) as pipe:
+            for symbol in self.active_symbols:
+                pipe.hgetall(STATE_KEY.format(symbol=symbol))
+            hashes = pipe.execute()
+
+        data = {symbol: unflatten_status(fields) for symbol, fields in zip(self.active_symbols, hashes) if fields}
+        missing = [symbol for symbol in self.active_symbols if symbol not in data]
+        if missing:
+            blobs = self.redis_client.mget([STATUS_KEY.format(symbol=symbol) for symbol in missing])
+            data.update({symbol: json.loads(blob) for symbol, blob in zip(missing, blobs) if blob})
+        return data
+
     def get_exchange_status_from_redis(self):
         """Lee estado de exchanges desde Redis"""
         if not self.redis_client:
@@ -163,17 +158,17 @@ class DashboardManager:
         status = {}
         
         try:
+            redis_data = self.read_status_redis()
             for symbol in self.active_symbols:
-                key = f"status:{symbol}"
-                data_json = self.redis_client.get(key)
+                data = redis_data.get(symbol)
                 
-                if data_json:
-                    data = json.loads(data_json)
+                if data:
                     status[symbol] = {
                         'status': 'active',
                         'last_update': data.get('last_update', 0),
                         'last_update_readable': data.get('last_update_readable', 'Unknown'),
                         'exchanges': data.get('exchanges', {}),
+                        'top_pairs': data.get('top_pairs', []),
                         'source': 'redis'
                     }
                 else:
@@ -220,6 +215,7 @@ class DashboardManager:
                         'last_update': data.get('last_update', 0),
                         'last_update_readable': data.get('last_update_readable', 'Unknown'),
                         'exchanges': data.get('exchanges', {}),
+                        'top_pairs': data.get('top_pairs', []),
                         'source': 'json_file'
                     }
                 else:
@@ -277,84 +273,42 @@ class DashboardManager:
         
         return status
 
-    def get_opportunities_from_logs(self):
-        """Extrae oportunidades de arbitraje desde logs arb_op_*"""
-        opportunities = {}
-        recent_opportunities = []
-        
-        # Buscar archivos de oportunidades
-        op_files = [f for f in self.get_log_files() if f.startswith('arb_op_') and f.endswith('.log')]
-        
-        # Regex para parsear líneas de oportunidades
-        opportunity_pattern = re.compile(
-            r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}).*?'  # Timestamp
-            r'(\w+) Arbitrage opportunity! '                     # Symbol
-            r'Profit: ([\d.]+) USDT.*?'                        # Profit
-            r'Buy on (\w+) at ([\d.]+).*?'                     # Buy exchange + price
-            r'Sell on (\w+) at ([\d.]+)'                       # Sell exchange + price
-        )
-        
-        for op_file in op_files:
-            try:
-                lines = self.read_recent_logs(op_file, 1000)  # Últimas 1000 líneas
-                
-                for line in lines:
-                    if 'Arbitrage opportunity!' in line:
-                        match = opportunity_pattern.search(line)
-                        if match:
-                            timestamp_str, symbol, profit, buy_exchange, buy_price, sell_exchange, sell_price = match.groups()
-                            
-                            # Parsear timestamp
-                            try:
-                                timestamp = datetime.strptime(timestamp_str, '%Y-%m-%d %H:%M:%S,%f')
-                                
-                                # Solo contar oportunidades de las últimas 24 horas
-                                if timestamp > datetime.now() - timedelta(hours=24):
-                                    # Contar por símbolo
-                                    if symbol not in opportunities:
-                                        opportunities[symbol] = {
-                                            'count': 0,
-                                            'total_profit': 0.0,
-                                            'best_profit': 0.0
-                                        }
-                                    
-                                    profit_float = float(profit)
-                                    opportunities[symbol]['count'] += 1
-                                    opportunities[symbol]['total_profit'] += profit_float
-                                    opportunities[symbol]['best_profit'] = max(
-                                        opportunities[symbol]['best_profit'], 
-                                        profit_float
-                                    )
-                                    
-                                    # Agregar a recientes (últimas 10)
-                                    if len(recent_opportunities) < 50:
-                                        recent_opportunities.append({
-                                            'timestamp': timestamp_str,
-                                            'symbol': symbol,
-                                            'profit': profit_float,
-                                            'buy_exchange': buy_exchange,
-                                            'buy_price': float(buy_price),
-                                            'sell_exchange': sell_exchange,
-                                            'sell_price': float(sell_price),
-                                            'spread_pct': round(((float(sell_price) - float(buy_price)) / float(buy_price)) * 100, 4)
-                                        })
-                                        
-                            except ValueError as e:
-                                print(f"Error parsing opportunity timestamp: {e}")
-                                continue
-                                
-            except Exception as e:
-                print(f"Error reading opportunity log {op_file}: {e}")
+    def get_venue_latency(self, histograms=False):
+        """{symbol: {exchange: {stage: percentiles en ms}}} que publican los bots en latency:{symbol}; None sin Redis"""
+        if not self.redis_client:
+            return None
+        blobs = self.redis_client.mget([LATENCY_KEY.format(symbol=symbol) for symbol in self.active_symbols])
+        latency = {}
+        for symbol, blob in zip(self.active_symbols, blobs):
+            if not blob:
                 continue
-        
-        # Ordenar recientes por timestamp (más nuevo primero)
-        recent_opportunities.sort(key=lambda x: x['timestamp'], reverse=True)
-        
-        return opportunities, recent_opportunities[:10]  # Solo últimas 10
+            venues = json.loads(blob)
+            if not histograms:
+                for stages in venues.values():
+                    for stats in stages.values():
+                        stats.pop('histogram', None)
+            latency[symbol] = venues
+        return latency
+
+    def get_opportunity_store(self):
+        """OpportunityStore sobre la base que escriben los bots, o None si todavía no existe"""
+        if self.opportunity_store is None and OPPORTUNITY_DB_PATH and os.path.exists(OPPORTUNITY_DB_PATH):
+            self.opportunity_store = OpportunityStore(OPPORTUNITY_DB_PATH)
+        return self.opportunity_store
+
+    def get_opportunities_from_logs(self):
+        """Oportunidades de arbitraje de las últimas 24 h desde el índice de logs arb_op_*"""
+        return self.log_index.opportunities_summary()
     
     def get_opportunities_summary(self):
-        """Resumen de oportunidades para la API"""
-        opportunities, recent = self.get_opportunities_from_logs()
+        """Resumen de oportunidades para la API (SQL si hay base de oportunidades, si no los logs)"""
+        store = self.get_opportunity_store()
+        if store is not None:
+            since = time.time() - 24 * 3600
+            opportunities = store.summary(since)
+            recent = store.history(since=since, limit=10)
+        else:
+            opportunities, recent = self.get_opportunities_from_logs()
         
         # Calcular totales
         total_opportunities = sum(data['count'] for data in opportunities.values())
@@ -409,6 +363,21 @@ def admin_required(f):
 # Instancia del manager
 dashboard = DashboardManager()
 
+
+def log_summary():
+    """Paneles derivados de los logs, calculados una vez por intervalo para todos los clientes SSE"""
+    error_count, recent_errors = dashboard.get_error_summary()
+    return {
+        'error_count': error_count,
+        'recent_errors': recent_errors,
+        'opportunities': dashboard.get_opportunities_summary()
+    }
+
+# Productor único de eventos SSE; arranca con el primer cliente
+broadcaster = None
+if dashboard.redis_client:
+    broadcaster = StatusBroadcaster(dashboard.redis_client, dashboard.active_symbols, summary=log_summary)
+
 # Rutas de autenticación
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -462,6 +431,19 @@ def api_status():
         'logs_path': dashboard.logs_path  # Para debugging
     })
 
+@app.route('/api/stream')
+@login_required
+def api_stream():
+    """Server-Sent Events: snapshot al conectar y después solo diffs de estado y resúmenes"""
+    if broadcaster is None:
+        return jsonify({'error': 'Redis not connected'}), 503
+    broadcaster.start()
+    return Response(
+        stream_with_context(broadcaster.stream()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/api/logs/<filename>')
 @login_required
 def api_logs(filename):
@@ -498,6 +480,99 @@ def api_opportunities():
             'timestamp': datetime.now().isoformat()
         })
 
+@app.route('/api/opportunities/history')
+@login_required
+def api_opportunities_history():
+    """Consulta histórica de oportunidades: ?symbol=&buy=&sell=&since=&until= (epoch) &limit= &group=pair"""
+    store = dashboard.get_opportunity_store()
+    if store is None:
+        return jsonify({'success': False, 'error': 'Opportunity database not available'}), 503
+    try:
+        args = request.args
+        since = args.get('since', type=float, default=time.time() - 24 * 3600)
+        if args.get('group') == 'pair':
+            data = store.by_pair(since, symbol=args.get('symbol'))
+        else:
+            data = store.history(
+                symbol=args.get('symbol'), buy_exchange=args.get('buy'), sell_exchange=args.get('sell'),
+                since=since, until=args.get('until', type=float), limit=min(args.get('limit', type=int, default=100), 5000)
+            )
+        return jsonify({
+            'success': True,
+            'data': data,
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'timestamp': datetime.now().isoformat()
+        })
+
+@app.route('/api/ticks/history')
+@login_required
+def api_ticks_history():
+    """Serie bid/ask por venue desde el almacén de ticks: ?symbol=BTC&since=&until= (epoch) &points=500"""
+    try:
+        args = request.args
+        until = args.get('until', type=float, default=time.time())
+        since = args.get('since', type=float, default=until - 3600)
+        points = max(1, min(args.get('points', type=int, default=500), 5000))
+        data = dashboard.tick_store.history(args.get('symbol', 'BTC').upper(), since, until, points)
+        return jsonify({
+            'success': True,
+            'data': data,
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'timestamp': datetime.now().isoformat()
+        })
+
+@app.route('/api/spreads/stats')
+@login_required
+def api_spread_stats():
+    """Estadísticas de spread neto por par (buy, sell) desde el almacén de ticks: ?symbol=BTC&since=&until= (epoch)"""
+    try:
+        args = request.args
+        until = args.get('until', type=float, default=time.time())
+        since = args.get('since', type=float, default=until - 24 * 3600)
+        data = dashboard.tick_store.spread_stats(args.get('symbol', 'BTC').upper(), since, until,
+                                                 dashboard.fees, DEFAULT_TAKER_FEE)
+        return jsonify({
+            'success': True,
+            'data': data,
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'timestamp': datetime.now().isoformat()
+        })
+
+@app.route('/api/latency')
+@login_required
+def api_latency():
+    """Latencias por venue (feed, apply, detect, total) de cada símbolo; ?histograms=1 incluye los buckets"""
+    try:
+        data = dashboard.get_venue_latency(histograms=request.args.get('histograms') == '1')
+        if data is None:
+            return jsonify({'success': False, 'error': 'Redis not connected'}), 503
+        return jsonify({
+            'success': True,
+            'data': data,
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'timestamp': datetime.now().isoformat()
+        })
+
 @app.route('/api/containers')
 @admin_required
 def api_containers():
@@ -538,7 +613,7 @@ def api_redis_status():
     
     try:
         info = dashboard.redis_client.info()
-        keys = dashboard.redis_client.keys('status:*')
+        keys = dashboard.redis_client.keys('status:*') + dashboard.redis_client.keys('state:*')
         
         return jsonify({
             'redis_available': True,
@@ -0,0 +1,143 @@
+import json
+import logging
+from datetime import datetime
+from typing import Any, Optional
+
+import msgspec
+
+logger = logging.getLogger(__name__)
+
+
+class FrameDecoder:
+    """Decodifica frames de websocket directamente desde bytes/str a un Struct tipado.
+
+    Los precios y cantidades se mantienen como strings para que el OrderBook los
+    convierta a ticks sin pasar por float. Si un frame no encaja en el esquema
+    se decodifica con json como fallback y se devuelve como dict.
+    """
+
+    def __init__(self, schema, float_hook=None, json_kwargs=None):
+        self.schema = schema
+        self._decoder = msgspec.json.Decoder(schema, float_hook=float_hook)
+        self._json_kwargs = json_kwargs or {}
+
+    def decode(self, frame):
+        try:
+            return self._decoder.decode(frame)
+        except msgspec.ValidationError as e:
+            logger.debug(f"Frame does not match {self.schema.__name__} ({e}), falling back to json")
+            return json.loads(frame, **self._json_kwargs)
+
+
+def iso_timestamp(value):
+    """Epoch (s) de un timestamp RFC 3339 como los de Coinbase y Kraken ('...Z', hasta nanosegundos); None si no hay"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return None
+
+
+# Binance depth@100ms
+class BinanceDepth(msgspec.Struct):
+    event_time: int = msgspec.field(name="E")
+    first_update_id: int = msgspec.field(name="U")
+    final_update_id: int = msgspec.field(name="u")
+    bids: list[tuple[str, str]] = msgspec.field(name="b")
+    asks: list[tuple[str, str]] = msgspec.field(name="a")
+
+
+# Coinbase Advanced Trade level2 / heartbeats / subscriptions
+class CoinbaseUpdate(msgspec.Struct):
+    side: str
+    price_level: str
+    new_quantity: str
+    event_time: str = ""
+
+
+class CoinbaseEvent(msgspec.Struct):
+    type: str = ""
+    product_id: str = ""
+    updates: list[CoinbaseUpdate] = []
+    subscriptions: dict[str, Any] = {}
+
+
+class CoinbaseMessage(msgspec.Struct):
+    channel: str
+    sequence_num: Optional[int] = None
+    timestamp: str = ""
+    events: list[CoinbaseEvent] = []
+
+
+# Bybit orderbook.50 plus op responses
+class BybitBook(msgspec.Struct):
+    symbol: str = msgspec.field(default="", name="s")
+    bids: list[tuple[str, str]] = msgspec.field(default_factory=list, name="b")
+    asks: list[tuple[str, str]] = msgspec.field(default_factory=list, name="a")
+    update_id: int = msgspec.field(default=0, name="u")
+    seq: int = 0
+
+
+class BybitMessage(msgspec.Struct):
+    topic: str = ""
+    type: str = ""
+    ts: int = 0
+    cts: int = 0
+    data: Optional[BybitBook] = None
+    success: Optional[bool] = None
+    ret_msg: str = ""
+    op: str = ""
+
+
+# Kraken v2 book. Prices arrive as JSON numbers; the float_hook keeps their exact text
+class KrakenLevel(msgspec.Struct):
+    price: Any
+    qty: Any
+
+
+class KrakenBook(msgspec.Struct):
+    symbol: str = ""
+    bids: list[KrakenLevel] = []
+    asks: list[KrakenLevel] = []
+    checksum: Optional[int] = None
+    timestamp: str = ""
+
+
+class KrakenMessage(msgspec.Struct):
+    channel: str = ""
+    type: str = ""
+    method: str = ""
+    success: Optional[bool] = None
+    result: dict[str, Any] = {}
+    req_id: Optional[int] = None
+    data: list[KrakenBook] = []
+
+
+# KuCoin /market/level2 plus welcome/ack
+class KucoinChanges(msgspec.Struct):
+    asks: list[tuple[str, str, str]] = []
+    bids: list[tuple[str, str, str]] = []
+
+
+class KucoinLevel2(msgspec.Struct):
+    changes: KucoinChanges
+    sequence_start: int = msgspec.field(name="sequenceStart")
+    sequence_end: int = msgspec.field(name="sequenceEnd")
+    symbol: str = ""
+    time: int = 0
+
+
+class KucoinMessage(msgspec.Struct):
+    type: str
+    id: str = ""
+    topic: str = ""
+    subject: str = ""
+    data: Optional[KucoinLevel2] = None
+
+
+binance_decoder = FrameDecoder(BinanceDepth)
+coinbase_decoder = FrameDecoder(CoinbaseMessage)
+bybit_decoder = FrameDecoder(BybitMessage)
+kraken_decoder = FrameDecoder(KrakenMessage, float_hook=str, json_kwargs={'parse_float': str})
+kucoin_decoder = FrameDecoder(KucoinMessage)
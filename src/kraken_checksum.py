@@ -0,0 +1,50 @@
+import zlib
+
+CHECKSUM_LEVELS = 10  # Kraken v2 checksums the top 10 asks + top 10 bids
+
+
+def clean(val):
+    # Remove decimal and leading zeros
+    s = val.replace('.', '')
+    return s.lstrip('0') or '0'
+
+
+class KrakenChecksum:
+    """Checksum CRC32 del libro de Kraken con caché por nivel.
+
+    Guarda el string limpio (precio + cantidad) de cada nivel del top 10 y solo
+    lo recalcula cuando el nivel es nuevo o su cantidad ha cambiado.
+    """
+
+    def __init__(self, order_book):
+        self.order_book = order_book
+        self._asks = {}  # {ticks: (lots, cleaned)}
+        self._bids = {}
+
+    def _side(self, items, cache, sign):
+        fresh = {}
+        parts = []
+        for key, lots in items:
+            entry = cache.get(key)
+            if entry is None or entry[0] != lots:
+                price, qty = self.order_book.format_level(sign * key, lots)
+                entry = (lots, clean(price) + clean(qty))
+            fresh[key] = entry
+            parts.append(entry[1])
+        return fresh, parts
+
+    def checksum_str(self):
+        # Only the current top levels stay cached, so the cache never outgrows 2 * CHECKSUM_LEVELS
+        self._asks, ask_parts = self._side(self.order_book.asks.items()[:CHECKSUM_LEVELS], self._asks, 1)
+        self._bids, bid_parts = self._side(self.order_book.bids.items()[:CHECKSUM_LEVELS], self._bids, -1)
+        return ''.join(ask_parts) + ''.join(bid_parts)
+
+    def compute(self):
+        return zlib.crc32(self.checksum_str().encode())
+
+    def validate(self, expected):
+        return self.compute() == int(expected)
+
+
+def build_checksum_str(order_book):
+    return KrakenChecksum(order_book).checksum_str()
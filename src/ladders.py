@@ -0,0 +1,74 @@
+from itertools import islice
+
+import numpy as np
+
+
+def _side_arrays(side, n, price_scale, qty_scale, sign):
+    count = min(n, len(side))
+    keys = np.fromiter(islice(side.keys(), count), dtype=np.int64, count=count)
+    lots = np.fromiter(map(side.__getitem__, islice(side.keys(), count)), dtype=np.int64, count=count)
+    return keys * (sign / price_scale), lots / qty_scale
+
+
+def ladder_arrays(order_book, n):
+    """Top N de un OrderBook como arrays float64 contiguos (bid_prices, bid_sizes, ask_prices, ask_sizes).
+
+    Se leen directamente de los SortedDict sin construir listas intermedias.
+    """
+    price_scale = 10 ** order_book.price_decimals
+    qty_scale = 10 ** order_book.qty_decimals
+    bid_prices, bid_sizes = _side_arrays(order_book.bids, n, price_scale, qty_scale, -1)
+    ask_prices, ask_sizes = _side_arrays(order_book.asks, n, price_scale, qty_scale, 1)
+    return bid_prices, bid_sizes, ask_prices, ask_sizes
+
+
+def fill_curve(prices, sizes, grid):
+    """Nocional de ejecutar cada tamaño de `grid` contra una escalera; nan si no hay profundidad"""
+    if not len(prices):
+        return np.full(len(grid), np.nan)
+    cum_size = np.cumsum(sizes)
+    prev_size = np.concatenate(([0.0], cum_size))
+    prev_cost = np.concatenate(([0.0], np.cumsum(sizes * prices)))
+    idx = np.searchsorted(cum_size, grid)
+    level = np.minimum(idx, len(prices) - 1)
+    notional = prev_cost[level] + (grid - prev_size[level]) * prices[level]
+    notional[idx >= len(prices)] = np.nan
+    return notional
+
+
+def pair_size(buy_ladder, sell_ladder, buy_fee, sell_fee):
+    """Tamaño óptimo de un solo par: comprar contra los asks de buy_ladder y vender contra los bids de sell_ladder.
+
+    El beneficio es lineal a trozos entre los tamaños acumulados de cada nivel,
+    así que se evalúa solo en esos puntos con cumsum/searchsorted; mismo
+    resultado que recorrer ambos libros nivel a nivel. None si no hay tamaño
+    rentable.
+    """
+    _, _, ask_prices, ask_sizes = buy_ladder
+    bid_prices, bid_sizes, _, _ = sell_ladder
+    if not len(ask_prices) or not len(bid_prices):
+        return None
+    # Only levels still profitable against the other side's best net price
+    keep_asks = np.searchsorted(ask_prices * (1 + buy_fee), bid_prices[0] * (1 - sell_fee))
+    keep_bids = np.searchsorted(-bid_prices * (1 - sell_fee), -ask_prices[0] * (1 + buy_fee))
+    if not keep_asks or not keep_bids:
+        return None
+    ask_prices, ask_sizes = ask_prices[:keep_asks], ask_sizes[:keep_asks]
+    bid_prices, bid_sizes = bid_prices[:keep_bids], bid_sizes[:keep_bids]
+    sizes = np.unique(np.concatenate((np.cumsum(ask_sizes), np.cumsum(bid_sizes))))
+    sizes = sizes[sizes > 0]
+    buy_cost = fill_curve(ask_prices, ask_sizes, sizes)
+    sell_proceeds = fill_curve(bid_prices, bid_sizes, sizes)
+    profit = np.nan_to_num(sell_proceeds * (1 - sell_fee) - buy_cost * (1 + buy_fee), nan=-np.inf)
+    if not len(profit):
+        return None
+    k = int(profit.argmax())
+    if profit[k] <= 0:
+        return None
+    size = sizes[k]
+    return {
+        'size': float(size),
+        'buy_vwap': float(buy_cost[k] / size),
+        'sell_vwap': float(sell_proceeds[k] / size),
+        'profit': float(profit[k])
+    }
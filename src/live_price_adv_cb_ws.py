@@ -3,13 +3,18 @@ import websockets
 import logging
 import asyncio
 import os
-from config.settings import STALE_TIME, MAX_WS_RECONNECTS
-from src.logging_config import setup_logging
+import time
+from config.settings import STALE_TIME, MAX_WS_RECONNECTS, BOOK_PRECISION
+from src.logging_config import setup_logging, HotPathLog
+from src.recorder import record_socket
+from src.orderbook import OrderBook
+from src.decoders import coinbase_decoder, CoinbaseMessage, iso_timestamp
 
 sym = os.getenv("SYMBOL", "BTC")
 
 setup_logging(sym)
 logger = logging.getLogger(__name__)
+hot_log = HotPathLog(logger)
 
 # Función para determinar buffer size por crypto
 def get_buffer_size(crypto):
@@ -45,6 +50,8 @@ async def listen_coinbase_order_book(watcher, symbol="BTC-USD", crypto="BTC"):
         try:
             buffer_size = get_buffer_size(crypto)
             async with websockets.connect(url, max_size=buffer_size, ping_interval=20, ping_timeout=10) as ws:
+                ws = record_socket(ws, watcher.recorder, 'coinbase')
+                watcher.connects['coinbase'] += 1
                 for msg in subscribe_msg:
                     await ws.send(json.dumps(msg))
                 print("Connecting to Coinbase WebSocket.")
@@ -59,18 +66,24 @@ async def listen_coinbase_order_book(watcher, symbol="BTC-USD", crypto="BTC"):
                             break  # Break inner loop to reconnect
                         
                         msg = await asyncio.wait_for(ws.recv(), timeout=STALE_TIME)
-                        data = json.loads(msg)
+                        received = time.time()
+                        watcher.messages['coinbase'] += 1
+                        data = coinbase_decoder.decode(msg)
+                        if not isinstance(data, CoinbaseMessage):
+                            logger.error(f"Unexpected Coinbase frame, skipping... Last received message: {data}")
+                            continue
 
                         # Handle sequence number for updates
-                        sequence_num = data.get("sequence_num")
+                        sequence_num = data.sequence_num
                         if sequence_num is None:
                             logger.error(f"No sequence_num in message, skipping... Last received message: {data if 'data' in locals() else 'No data variable'}")
                             continue
                         else:
                             if sequence_num != expected_sequence:
                                 logger.error(f"Sequence mismatch: expected {expected_sequence}, got {sequence_num}. Reconnecting Websocket...")
-                                # Clear coinbase info in watcher
-                                watcher.prices.pop("coinbase", None)
+                                watcher.resyncs['coinbase'] += 1
+                                # Drop coinbase prices everywhere (matrix, index, detector) until the new snapshot
+                                watcher.clear_price("coinbase")
                                 try:
                                     await ws.close()
                                 except Exception as e:
@@ -78,69 +91,62 @@ async def listen_coinbase_order_book(watcher, symbol="BTC-USD", crypto="BTC"):
                                 # Recursive call to restart the listener
                                 return await listen_coinbase_order_book(watcher, symbol, crypto)
 
-                        if data.get("channel") == "heartbeats":
+                        if data.channel == "heartbeats":
                             expected_sequence += 1
                             # Optionally, update a timestamp or status in your watcher here
 
-                        elif data.get("channel") == "l2_data":
+                        elif data.channel == "l2_data":
                             # Process events
-                            for event in data.get("events", []):
-                                if event.get("type") == "snapshot":
+                            for event in data.events:
+                                if event.type == "snapshot":
                                     bids = []
                                     asks = []
-                                    for update in event.get("updates", []):
-                                        side = update.get("side")
-                                        price = update.get("price_level")
-                                        qty = update.get("new_quantity")
+                                    for update in event.updates:
+                                        side = update.side
+                                        price = update.price_level
+                                        qty = update.new_quantity
                                         if side == "bid":
                                             bids.append((price, qty))
                                         elif side == "ask" or side == "offer":
                                             asks.append((price, qty))
-                                    order_book = {
-                                        'bids': {price: qty for price, qty in bids},
-                                        'asks': {price: qty for price, qty in asks}
-                                    }
-                                    print(f"✅ Coinbase snapshot received. Bids: {len(order_book['bids'])}, Asks: {len(order_book['asks'])}")
+                                    order_book = OrderBook(*BOOK_PRECISION['coinbase'])
+                                    order_book.load(bids, asks)
+                                    watcher.set_book("coinbase", order_book)
+                                    print(f"✅ Coinbase snapshot received. Bids: {len(order_book.bids)}, Asks: {len(order_book.asks)}")
                                     if watcher.get_status("coinbase") == "disconnected":
                                         watcher.set_status("coinbase", "connected")
                                         logger.info("Coinbase watcher reconnected after snapshot.")
                                     continue
 
-                                elif event.get("type") == "update":
-                                    for update in event.get("updates", []):
-                                        side = update.get("side")
-                                        price = update.get("price_level")
-                                        qty = update.get("new_quantity")
+                                elif event.type == "update":
+                                    for update in event.updates:
+                                        side = update.side
+                                        price = update.price_level
+                                        qty = update.new_quantity
                                         if side == "bid":
-                                            if float(qty) == 0:
-                                                order_book['bids'].pop(price, None)
-                                            else:
-                                                order_book['bids'][price] = qty
+                                            order_book.set_bid(price, qty)
                                         elif side == "ask" or side == "offer":
-                                            if float(qty) == 0:
-                                                order_book['asks'].pop(price, None)
-                                            else:
-                                                order_book['asks'][price] = qty
+                                            order_book.set_ask(price, qty)
                                     # Update watcher if there are bids and ask
-                                    if order_book['bids'] and order_book['asks']:
-                                        bid = max(float(p) for p in order_book['bids'].keys())
-                                        ask = min(float(p) for p in order_book['asks'].keys())
+                                    if order_book.bids and order_book.asks:
+                                        bid = order_book.best_bid()
+                                        ask = order_book.best_ask()
                                         current = watcher.prices.get('coinbase')
                                         if current is None or bid != current.get('bid') or ask != current.get('ask'):
-                                            watcher.update_price('coinbase', bid, ask)
-                                            print(f"{crypto} Coinbase: highest bid={bid}, lowest ask={ask}")
+                                            watcher.update_price('coinbase', bid, ask, event_time=iso_timestamp(data.timestamp), received=received)
+                                            hot_log("bbo", "%s Coinbase: highest bid=%s, lowest ask=%s", crypto, bid, ask)
                             expected_sequence += 1
                             update_reconnects = 0
 
 
-                        elif data.get("channel") == "subscriptions":
-                            print(f"Subscription successful for: {data['events'][0]['subscriptions']}")
+                        elif data.channel == "subscriptions":
+                            print(f"Subscription successful for: {data.events[0].subscriptions}")
                             watcher.set_status("coinbase", "connected")
                             reconnect_attempts = 0
                             expected_sequence += 1
                         
                         else:
-                            print(f"Wrong channel '{data.get('channel')}', skipping...")
+                            print(f"Wrong channel '{data.channel}', skipping...")
                         
 
                     except asyncio.TimeoutError:
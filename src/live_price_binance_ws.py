@@ -4,13 +4,18 @@ import aiohttp
 import logging
 import asyncio
 import os
-from config.settings import STALE_TIME, MAX_WS_RECONNECTS
-from src.logging_config import setup_logging
+import time
+from config.settings import STALE_TIME, MAX_WS_RECONNECTS, BOOK_PRECISION
+from src.logging_config import setup_logging, HotPathLog
+from src.recorder import record_socket, record_snapshot
+from src.orderbook import OrderBook
+from src.decoders import binance_decoder, BinanceDepth
 
 sym = os.getenv("SYMBOL", "BTC")
 
 setup_logging(sym)
 logger = logging.getLogger(__name__)
+hot_log = HotPathLog(logger)
 
 # Binance ticker WS
 async def listen_binance(watcher, symbol="btcusdt"):
@@ -47,6 +52,8 @@ async def listen_binance_order_book(watcher, symbol="btcusdt", crypto="BTC", **k
 
         try:
             async with websockets.connect(depth_url) as ws:
+                ws = record_socket(ws, watcher.recorder, 'binance')
+                watcher.connects['binance'] += 1
                 print("Connecting to Binance depth stream")
 
                 if snap_reconnects >= MAX_WS_RECONNECTS:
@@ -57,17 +64,20 @@ async def listen_binance_order_book(watcher, symbol="btcusdt", crypto="BTC", **k
                 while snapshot is None and snap_reconnects < MAX_WS_RECONNECTS:
                     try:
                         msg = await ws.recv()
-                        data_b = json.loads(msg)
+                        watcher.messages['binance'] += 1
+                        data_b = binance_decoder.decode(msg)
+                        if not isinstance(data_b, BinanceDepth):
+                            continue
                         buffer.append(data_b)
                         # Try to fetch snapshot after first message
                         if snapshot is None:
                             snapshot = await fetch_snapshot(symbol)
+                            record_snapshot(watcher.recorder, 'binance', snapshot)
                             last_update_id = snapshot['lastUpdateId']
                             print(f"✅ Snapshot recibido. lastUpdateId = {last_update_id}")
-                            order_book = {
-                                'bids': {price: qty for price, qty in snapshot['bids']},
-                                'asks': {price: qty for price, qty in snapshot['asks']}
-                            }
+                            order_book = OrderBook(*BOOK_PRECISION['binance'])
+                            order_book.load(snapshot['bids'], snapshot['asks'])
+                            watcher.set_book("binance", order_book)
                     except Exception as e:
                         snap_reconnects += 1
                         logger.exception(f"Error while buffering: {e} | Reconnecting... Last received message: {data_b if 'data_b' in locals() else 'No data variable'}")
@@ -79,29 +89,19 @@ async def listen_binance_order_book(watcher, symbol="btcusdt", crypto="BTC", **k
                 # 2. Process buffered messages after snapshot
                 if snapshot is not None:
                     # Discard events where u <= lastUpdateId
-                    buffer = [data for data in buffer if data['u'] > last_update_id]
+                    buffer = [data for data in buffer if data.final_update_id > last_update_id]
                     # Find the first event where U <= lastUpdateId+1 <= u
                     start_index = None
                     for i, data in enumerate(buffer):
-                        U = data['U']
-                        u = data['u']
-                        if U <= last_update_id + 1 <= u:
+                        if data.first_update_id <= last_update_id + 1 <= data.final_update_id:
                             start_index = i
                             break
                     if start_index is not None:
                         # Apply all events from start_index onwards
                         for data in buffer[start_index:]:
-                            for price, qty in data['b']:
-                                if float(qty) == 0:
-                                    order_book['bids'].pop(price, None)
-                                else:
-                                    order_book['bids'][price] = qty
-                            for price, qty in data['a']:
-                                if float(qty) == 0:
-                                    order_book['asks'].pop(price, None)
-                                else:
-                                    order_book['asks'][price] = qty
-                            last_update_id = data['u']
+                            order_book.update_bids(data.bids)
+                            order_book.update_asks(data.asks)
+                            last_update_id = data.final_update_id
                     buffer = None  # Free memory
                     if watcher.get_status("binance") == "disconnected":
                         logger.info("Binance reconnected after disconnect.")
@@ -124,46 +124,42 @@ async def listen_binance_order_book(watcher, symbol="btcusdt", crypto="BTC", **k
                             break  # Break inner loop to reconnect
 
                         msg = await asyncio.wait_for(ws.recv(), timeout=STALE_TIME)
-                        data = json.loads(msg)
+                        received = time.time()
+                        watcher.messages['binance'] += 1
+                        data = binance_decoder.decode(msg)
+                        if not isinstance(data, BinanceDepth):
+                            logger.warning(f"Unexpected Binance frame, skipping: {data}")
+                            continue
 
-                        u = data['u']
-                        U = data['U']
+                        u = data.final_update_id
+                        U = data.first_update_id
                         if u <= last_update_id:
-                            print(f"Skipping update {u} as it is not newer than last_update_id {last_update_id}")
+                            hot_log("stale update", "Skipping update %s as it is not newer than last_update_id %s", u, last_update_id)
                             continue
                         if U > last_update_id + 1:
                             logger.exception(f"Desync binance detected, reseting order book with snapshot...")
+                            watcher.resyncs['binance'] += 1
                             watcher.set_status("binance", "disconnected")
                             snapshot = await fetch_snapshot(symbol)
+                            record_snapshot(watcher.recorder, 'binance', snapshot)
                             last_update_id = snapshot['lastUpdateId']
                             print(f"✅ Nuevo snapshot recibido {snapshot['lastUpdateId']}")
-                            order_book = {
-                                'bids': {price: qty for price, qty in snapshot['bids']},
-                                'asks': {price: qty for price, qty in snapshot['asks']}
-                            }
+                            order_book.load(snapshot['bids'], snapshot['asks'])
                             watcher.set_status("binance", "connected")
                             continue
-                        for price, qty in data['b']:
-                            if float(qty) == 0:
-                                order_book['bids'].pop(price, None)
-                            else:
-                                order_book['bids'][price] = qty
-                        for price, qty in data['a']:
-                            if float(qty) == 0:
-                                order_book['asks'].pop(price, None)
-                            else:
-                                order_book['asks'][price] = qty
+                        order_book.update_bids(data.bids)
+                        order_book.update_asks(data.asks)
                         last_update_id = u
 
                         # 4. Obtain best bid/ask and update
-                        bid = max(float(p) for p in order_book['bids'].keys())
-                        ask = min(float(p) for p in order_book['asks'].keys())
+                        bid = order_book.best_bid()
+                        ask = order_book.best_ask()
 
                         current = watcher.prices.get('binance')
 
                         if current is None or current['bid'] != bid or current['ask'] != ask:
-                            watcher.update_price('binance', bid, ask)
-                            print(f"{crypto} Binance: highest bid={bid}, lowest ask={ask}")
+                            watcher.update_price('binance', bid, ask, event_time=data.event_time / 1000, received=received)
+                            hot_log("bbo", "%s Binance: highest bid=%s, lowest ask=%s", crypto, bid, ask)
                             update_reconnects = 0 
 
                     except asyncio.TimeoutError:
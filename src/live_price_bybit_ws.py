@@ -3,13 +3,18 @@ import websockets
 import asyncio
 import logging
 import os
-from config.settings import STALE_TIME, MAX_WS_RECONNECTS
-from src.logging_config import setup_logging
+import time
+from config.settings import STALE_TIME, MAX_WS_RECONNECTS, BOOK_PRECISION
+from src.logging_config import setup_logging, HotPathLog
+from src.recorder import record_socket
+from src.orderbook import OrderBook
+from src.decoders import bybit_decoder, BybitMessage
 
 sym = os.getenv("SYMBOL", "BTC")
 
 setup_logging(sym)
 logger = logging.getLogger(__name__)
+hot_log = HotPathLog(logger)
 
 async def listen_bybit_order_book(watcher, symbol="BTCUSDT", crypto="BTC"):
     ws_url = "wss://stream.bybit.com/v5/public/spot"
@@ -29,6 +34,8 @@ async def listen_bybit_order_book(watcher, symbol="BTCUSDT", crypto="BTC"):
 
         try:
             async with websockets.connect(ws_url) as ws:
+                ws = record_socket(ws, watcher.recorder, 'bybit')
+                watcher.connects['bybit'] += 1
                 await ws.send(json.dumps(subscribe_msg))
                 reconnect_attempts = 0
                 print("Connecting to Bybit orderbook WS")
@@ -44,67 +51,64 @@ async def listen_bybit_order_book(watcher, symbol="BTCUSDT", crypto="BTC"):
                             break  # Break inner loop to reconnect
                         
                         msg = await asyncio.wait_for(ws.recv(), timeout=STALE_TIME)
-                        data = json.loads(msg)
+                        received = time.time()
+                        watcher.messages['bybit'] += 1
+                        data = bybit_decoder.decode(msg)
+                        if not isinstance(data, BybitMessage):
+                            logger.warning(f"Unexpected Bybit frame, skipping: {data}")
+                            continue
                         
                         if last_update_id is None:
                             # Only process snapshot or wait for snapshot before deltas
-                            if subscribed is False and data.get("success") is True:
+                            if subscribed is False and data.success is True:
                                 subscribed = True
                                 continue
-                            if subscribed is False and data.get("success") is not True:
+                            if subscribed is False and data.success is not True:
                                 logger.error(f"Bybit subscription failed: {data}")
                                 watcher.set_status("bybit", "disconnected")
                                 break
-                            if data.get("type") == "snapshot":
-                                snapshot = data['data']
-                                last_update_id = int(snapshot['u'])
+                            if data.type == "snapshot":
+                                snapshot = data.data
+                                last_update_id = snapshot.update_id
                                 print(f"First Bybit snapshot received. u = {last_update_id}")
-                                order_book = {
-                                    'bids': {price: qty for price, qty in snapshot['b']},
-                                    'asks': {price: qty for price, qty in snapshot['a']}
-                                }
+                                order_book = OrderBook(*BOOK_PRECISION['bybit'])
+                                order_book.load(snapshot.bids, snapshot.asks)
+                                watcher.set_book("bybit", order_book)
                             if watcher.get_status("bybit") == "disconnected":
                                 logger.info("Bybit reconnected after disconnect.")
                             watcher.set_status("bybit", "connected")
                             # If not snapshot, skip until snapshot is received
                             continue
-                        u = int(data['data']['u'])
-                        if data.get("topic") != topic or u <= last_update_id:
+                        if data.topic != topic or data.data is None:
+                            continue
+                        u = data.data.update_id
+                        if u <= last_update_id:
                             continue
-                        if data.get("type") == "snapshot" or u == 1:
+                        if data.type == "snapshot" or u == 1:
                             watcher.set_status("binance", "disconnected")
-                            snapshot = data['data']
-                            last_update_id = int(snapshot['u'])
+                            snapshot = data.data
+                            last_update_id = snapshot.update_id
                             print(f"Reset Bybit snapshot received. u = {last_update_id}")
-                            order_book = {
-                                'bids': {price: qty for price, qty in snapshot['b']},
-                                'asks': {price: qty for price, qty in snapshot['a']}
-                            }
+                            watcher.resyncs['bybit'] += 1
+                            order_book.load(snapshot.bids, snapshot.asks)
                             watcher.set_status("binance", "connected")
                             continue
                         # Process deltas
-                        if data.get("type") == "delta":   
-                            for price, qty in data['data']['b']:
-                                if float(qty) == 0:
-                                    order_book['bids'].pop(price, None)
-                                else:
-                                    order_book['bids'][price] = qty
-                            for price, qty in data['data']['a']:
-                                if float(qty) == 0:
-                                    order_book['asks'].pop(price, None)
-                                else:
-                                    order_book['asks'][price] = qty
+                        if data.type == "delta":   
+                            order_book.update_bids(data.data.bids)
+                            order_book.update_asks(data.data.asks)
 
                         last_update_id = u
 
                         # Update watcher with best bid/ask
-                        if order_book['bids'] and order_book['asks']:
-                            bid = max(float(p) for p in order_book['bids'].keys())
-                            ask = min(float(p) for p in order_book['asks'].keys())
+                        if order_book.bids and order_book.asks:
+                            bid = order_book.best_bid()
+                            ask = order_book.best_ask()
                             current = watcher.prices.get('bybit')
                             if current is None or current['bid'] != bid or current['ask'] != ask:
-                                watcher.update_price('bybit', bid, ask)
-                                print(f"{crypto} Bybit: highest bid={bid}, lowest ask={ask}")
+                                # cts is the matching engine time; ts is when Bybit sent the message
+                                watcher.update_price('bybit', bid, ask, event_time=(data.cts or data.ts) / 1000 or None, received=received)
+                                hot_log("bbo", "%s Bybit: highest bid=%s, lowest ask=%s", crypto, bid, ask)
 
                     except asyncio.TimeoutError:
                         logger.exception(f"No Bybit order book update for {STALE_TIME} seconds. Reconnecting...")
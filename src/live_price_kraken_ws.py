@@ -1,42 +1,29 @@
 import asyncio
 import json
 import websockets
-import aiohttp
-import zlib
 import logging
 import time
 import os
-from config.settings import STALE_TIME, MAX_WS_RECONNECTS
-from src.logging_config import setup_logging
+from config.settings import STALE_TIME, MAX_WS_RECONNECTS, KRAKEN_BOOK_DEPTH
+from src.logging_config import setup_logging, HotPathLog
+from src.recorder import record_socket
+from src.orderbook import OrderBook
+from src.kraken_checksum import KrakenChecksum
+from src.decoders import kraken_decoder, KrakenMessage, iso_timestamp
 
 
 sym = os.getenv("SYMBOL", "BTC")
 
 setup_logging(sym)
 logger = logging.getLogger(__name__)
+hot_log = HotPathLog(logger)
 
-depth = 25  # depth for Kraken order book
+KRAKEN_DEPTHS = (10, 25, 100, 500)
+MAX_CHECKSUM_RESYNCS = 3  # consecutive resubscribes before a full WS reconnect
 
-async def fetch_kraken_snapshot(symbol):
-    # Kraken REST API for order book snapshot
-    url = f"https://api.kraken.com/0/public/Depth"
-    params = {
-        "pair": symbol,
-        "count": depth
-    }
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, params=params) as resp:
-            data = await resp.json()
-            print(f"Fetched Kraken snapshot for {symbol}")
-            if 'result' not in data:
-                print(f"Kraken REST error: {data.get('error', data)}")
-                return None
-            # The result is {"result": {"SYMBOL": {"bids": [...], "asks": [...]}}}
-            book = list(data['result'].values())[0]
-            return book
-
-
-async def listen_kraken_order_book(watcher, symbol=["BTC/USDT"], crypto="BTC"):
+async def listen_kraken_order_book(watcher, symbol=["BTC/USDT"], crypto="BTC", depth=KRAKEN_BOOK_DEPTH):
+    if depth not in KRAKEN_DEPTHS:
+        raise ValueError(f"Kraken book depth must be one of {KRAKEN_DEPTHS}, got {depth}")
     # Kraken WebSocket API v2 endpoint
     ws_url = "wss://ws.kraken.com/v2"
     # Kraken expects symbols like XBT/USDT, ETH/USDT, etc.
@@ -49,17 +36,30 @@ async def listen_kraken_order_book(watcher, symbol=["BTC/USDT"], crypto="BTC"):
             "snapshot": True
         }
     }
+    # Resync by resubscribing: the fresh WS snapshot has the same number format the checksum is computed on
+    unsubscribe_msg = {
+        "method": "unsubscribe",
+        "params": {
+            "channel": "book",
+            "symbol": symbol,
+            "depth": depth
+        }
+    }
     reconnect_attempts = 0
     update_reconnects = 0
     
     while reconnect_attempts < MAX_WS_RECONNECTS:
         snapshot = None
         order_book = None
+        checksum = None
         last_checksum = None
+        checksum_resyncs = 0
         subscribed = False
 
         try:
             async with websockets.connect(ws_url) as ws:
+                ws = record_socket(ws, watcher.recorder, 'kraken')
+                watcher.connects['kraken'] += 1
                 await ws.send(json.dumps(subscribe_msg))
                 print("Connected to Kraken orderbook WS, subscribing...")
                 reconnect_attempts = 0
@@ -84,29 +84,36 @@ async def listen_kraken_order_book(watcher, symbol=["BTC/USDT"], crypto="BTC"):
                             task.cancel()
                         if done:
                             msg = done.pop().result()
-                            data = json.loads(msg, parse_float=str)
+                            received = time.time()
+                            watcher.messages['kraken'] += 1
+                            data = kraken_decoder.decode(msg)
+                            if not isinstance(data, KrakenMessage):
+                                logger.warning(f"Unexpected Kraken frame, skipping: {data}")
+                                continue
                             # Handle pong
-                            if isinstance(data, dict) and data.get("method") == "pong":
+                            if data.method == "pong":
                                 print(f"Received pong from Kraken: {data}")
                                 continue
                             # Wait for subscription acknowledgment
                             if not subscribed:
-                                if data.get('result', {}).get("channel") == "book" and data.get("success") == True:
+                                # The unsubscribe ack of a resync also carries channel "book"
+                                if data.method == "subscribe" and data.result.get("channel") == "book" and data.success == True:
                                     print(f"✅ Subscribed to Kraken book for {symbol}")
                                     subscribed = True
                                 continue
                             # Wait for the first snapshot
                             if snapshot is None:
-                                if data.get("channel") == "book" and data.get("type") == "snapshot":
+                                if data.channel == "book" and data.type == "snapshot":
                                     # Kraken v2 book snapshot is inside data['data'][0]
-                                    snapshot = data['data'][0]
-                                    bids = [(str(b['price']), str(b['qty'])) for b in snapshot.get('bids', [])]
-                                    asks = [(str(a['price']), str(a['qty'])) for a in snapshot.get('asks', [])]
-                                    order_book = {
-                                        'bids': {price: qty for price, qty in bids},
-                                        'asks': {price: qty for price, qty in asks}
-                                    }
-                                    last_checksum = snapshot.get('checksum')
+                                    snapshot = data.data[0]
+                                    bids = [(str(b.price), str(b.qty)) for b in snapshot.bids]
+                                    asks = [(str(a.price), str(a.qty)) for a in snapshot.asks]
+                                    # A new book per snapshot, so a resync re-infers precision from the WS strings
+                                    order_book = OrderBook(max_depth=depth)
+                                    order_book.load(bids, asks)
+                                    watcher.set_book("kraken", order_book)
+                                    checksum = KrakenChecksum(order_book)
+                                    last_checksum = snapshot.checksum
                                     print(f"✅ Kraken snapshot received. checksum = {last_checksum}")
                                     if watcher.get_status("kraken") == "disconnected":
                                         logger.info("Kraken reconnected after disconnect.")
@@ -114,51 +121,41 @@ async def listen_kraken_order_book(watcher, symbol=["BTC/USDT"], crypto="BTC"):
                                 else:
                                     continue
                             # Process updates
-                            if data.get("channel") == "book" and data.get("type") == "update":
-                                update = data['data'][0]
-                                for price, qty in [(str(b['price']), str(b['qty'])) for b in update.get('bids', [])]:
-                                    if float(qty) == 0:
-                                        order_book['bids'].pop(price, None)
-                                    else:
-                                        order_book['bids'][price] = qty
-                                for price, qty in [(str(a['price']), str(a['qty'])) for a in update.get('asks', [])]:
-                                    if float(qty) == 0:
-                                        order_book['asks'].pop(price, None)
-                                    else:
-                                        order_book['asks'][price] = qty
-                                # Truncate order book to depth 25
-                                if len(order_book['bids']) > depth:
-                                    #print(f"Truncating bids to depth {depth}")
-                                    order_book['bids'] = dict(sorted(order_book['bids'].items(), key=lambda x: -float(x[0]))[:depth])
-                                if len(order_book['asks']) > depth:
-                                    #print(f"Truncating asks to depth {depth}")
-                                    order_book['asks'] = dict(sorted(order_book['asks'].items(), key=lambda x: float(x[0]))[:depth])
+                            if data.channel == "book" and data.type == "update":
+                                update = data.data[0]
+                                for b in update.bids:
+                                    order_book.set_bid(str(b.price), str(b.qty))
+                                for a in update.asks:
+                                    order_book.set_ask(str(a.price), str(a.qty))
+                                # Only after the whole message: an insert can come before the delete that makes room
+                                order_book.trim()
                                 # Check checksum
-                                # new_checksum = update.get('checksum')
-                                # if new_checksum is not None:
-                                #     checksum_str = build_checksum_str(order_book)
-                                #     computed_checksum = zlib.crc32(checksum_str.encode())
-                                #     print(f"Kraken checksum, str: {checksum_str} computed: {computed_checksum}, received: {new_checksum}")
-                                #     if computed_checksum != new_checksum:
-                                #         print(f"❌ Kraken checksum mismatch! Local: {computed_checksum}, Exchange: {new_checksum}. Refetching snapshot...")
-                                #         snapshot = await fetch_kraken_snapshot(symbol)
-                                #         order_book = {
-                                #             'bids': {price: qty for price, qty, *_ in snapshot['bids']},
-                                #             'asks': {price: qty for price, qty, *_ in snapshot['asks']}
-                                #         }
-                                #         last_checksum = None
-                                #         continue
-                                #     last_checksum = new_checksum
+                                new_checksum = update.checksum
+                                if new_checksum is not None:
+                                    computed_checksum = checksum.compute()
+                                    if computed_checksum != int(new_checksum):
+                                        checksum_resyncs += 1
+                                        if checksum_resyncs > MAX_CHECKSUM_RESYNCS:
+                                            raise RuntimeError(f"Kraken checksum still mismatching after {MAX_CHECKSUM_RESYNCS} resyncs")
+                                        logger.warning(f"Kraken checksum mismatch! Local: {computed_checksum}, Exchange: {new_checksum}. Resubscribing for a new snapshot ({checksum_resyncs}/{MAX_CHECKSUM_RESYNCS})...")
+                                        # Resync in place, keeping the websocket open; updates are skipped until the new snapshot
+                                        watcher.resyncs['kraken'] += 1
+                                        await ws.send(json.dumps(unsubscribe_msg))
+                                        await ws.send(json.dumps(subscribe_msg))
+                                        snapshot = None
+                                        subscribed = False
+                                        last_checksum = None
+                                        continue
+                                    checksum_resyncs = 0
+                                    last_checksum = new_checksum
                                 # Update watcher with best bid/ask
-                                if order_book['bids'] and order_book['asks']:
-                                    best_bid = max(order_book['bids'].keys(), key=lambda x: float(x))
-                                    best_ask = min(order_book['asks'].keys(), key=lambda x: float(x))
-                                    bid = float(best_bid)
-                                    ask = float(best_ask)
+                                if order_book.bids and order_book.asks:
+                                    bid = order_book.best_bid()
+                                    ask = order_book.best_ask()
                                     current = watcher.prices.get('kraken')
                                     if current is None or current['bid'] != bid or current['ask'] != ask:
-                                        watcher.update_price('kraken', bid, ask)
-                                        print(f"{crypto} Kraken: highest bid={bid}, lowest ask={ask}")
+                                        watcher.update_price('kraken', bid, ask, event_time=iso_timestamp(update.timestamp), received=received)
+                                        hot_log("bbo", "%s Kraken: highest bid=%s, lowest ask=%s", crypto, bid, ask)
                         else:
                             # No message in 10 seconds, send ping
                             ping_msg = {
@@ -173,8 +170,8 @@ async def listen_kraken_order_book(watcher, symbol=["BTC/USDT"], crypto="BTC"):
                             while time.time() < pong_deadline:
                                 try:
                                     pong_msg = await asyncio.wait_for(ws.recv(), timeout=pong_deadline - time.time())
-                                    pong_data = json.loads(pong_msg)
-                                    if pong_data.get("method") == "pong" and pong_data.get("req_id") == ping_id:
+                                    pong_data = kraken_decoder.decode(pong_msg)
+                                    if isinstance(pong_data, KrakenMessage) and pong_data.method == "pong" and pong_data.req_id == ping_id:
                                         logger.info(f"Received pong from Kraken (req_id={ping_id})")
                                         pong_received = True
                                         break
@@ -211,18 +208,4 @@ async def listen_kraken_order_book(watcher, symbol=["BTC/USDT"], crypto="BTC"):
             reconnect_attempts += 1
             await asyncio.sleep(5)
     logger.error(f"Max reconnect/update attempts ({MAX_WS_RECONNECTS}) reached. Stopping Kraken order book listener.")
-    watcher.set_status("kraken", "stopped")
-
-def build_checksum_str(order_book):
-    def clean(val):
-        # Remove decimal and leading zeros
-        s = str(val).replace('.', '')
-        return s.lstrip('0') or '0'
-    asks = sorted(order_book['asks'].items(), key=lambda x: float(x[0]))
-    bids = sorted(order_book['bids'].items(), key=lambda x: -float(x[0]))
-    parts = []
-    for price, qty in asks:
-        parts.append(f"{clean(price)}{clean(qty)}")
-    for price, qty in bids:
-        parts.append(f"{clean(price)}{clean(qty)}")
-    return ''.join(parts)
\ No newline at end of file
+    watcher.set_status("kraken", "stopped")
\ No newline at end of file
@@ -6,9 +6,12 @@ import logging
 import time
 import asyncio
 import os
-from config.settings import STALE_TIME, MAX_WS_RECONNECTS
-from src.logging_config import setup_logging
+from config.settings import STALE_TIME, MAX_WS_RECONNECTS, BOOK_PRECISION
+from src.logging_config import setup_logging, HotPathLog
+from src.recorder import record_socket, record_snapshot
 from src.kcsign import KcSigner
+from src.orderbook import OrderBook
+from src.decoders import kucoin_decoder, KucoinMessage
 from dotenv import load_dotenv
 
 load_dotenv('./venv/.env')
@@ -17,6 +20,7 @@ sym = os.getenv("SYMBOL", "BTC")
 
 setup_logging(sym)
 logger = logging.getLogger(__name__)
+hot_log = HotPathLog(logger)
 
 async def get_token():
     conn = http.client.HTTPSConnection("api.kucoin.com")
@@ -75,6 +79,8 @@ async def listen_kucoin_order_book(watcher, symbol="BTC-USDT", crypto="BTC", **k
         order_book = None
         try:
             async with websockets.connect(url) as ws:
+                ws = record_socket(ws, watcher.recorder, 'kucoin')
+                watcher.connects['kucoin'] += 1
                 await ws.send(json.dumps(subscribe_msg))
                 print("Connecting to Kucoin WS...")
                 
@@ -88,8 +94,10 @@ async def listen_kucoin_order_book(watcher, symbol="BTC-USDT", crypto="BTC", **k
                         async def buffer_messages():
                             while not snapshot_ready:
                                 msg = await ws.recv()
-                                data_b = json.loads(msg)
-                                buffer.append(data_b)
+                                watcher.messages['kucoin'] += 1
+                                data_b = kucoin_decoder.decode(msg)
+                                if isinstance(data_b, KucoinMessage):
+                                    buffer.append(data_b)
                         
                         snapshot_ready = False
                         buffer_task = asyncio.create_task(buffer_messages())
@@ -98,14 +106,14 @@ async def listen_kucoin_order_book(watcher, symbol="BTC-USDT", crypto="BTC", **k
                         await asyncio.sleep(1) 
 
                         snapshot = await fetch_snapshot(symbol)
+                        record_snapshot(watcher.recorder, 'kucoin', snapshot)
                         sequence = int(snapshot['data']['sequence'])
                         snapshot_ready = True
                         await buffer_task  
                         print(f"Snapshot recibido. {sequence=}")
-                        order_book = {
-                            'bids': {price: qty for price, qty in snapshot['data']['bids']},
-                            'asks': {price: qty for price, qty in snapshot['data']['asks']}
-                        }
+                        order_book = OrderBook(*BOOK_PRECISION['kucoin'])
+                        order_book.load(snapshot['data']['bids'], snapshot['data']['asks'])
+                        watcher.set_book("kucoin", order_book)
                     except Exception as e:
                         snap_reconnects += 1
                         logger.exception(f"Error while buffering: {e} | Reconnecting... Last snapshot sequence number: {sequence if 'sequence' in locals() else 'No data variable'}")
@@ -117,29 +125,19 @@ async def listen_kucoin_order_book(watcher, symbol="BTC-USDT", crypto="BTC", **k
                 # 2. Process buffered messages after snapshot
                 if snapshot is not None:
                     # Discard events where sequenceEnd <= sequence
-                    buffer = [data for data in buffer if data['type'] not in ('welcome', 'ack') and data['data']['sequenceEnd'] > sequence]
+                    buffer = [data for data in buffer if data.data is not None and data.data.sequence_end > sequence]
                     # Find the first event where sequenceStart <= sequence+1 <= sequenceEnd
                     start_index = None
                     for i, data in enumerate(buffer):
-                        start_id = data['data']['sequenceStart']
-                        end_id = data['data']['sequenceEnd']
-                        if start_id <= sequence + 1 <= end_id:
+                        if data.data.sequence_start <= sequence + 1 <= data.data.sequence_end:
                             start_index = i
                             break
                     if start_index is not None:
                         # Apply all events from start_index onwards
                         for data in buffer[start_index:]:
-                            for price, qty, _ in data['data']['changes']['bids']:
-                                if float(qty) == 0:
-                                    order_book['bids'].pop(price, None)
-                                else:
-                                    order_book['bids'][price] = qty
-                            for price, qty, _ in data['data']['changes']['asks']:
-                                if float(qty) == 0:
-                                    order_book['asks'].pop(price, None)
-                                else:
-                                    order_book['asks'][price] = qty
-                            sequence = int(data['data']['sequenceEnd'])
+                            order_book.update_bids(data.data.changes.bids)
+                            order_book.update_asks(data.data.changes.asks)
+                            sequence = data.data.sequence_end
                     buffer = None  # Free memory
                     if watcher.get_status("kucoin") == "disconnected":
                         logger.info("Kucoin reconnected after disconnect.")
@@ -162,51 +160,47 @@ async def listen_kucoin_order_book(watcher, symbol="BTC-USDT", crypto="BTC", **k
                             break  # Break inner loop to reconnect
 
                         msg = await asyncio.wait_for(ws.recv(), timeout=STALE_TIME)
-                        data = json.loads(msg)
+                        received = time.time()
+                        watcher.messages['kucoin'] += 1
+                        data = kucoin_decoder.decode(msg)
                         #print(f"Received Kucoin message: {data}")
 
-                        if data['type'] == 'welcome' or data['type'] == 'ack':
+                        if not isinstance(data, KucoinMessage):
+                            logger.warning(f"Unexpected Kucoin frame, skipping: {data}")
+                            continue
+                        if data.type == 'welcome' or data.type == 'ack' or data.data is None:
                             continue
                         
-                        start_id = data['data']['sequenceStart']
-                        end_id = data['data']['sequenceEnd']
+                        start_id = data.data.sequence_start
+                        end_id = data.data.sequence_end
                         if end_id <= sequence:
-                            print(f"Skipping update {end_id} as it is not newer than last_update_id {sequence}")
+                            hot_log("stale update", "Skipping update %s as it is not newer than last_update_id %s", end_id, sequence)
                             continue
                         if start_id > sequence + 1:
                             print(f"{start_id=} > snapshot {sequence + 1=}, desync detected, resetting order book with snapshot...")
                             logger.exception(f"Desync kucoin detected, reseting order book with snapshot...")
+                            watcher.resyncs['kucoin'] += 1
                             watcher.set_status("kucoin", "disconnected")
                             snapshot = await fetch_snapshot(symbol)
+                            record_snapshot(watcher.recorder, 'kucoin', snapshot)
                             sequence = int(snapshot['data']['sequence'])
                             print(f"✅ Nuevo snapshot recibido {sequence}")
-                            order_book = {
-                                'bids': {price: qty for price, qty in snapshot['data']['bids']},
-                                'asks': {price: qty for price, qty in snapshot['data']['asks']}
-                            }
+                            order_book.load(snapshot['data']['bids'], snapshot['data']['asks'])
                             watcher.set_status("kucoin", "connected")
                             continue
-                        for price, qty, _ in data['data']['changes']['bids']:
-                            if float(qty) == 0:
-                                order_book['bids'].pop(price, None)
-                            else:
-                                order_book['bids'][price] = qty
-                        for price, qty, _ in data['data']['changes']['asks']:
-                            if float(qty) == 0:
-                                order_book['asks'].pop(price, None)
-                            else:
-                                order_book['asks'][price] = qty
+                        order_book.update_bids(data.data.changes.bids)
+                        order_book.update_asks(data.data.changes.asks)
                         sequence = end_id
 
                         # 4. Obtain best bid/ask and update
-                        bid = max(float(p) for p in order_book['bids'].keys())
-                        ask = min(float(p) for p in order_book['asks'].keys())
+                        bid = order_book.best_bid()
+                        ask = order_book.best_ask()
 
                         current = watcher.prices.get('kucoin')
 
                         if current is None or current['bid'] != bid or current['ask'] != ask:
-                            watcher.update_price('kucoin', bid, ask)
-                            print(f"{crypto} Kucoin: highest bid={bid}, lowest ask={ask}")
+                            watcher.update_price('kucoin', bid, ask, event_time=data.data.time / 1000 or None, received=received)
+                            hot_log("bbo", "%s Kucoin: highest bid=%s, lowest ask=%s", crypto, bid, ask)
                             update_reconnects = 0 
 
                     except asyncio.TimeoutError:
@@ -0,0 +1,223 @@
+import os
+import re
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+
+WINDOW = timedelta(hours=24)
+# Bytes read from the end of a file the first time it is seen; older lines fall outside the window anyway
+INITIAL_SCAN_BYTES = 64 * 1024 * 1024
+RECENT_OPPORTUNITIES = 10
+RECENT_ERRORS = 20
+
+OPPORTUNITY_PATTERN = re.compile(
+    r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}).*?'  # Timestamp
+    r'(\w+) Arbitrage opportunity! '                     # Symbol
+    r'Profit: ([\d.]+) USDT.*?'                        # Profit
+    r'Buy on (\w+) at ([\d.]+).*?'                     # Buy exchange + price
+    r'Sell on (\w+) at ([\d.]+)'                       # Sell exchange + price
+)
+ERROR_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}.*ERROR')
+
+ERROR_SOURCES = (
+    ("live_price_adv_cb_ws", "Coinbase"),
+    ("live_price_binance_ws", "Binance"),
+    ("live_price_bybit_ws", "Bybit"),
+    ("live_price_kucoin_ws", "Kucoin"),
+)
+
+
+def classify_error(filename, line):
+    """Clave '{crypto}-{exchange}' de una línea de error según el archivo y el módulo que la emitió"""
+    name = filename.lower()
+    crypto = "BTC" if "btc" in name else "ETH" if "eth" in name else "Unknown"
+    line_lower = line.lower()
+    exchange = next((label for module, label in ERROR_SOURCES if module in line_lower), "Unknown")
+    return f"{crypto}-{exchange}"
+
+
+class RollingCounter:
+    """Contador por clave en una ventana deslizante, agregado en buckets de un minuto.
+
+    Guarda como mucho un bucket por minuto de ventana, así que la memoria no
+    crece con el número de líneas. count y total se mantienen incrementalmente
+    y best se calcula sobre los buckets (acotado a 1440 por clave).
+    """
+
+    def __init__(self):
+        self.buckets = {}  # {key: deque([[minute, count, total, best], ...])}
+        self.count = {}
+        self.total = {}
+
+    def add(self, key, minute, value=0.0):
+        buckets = self.buckets.setdefault(key, deque())
+        # Late lines (another file, clock skew) merge into the newest bucket
+        if buckets and buckets[-1][0] >= minute:
+            bucket = buckets[-1]
+            bucket[1] += 1
+            bucket[2] += value
+            bucket[3] = max(bucket[3], value)
+        else:
+            buckets.append([minute, 1, value, value])
+        self.count[key] = self.count.get(key, 0) + 1
+        self.total[key] = self.total.get(key, 0.0) + value
+
+    def expire(self, oldest_minute):
+        for key in list(self.buckets):
+            buckets = self.buckets[key]
+            while buckets and buckets[0][0] < oldest_minute:
+                _, count, total, _ = buckets.popleft()
+                self.count[key] -= count
+                self.total[key] -= total
+            if not buckets:
+                del self.buckets[key], self.count[key], self.total[key]
+
+    def best(self, key):
+        return max(bucket[3] for bucket in self.buckets[key])
+
+
+class LogIndexer:
+    """Índice incremental de los logs para el dashboard.
+
+    Un hilo recorre el directorio cada `interval` segundos y, por archivo,
+    recuerda inode y offset, así que solo se parsean las líneas nuevas. Si el
+    inode cambia o el archivo encoge (rotación o truncado), se vuelve a leer
+    desde el principio. Mantiene oportunidades y errores de las últimas 24 h
+    por símbolo y por crypto-exchange, más las listas de recientes acotadas.
+    Los endpoints leen el índice sin tocar disco.
+    """
+
+    def __init__(self, logs_path, interval=2.0, window=WINDOW, initial_scan_bytes=INITIAL_SCAN_BYTES):
+        self.logs_path = logs_path
+        self.interval = interval
+        self.window = window
+        self.initial_scan_bytes = initial_scan_bytes
+        self.files = {}  # {filename: (inode, offset)}
+        self.opportunities = RollingCounter()
+        self.errors = RollingCounter()
+        self.recent_opportunities = deque(maxlen=RECENT_OPPORTUNITIES)
+        self.recent_errors = deque(maxlen=RECENT_ERRORS)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="log-indexer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Error indexing logs: {e}")
+            self._stop.wait(self.interval)
+
+    def poll(self):
+        """Parsea lo añadido a cada .log desde la última pasada"""
+        if not os.path.exists(self.logs_path):
+            return
+        names = [f for f in os.listdir(self.logs_path) if f.endswith('.log')]
+        for name in names:
+            self._index_file(name)
+        for name in set(self.files) - set(names):
+            del self.files[name]
+        with self._lock:
+            self._expire()
+
+    def _index_file(self, name):
+        path = os.path.join(self.logs_path, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return
+        inode, offset = self.files.get(name, (None, None))
+        skip_partial = False
+        if offset is None:
+            offset = max(stat.st_size - self.initial_scan_bytes, 0)
+            skip_partial = offset > 0
+        elif inode != stat.st_ino or stat.st_size < offset:
+            offset = 0
+        if stat.st_size == offset:
+            self.files[name] = (stat.st_ino, offset)
+            return
+
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            data = f.read(stat.st_size - offset)
+        # Only complete lines; a partial last line is read again on the next pass
+        end = data.rfind(b'\n') + 1
+        start = data.find(b'\n') + 1 if skip_partial else 0
+        self.files[name] = (stat.st_ino, offset + end)
+        if end <= start:
+            return
+
+        is_opportunity_log = name.startswith('arb_op_')
+        with self._lock:
+            for line in data[start:end].decode('utf-8', errors='ignore').splitlines():
+                if is_opportunity_log and 'Arbitrage opportunity!' in line:
+                    self._add_opportunity(line)
+                if ERROR_PATTERN.match(line):
+                    self._add_error(name, line)
+
+    def _add_opportunity(self, line):
+        match = OPPORTUNITY_PATTERN.search(line)
+        if not match:
+            return
+        timestamp_str, symbol, profit, buy_exchange, buy_price, sell_exchange, sell_price = match.groups()
+        profit = float(profit)
+        self.opportunities.add(symbol, timestamp_str[:16], profit)
+        self.recent_opportunities.append({
+            'timestamp': timestamp_str,
+            'symbol': symbol,
+            'profit': profit,
+            'buy_exchange': buy_exchange,
+            'buy_price': float(buy_price),
+            'sell_exchange': sell_exchange,
+            'sell_price': float(sell_price),
+            'spread_pct': round(((float(sell_price) - float(buy_price)) / float(buy_price)) * 100, 4)
+        })
+
+    def _add_error(self, name, line):
+        timestamp = line[:19]
+        key = classify_error(name, line)
+        self.errors.add(key, timestamp[:16])
+        crypto, exchange = key.split('-', 1)
+        self.recent_errors.append({
+            'timestamp': timestamp,
+            'crypto': crypto,
+            'exchange': exchange,
+            'message': line.strip()[:200]
+        })
+
+    def _expire(self):
+        # Log timestamps are local 'YYYY-MM-DD HH:MM', which sort lexicographically
+        oldest = (datetime.now() - self.window).strftime('%Y-%m-%d %H:%M')
+        self.opportunities.expire(oldest)
+        self.errors.expire(oldest)
+        while self.recent_opportunities and self.recent_opportunities[0]['timestamp'][:16] < oldest:
+            self.recent_opportunities.popleft()
+
+    def opportunities_summary(self):
+        """({symbol: {count, total_profit, best_profit}}, recientes de más nueva a más antigua)"""
+        with self._lock:
+            self._expire()
+            by_symbol = {
+                symbol: {
+                    'count': self.opportunities.count[symbol],
+                    'total_profit': self.opportunities.total[symbol],
+                    'best_profit': self.opportunities.best(symbol)
+                }
+                for symbol in self.opportunities.buckets
+            }
+            return by_symbol, list(reversed(self.recent_opportunities))
+
+    def error_summary(self):
+        """({'{crypto}-{exchange}': count}, errores recientes en orden cronológico)"""
+        with self._lock:
+            self._expire()
+            return dict(self.errors.count), list(self.recent_errors)
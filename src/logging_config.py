@@ -1,18 +1,38 @@
+import atexit
 import logging
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 
+from config.settings import LOG_QUEUE, QUIET_MODE, HOT_PATH_LOG_INTERVAL
+
+_listener = None
+
+
 class MaxLevelFilter(logging.Filter):
     def __init__(self, level):
         self.level = level
     def filter(self, record):
         return record.levelno < self.level
 
-def setup_logging(symbol):
+def setup_logging(symbol, use_queue=LOG_QUEUE):
+    """Handlers de archivo arb_op_/arb_error_{symbol}.log en el root logger.
+
+    Con use_queue el root logger solo tiene un QueueHandler: el event loop
+    encola el registro ya formateado y un QueueListener escribe los archivos
+    en un hilo aparte. Es idempotente; las llamadas siguientes no hacen nada.
+    """
+    global _listener
     logs_dir = Path(__file__).parent.parent / "logs"
     logs_dir.mkdir(parents=True, exist_ok=True)
 
     # Root logger
     root_logger = logging.getLogger()
+
+    # Avoid duplicate handlers; an already configured root logger (replay, benchmarks) keeps its level too
+    if root_logger.hasHandlers():
+        return _listener
     root_logger.setLevel(logging.INFO)
 
     # Info handler
@@ -32,7 +52,49 @@ def setup_logging(symbol):
     error_handler.setLevel(logging.ERROR)
     error_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s %(message)s'))
 
-    # Avoid duplicate handlers
-    if not root_logger.hasHandlers():
+    if not use_queue:
         root_logger.addHandler(info_handler)
-        root_logger.addHandler(error_handler)
\ No newline at end of file
+        root_logger.addHandler(error_handler)
+        return None
+
+    log_queue = queue.SimpleQueue()
+    root_logger.addHandler(QueueHandler(log_queue))
+    # respect_handler_level keeps the per-file level split on the listener side
+    _listener = QueueListener(log_queue, info_handler, error_handler, respect_handler_level=True)
+    _listener.start()
+    # Drain what is still queued when the process exits
+    atexit.register(_listener.stop)
+    return _listener
+
+
+class HotPathLog:
+    """Salida de consola para el camino caliente (cada cambio de BBO, cada evaluación).
+
+    Fuera del modo quiet es un print() como hasta ahora. En modo quiet cada
+    `key` se convierte en un logger.info limitado a uno cada `interval`
+    segundos, indicando cuántos mensajes se omitieron; va a INFO porque
+    setup_logging deja los loggers en ese nivel. El mensaje se formatea con
+    %-args solo si se va a emitir.
+    """
+
+    def __init__(self, logger, interval=HOT_PATH_LOG_INTERVAL, quiet=QUIET_MODE):
+        self.logger = logger
+        self.interval = interval
+        self.quiet = quiet
+        self.last = {}  # {key: (monotonic time of last emit, suppressed since)}
+
+    def __call__(self, key, message, *args):
+        if not self.quiet:
+            print(message % args if args else message)
+            return
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        now = time.monotonic()
+        last, suppressed = self.last.get(key, (None, 0))
+        if last is not None and now - last < self.interval:
+            self.last[key] = (last, suppressed + 1)
+            return
+        self.last[key] = (now, 0)
+        if suppressed:
+            message = f"{message} ({suppressed} similar suppressed)"
+        self.logger.info(message, *args)
@@ -0,0 +1,40 @@
+import os
+
+BLOCK_SIZE = 64 * 1024
+
+
+def _normalize(line, encoding, errors):
+    # Same line endings text-mode readlines() produces (universal newlines)
+    if line.endswith(b'\r\n'):
+        line = line[:-2] + b'\n'
+    elif line.endswith(b'\r'):
+        line = line[:-1] + b'\n'
+    return line.decode(encoding, errors)
+
+
+def tail_lines(path, n, block_size=BLOCK_SIZE, encoding='utf-8', errors='ignore'):
+    """Últimas n líneas de un archivo, igual que readlines()[-n:] pero leyendo bloques desde el final.
+
+    Solo se leen los bloques que contienen esas n líneas, así que el coste
+    depende de las líneas pedidas y no del tamaño del archivo.
+    """
+    if n <= 0:
+        return []
+    with open(path, 'rb') as f:
+        pos = f.seek(0, os.SEEK_END)
+        chunks = []
+        newlines = 0
+        # n lines need n + 1 newlines to be complete (the one before the first line),
+        # or fewer if we reach the start of the file
+        while pos > 0 and newlines <= n:
+            size = min(block_size, pos)
+            pos -= size
+            f.seek(pos)
+            chunk = f.read(size)
+            chunks.append(chunk)
+            newlines += chunk.count(b'\n')
+    lines = b''.join(reversed(chunks)).splitlines(keepends=True)
+    if pos > 0:
+        # The first line is cut by the block boundary
+        lines = lines[1:]
+    return [_normalize(line, encoding, errors) for line in lines[-n:]]
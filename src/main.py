@@ -6,14 +6,28 @@ import json
 import logging
 import os
 import sys
-import redis
-from src.logging_config import setup_logging
+from collections import Counter
+from src.logging_config import setup_logging, HotPathLog
 from src.live_price_binance_ws import listen_binance_order_book
 from src.live_price_bybit_ws import listen_bybit_order_book
 from src.live_price_kraken_ws import listen_kraken_order_book
 from src.live_price_adv_cb_ws import listen_coinbase_order_book
 from src.live_price_kucoin_ws import listen_kucoin_order_book
-from config.settings import STALE_TIME
+from src.ladders import ladder_arrays, pair_size
+from src.metrics import LatencyRecorder, VenueLatency, monitor_loop_lag
+from src.status_publisher import StatusPublisher
+from src.tick_stream import TickStream
+from src.opportunity_store import OpportunityWriter
+from src.recorder import FrameRecorder
+from src.tick_store import TickStoreWriter
+from src.metrics_server import MetricsServer
+from src.spreads import SpreadMatrix, load_taker_fees
+from src.bbo_index import BestPriceIndex
+from config.settings import (
+    STALE_TIME, OPPORTUNITY_DEPTH_LEVELS, MIN_OPPORTUNITY_NOTIONAL, DETECTOR_IDLE_TIMEOUT, LATENCY_REPORT_INTERVAL,
+    EXCHANGE_FEES_PATH, DEFAULT_TAKER_FEE, TAKER_FEE_OVERRIDES, TOP_SPREAD_PAIRS, LOOP_LAG_INTERVAL, QUIET_MODE,
+    RECORD_FRAMES, TICK_STORE, METRICS_PORT
+)
 
 
 def get_symbol():
@@ -27,15 +41,45 @@ symbol = get_symbol()
 # Set up logging
 setup_logging(symbol)
 logger = logging.getLogger(__name__)
+hot_log = HotPathLog(logger)
 
 # live_price_watcher
 class LivePriceWatcher:
-    def __init__(self, symbol_name):
+    def __init__(self, symbol_name, record_frames=RECORD_FRAMES, tick_store=TICK_STORE):
         self.symbol = symbol_name
         self.prices = {}  # {exchange_id: {'bid': x, 'ask': y, 'timestamp': t, 'status': 'connected'/'disconnected'}}
-        
-        self.redis_client = None
-        self._setup_redis()
+        self.books = {}  # {exchange_id: OrderBook} registered by the order book listeners
+        self.connected = set()  # exchanges whose status is 'connected'
+        self.fees = load_taker_fees(EXCHANGE_FEES_PATH, TAKER_FEE_OVERRIDES)
+        self.spreads = SpreadMatrix(self.fees, DEFAULT_TAKER_FEE)  # net spread for every (buy, sell) pair
+        # Best net bid/ask among connected venues, read by the detector without scanning the matrix
+        self.bbo_index = BestPriceIndex(self.fees, DEFAULT_TAKER_FEE)
+
+        # Wakes check_opportunity_loop on every BBO/status change; bursts coalesce into one evaluation
+        self.changed = asyncio.Event()
+        self._tick_time = None  # perf_counter of the oldest change not yet evaluated
+        self.latency = LatencyRecorder("tick_to_decision")
+        self.loop_lag = LatencyRecorder("event_loop_lag")
+        self.evaluation = LatencyRecorder("detector_evaluation")
+        # Per-venue histograms of exchange event -> receive -> book applied -> detector evaluated
+        self.venue_latency = VenueLatency()
+        # Per-venue counters for the metrics endpoint; listeners bump messages, connects and resyncs directly
+        self.messages = Counter()
+        self.connects = Counter()
+        self.resyncs = Counter()
+        self.disconnects = Counter()
+        self.bbo_updates = Counter()
+
+        # Redis status writes happen in publisher.run(); ticks only mark the state dirty
+        self.publisher = StatusPublisher(self)
+        # Every BBO change also goes to the ticks:{symbol} stream, batched on the same connection
+        self.tick_stream = TickStream(self, self.publisher)
+        # Detected opportunities are written to SQLite in batches, off the event loop
+        self.opportunities = OpportunityWriter()
+        # Opt-in capture of every raw frame and snapshot the listeners receive, written by its own thread
+        self.recorder = FrameRecorder(prefix=symbol_name.lower()).start() if record_frames else None
+        # Opt-in columnar history of every BBO change (and top-N levels) for backtests and dashboard charts
+        self.tick_store = TickStoreWriter(symbol_name) if tick_store else None
 
         # Path del archivo de status
         self.status_file = f"/app/logs/status_{self.symbol}.json"
@@ -43,63 +87,23 @@ class LivePriceWatcher:
         if not os.path.exists("/app/logs"):
             self.status_file = f"logs/status_{self.symbol}.json"
 
-    def _setup_redis(self):
-        """Configura conexión Redis con fallback"""
-        try:
-            redis_url = os.getenv('REDIS_URL')
-            self.redis_client = redis.from_url(redis_url, decode_responses=True)
-            
-            # Test connection
-            self.redis_client.ping()
-            logger.info(f"Redis connected successfully for {self.symbol}")
-            
-        except Exception as e:
-            logger.warning(f"Redis connection failed for {self.symbol}: {e}")
-            logger.warning(f"Falling back to JSON files")
-            self.redis_client = None
-    
-    def _write_status_redis(self):
-        """Escribe estado a Redis con TTL"""
-        if not self.redis_client:
-            return False
-            
-        try:
-            status_data = {
-                'symbol': self.symbol,
-                'last_update': time.time(),
-                'last_update_readable': time.strftime('%Y-%m-%d %H:%M:%S'),
-                'exchanges': self.prices
-            }
-            
-            # Escribir con TTL de 60 segundos
-            key = f"status:{self.symbol}"
-            self.redis_client.setex(key, 60, json.dumps(status_data))
-            
-            # También escribir datos individuales para queries más fáciles
-            for exchange, data in self.prices.items():
-                exchange_key = f"exchange:{self.symbol}:{exchange}"
-                self.redis_client.setex(exchange_key, 60, json.dumps(data))
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error writing to Redis: {e}")
-            return False
-    
-    def _write_status_file(self):
+    def status_data(self):
+        """Estado actual con metadatos, tal como se publica en Redis y en el archivo de status"""
+        return {
+            'symbol': self.symbol,
+            'last_update': time.time(),
+            'last_update_readable': time.strftime('%Y-%m-%d %H:%M:%S'),
+            # Copied so the file fallback can serialize it off the event loop
+            'exchanges': {exchange: dict(data) for exchange, data in self.prices.items()},
+            'top_pairs': self.get_top_pairs()
+        }
+
+    def write_status_file(self, status_data):
         """Escribe el estado actual del exchange a archivo JSON"""
         try:
             # Crear directorio si no existe
             os.makedirs(os.path.dirname(self.status_file), exist_ok=True)
             
-            # Preparar datos con metadatos
-            status_data = {
-                'symbol': self.symbol,
-                'last_update': time.time(),
-                'last_update_readable': time.strftime('%Y-%m-%d %H:%M:%S'),
-                'exchanges': self.prices
-            }
-            
             # Escribir atómicamente (write temp + rename)
             temp_file = f"{self.status_file}.tmp"
             with open(temp_file, 'w') as f:
@@ -111,115 +115,229 @@ class LivePriceWatcher:
         except Exception as e:
             logger.error(f"Error writing status file {self.status_file}: {e}")
 
-    def _update_status(self):
-        """Actualiza estado usando Redis primero, JSON como fallback"""
-        redis_success = self._write_status_redis()
-        # Solo usar archivo si Redis falló
-        if not redis_success:
-            file_success = self._write_status_file()
-
-        if not redis_success and not file_success:
-            logger.error(f"Failed to write status for {self.symbol}")
-    
-    def update_price(self, exchange, bid, ask):
-        # Set status to connected on price update
+    def update_price(self, exchange, bid, ask, event_time=None, received=None):
+        # Set status to connected on price update. event_time (exchange clock) and received are epoch seconds
         self.prices[exchange] = {'bid': bid, 'ask': ask, 'timestamp': time.time(), 'status': 'connected'}
-        if self.redis_client:
-            self._update_status()
+        self.venue_latency.update(exchange, event_time, received, self.prices[exchange]['timestamp'])
+        self.bbo_updates[exchange] += 1
+        self._record_tick(exchange, bid, ask, self.prices[exchange]['timestamp'], self.books.get(exchange))
+        self.connected.add(exchange)
+        self.spreads.update(exchange, bid, ask)
+        self.bbo_index.update(exchange, bid, ask)
+        self._signal_change()
+        self.publisher.mark_dirty()
 
     def set_status(self, exchange, status):
+        if status == 'disconnected' and self.get_status(exchange) != 'disconnected':
+            self.disconnects[exchange] += 1
         if exchange in self.prices:
             self.prices[exchange]['status'] = status
         else:
             self.prices[exchange] = {'bid': None, 'ask': None, 'timestamp': None, 'status': status}
-        if self.redis_client:
-            self._update_status()
+        if status == 'connected':
+            self.connected.add(exchange)
+            self.spreads.update(exchange, self.prices[exchange]['bid'], self.prices[exchange]['ask'])
+            self.bbo_index.update(exchange, self.prices[exchange]['bid'], self.prices[exchange]['ask'])
+        elif exchange in self.connected:
+            self.connected.discard(exchange)
+            self.spreads.remove(exchange)
+            self.bbo_index.remove(exchange)
+            # A nan row in the tick history: backtests and spread stats stop using its last price here
+            self._record_tick(exchange, None, None, time.time())
+        self._signal_change()
+        self.publisher.mark_dirty()
+
+    def _record_tick(self, exchange, bid, ask, timestamp, book=None):
+        self.tick_stream.append(exchange, bid, ask, timestamp)
+        if self.tick_store is not None:
+            self.tick_store.append(exchange, bid, ask, timestamp, book)
+
+    def clear_price(self, exchange):
+        """Descarta el BBO de un venue cuyo libro ya no es válido; queda desconectado hasta que vuelva a cotizar"""
+        self.set_status(exchange, 'disconnected')
+        self.prices[exchange]['bid'] = None
+        self.prices[exchange]['ask'] = None
+
+    def _signal_change(self):
+        if self._tick_time is None:
+            self._tick_time = time.perf_counter()
+        self.changed.set()
+
+    async def wait_for_change(self, timeout=DETECTOR_IDLE_TIMEOUT):
+        """Espera al siguiente cambio de precio/status o hasta timeout.
+
+        Devuelve el perf_counter del cambio más antiguo pendiente, o None si
+        expiró sin cambios (el detector sigue revisando precios caducados).
+        """
+        try:
+            await asyncio.wait_for(self.changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self.changed.clear()
+        tick_time, self._tick_time = self._tick_time, None
+        return tick_time
 
     def get_status(self, exchange):
         return self.prices.get(exchange, {}).get('status', None)
 
-    def get_best_opportunity(self):
-        best_bid = {'exchange': None, 'price': -1}
-        best_ask = {'exchange': None, 'price': float('inf')}
+    def set_book(self, exchange, order_book):
+        self.books[exchange] = order_book
 
-        for exchange_id, price in self.prices.items():
-            if price.get('status') != 'connected':
-                continue
-            if price['bid'] is None or price['ask'] is None:
-                continue
-            if price['bid'] > best_bid['price'] and price['bid'] > 0:
-                best_bid = {'exchange': exchange_id, 'price': price['bid'], 'timestamp': price['timestamp']}
-            if price['ask'] < best_ask['price'] and price['ask'] > 0:
-                best_ask = {'exchange': exchange_id, 'price': price['ask'], 'timestamp': price['timestamp']}
+    def get_top_pairs(self, k=TOP_SPREAD_PAIRS):
+        """Los k pares (buy, sell) con mayor spread neto de comisiones entre exchanges conectados"""
+        return self.spreads.top_pairs(k)
 
-        return best_bid, best_ask
-    
-    
-async def check_opportunity_loop(watcher, taker_fee=0.001):
+    def get_pair_size(self, buy_exchange, sell_exchange, levels=OPPORTUNITY_DEPTH_LEVELS):
+        """Tamaño óptimo y VWAP comprando en buy_exchange y vendiendo en sell_exchange, o None sin libros o sin tamaño rentable"""
+        buy_book = self.books.get(buy_exchange)
+        sell_book = self.books.get(sell_exchange)
+        if buy_book is None or sell_book is None:
+            return None
+        return pair_size(ladder_arrays(buy_book, levels), ladder_arrays(sell_book, levels),
+                         self.spreads.fee(buy_exchange), self.spreads.fee(sell_exchange))
+
+
+def _end_episode(symbol, episode, now):
+    """Cierra el episodio [buy, sell, start, recorded]; solo se loguea si se llegó a registrar"""
+    if episode is not None and episode[3]:
+        logger.info(f"{symbol} Opportunity closed: Buy on {episode[0]} | Sell on {episode[1]} | Lasted {now - episode[2]:.3f}s")
+    return None
+
+
+async def check_opportunity_loop(watcher):
     logger.info(f"Starting check_opportunity_loop for {watcher.symbol}")
     first_opportunity = None
     opportunity = None
+    # The best pair while it stays best and profitable: recorded and logged once, like the backtest's episodes
+    episode = None  # [buy, sell, start, recorded]
     op_count = 0
+    last_report = time.time()
     while True:
-        # Only run if at least two exchanges are connected
-        connected_exchanges = [ex for ex, data in watcher.prices.items() if data.get('status') == 'connected']
-        if len(connected_exchanges) < 2:
-            await asyncio.sleep(0.5)
-            continue
-        bid, ask = watcher.get_best_opportunity()
-        if bid['exchange'] and ask['exchange']:
+        tick_time = await watcher.wait_for_change()
+        evaluation_start = time.perf_counter()
+        try:
+            # Only run if at least two exchanges are connected
+            if len(watcher.connected) < 2:
+                episode = _end_episode(watcher.symbol, episode, time.time())
+                continue
+            # Best (buy, sell) pair net of each venue's own taker fee, from the incremental index
+            best = watcher.bbo_index.best_pair()
             current_time = time.time()
-            adj_bid = bid['price'] * (1 - taker_fee)
-            adj_ask = ask['price'] * (1 + taker_fee)
-            profit = round(adj_bid, 2) - round(adj_ask, 2)
-            if profit > 0:
-                opportunity = (
-                    ask['exchange'], ask['price'], ask['timestamp'], 
-                    bid['exchange'], bid['price'], bid['timestamp']
-                )
+            if best is None or round(best[2], 2) <= 0:
+                episode = _end_episode(watcher.symbol, episode, current_time)
+                continue
+            buy, sell, net_spread = best
+            buy_prices = watcher.prices.get(buy)
+            sell_prices = watcher.prices.get(sell)
+            if buy_prices is None or sell_prices is None or buy_prices['ask'] is None or sell_prices['bid'] is None:
+                # A listener dropped the venue's prices without updating the index: skip the pair
+                episode = _end_episode(watcher.symbol, episode, current_time)
+                continue
+            profit = round(net_spread, 2)
+            ask = {'exchange': buy, 'price': buy_prices['ask'], 'timestamp': buy_prices['timestamp']}
+            bid = {'exchange': sell, 'price': sell_prices['bid'], 'timestamp': sell_prices['timestamp']}
+            opportunity = (
+                ask['exchange'], ask['price'], ask['timestamp'], 
+                bid['exchange'], bid['price'], bid['timestamp']
+            )
+
+            # Best bid or best ask has not changed in the last STALE_TIME seconds
+            if abs(opportunity[2] - opportunity[5]) > STALE_TIME or current_time - opportunity[2] > STALE_TIME or current_time - opportunity[5] > STALE_TIME:
+                logger.warning(f"{watcher.symbol} Opportunity stale: {opportunity}")
+                episode = _end_episode(watcher.symbol, episode, current_time)
+                # PENDING: Reconnect to the exchange in question
+                if opportunity[2] > opportunity[5]:
+                    watcher.set_status(bid['exchange'], 'disconnected')
+                    logger.warning(f"Disconnecting {bid['exchange']} due to stale opportunity")
+                else:
+                    watcher.set_status(ask['exchange'], 'disconnected')
+                    logger.warning(f"Disconnecting {ask['exchange']} due to stale opportunity")
+                continue
+
+            if episode is None or episode[0] != buy or episode[1] != sell:
+                episode = _end_episode(watcher.symbol, episode, current_time)
+                episode = [buy, sell, current_time, False]
                 # First opportunity profit found
                 if first_opportunity is None:
-                    print(f"First opportunity found")
+                    hot_log("first opportunity", "First opportunity found")
                     first_opportunity = opportunity
-                
-                # Best bid or best ask has not changed in the last STALE_TIME seconds
-                if abs(opportunity[2] - opportunity[5]) > STALE_TIME or current_time - opportunity[2] > STALE_TIME or current_time - opportunity[5] > STALE_TIME:
-                    logger.warning(f"{watcher.symbol} Opportunity stale: {opportunity}")
-                    # PENDING: Reconnect to the exchange in question
-                    if opportunity[2] > opportunity[5]:
-                        watcher.set_status(bid['exchange'], 'disconnected')
-                        logger.warning(f"Disconnecting {bid['exchange']} due to stale opportunity")
-                    else:
-                        watcher.set_status(ask['exchange'], 'disconnected')
-                        logger.warning(f"Disconnecting {ask['exchange']} due to stale opportunity")
-                    continue
-
                 # Check if this is the first opportunity exchanges
                 if opportunity[0] == first_opportunity[0] and opportunity[3] == first_opportunity[3]:
                     # PENDING: handle same opportunity
-                    print(f"Same opportunity found: {opportunity}")
+                    hot_log("same opportunity", "Same opportunity found: %s", opportunity)
                 if opportunity[0] != first_opportunity[0] or opportunity[3] != first_opportunity[3]:
-                    print("reset first opportunity")
+                    hot_log("reset opportunity", "reset first opportunity")
                     first_opportunity = None
+            elif episode[3]:
+                # Same episode, already recorded
+                continue
+
+            # Size actually executable across both books, not just top of book
+            executable = watcher.get_pair_size(buy, sell)
+            has_depth = buy in watcher.books and sell in watcher.books
+            if has_depth and (executable is None or executable['size'] * executable['buy_vwap'] < MIN_OPPORTUNITY_NOTIONAL):
+                # Re-sized on the next change until the episode ends or gets deep enough
+                logger.debug("%s Opportunity too shallow: %s", watcher.symbol, executable)
+                continue
+            depth_info = "n/a"
+            if executable is not None:
+                depth_info = f"{executable['size']:.8f} | VWAP buy {executable['buy_vwap']:.2f} sell {executable['sell_vwap']:.2f} | Executable profit: {executable['profit']:.2f} USDT"
+            watcher.opportunities.record(
+                watcher.symbol, ask['exchange'], ask['price'], bid['exchange'], bid['price'], profit,
+                buy_fee=watcher.spreads.fee(ask['exchange']), sell_fee=watcher.spreads.fee(bid['exchange']),
+                executable=executable, latency=None if tick_time is None else time.perf_counter() - tick_time,
+                ts=current_time
+            )
+            episode[3] = True
+            # Full price dump only outside quiet mode; the structured row is in the opportunity store
+            prices_info = "" if QUIET_MODE else f" | Prices: {json.dumps(watcher.prices)}"
+            logger.info(f"{watcher.symbol} Arbitrage opportunity! Profit: {profit:.2f} USDT | Buy on {ask['exchange']} at {ask['price']} | Sell on {bid['exchange']} at {bid['price']} | Size: {depth_info} | Current time: {current_time}{prices_info}")
+            hot_log("opportunity", "Arbitrage opportunity! Profit: %.2f USDT | Buy on %s at %s | Sell on %s at %s | Size: %s",
+                    profit, ask['exchange'], ask['price'], bid['exchange'], bid['price'], depth_info)
+        except Exception as e:
+            # One bad evaluation must not kill the detector task and, with it, the bot
+            logger.exception(f"{watcher.symbol} Error evaluating opportunities: {e}")
+            episode = _end_episode(watcher.symbol, episode, time.time())
+        finally:
+            if tick_time is not None:
+                watcher.latency.record(time.perf_counter() - tick_time)
+                watcher.evaluation.record(time.perf_counter() - evaluation_start)
+                watcher.venue_latency.evaluated(time.time())
+            if time.time() - last_report >= LATENCY_REPORT_INTERVAL:
+                logger.info(f"{watcher.symbol} {watcher.latency.format()} | {watcher.evaluation.format()} | {watcher.loop_lag.format()} | {watcher.publisher.flush_latency.format()}")
+                logger.info(f"{watcher.symbol} {watcher.venue_latency.format()}")
+                watcher.venue_latency.rotate()
+                watcher.latency.reset()
+                watcher.evaluation.reset()
+                watcher.loop_lag.reset()
+                watcher.publisher.flush_latency.reset()
+                last_report = time.time()
+
 
-                logger.info(f"{watcher.symbol} Arbitrage opportunity! Profit: {profit:.2f} USDT | Buy on {ask['exchange']} at {ask['price']} | Sell on {bid['exchange']} at {bid['price']} | Current time: {current_time} | Prices: {json.dumps(watcher.prices)}")
-                print(f"Arbitrage opportunity! Profit: {profit:.2f} USDT")
-                print(f"Buy on {ask['exchange']} at {ask['price']} | Sell on {bid['exchange']} at {bid['price']}")
-                print(json.dumps(watcher.prices, indent=2))
-        await asyncio.sleep(0.5)  # Sleep for X seconds to avoid busy waiting
+# Order book listener per exchange, called as listener(watcher, symbol=exchange_symbols(crypto)[exchange], crypto=crypto)
+LISTENERS = {
+    'coinbase': listen_coinbase_order_book,
+    'binance': listen_binance_order_book,
+    'bybit': listen_bybit_order_book,
+    'kraken': listen_kraken_order_book,
+    'kucoin': listen_kucoin_order_book,
+}
+
+
+def exchange_symbols(symbol):
+    """Símbolo del par {symbol}/USD(T) en el formato de cada exchange"""
+    return {
+        'coinbase': f"{symbol}-USD",
+        'binance': f"{symbol.lower()}usdt",
+        'bybit': f"{symbol}USDT",
+        'kraken': [f"{symbol}/USDT"],
+        'kucoin': f"{symbol}-USDT"
+    }
 
 
 async def main():
     try:
-        symbols = {
-            symbol: {
-                'coinbase': f"{symbol}-USD",
-                'binance': f"{symbol.lower()}usdt",
-                'bybit': f"{symbol}USDT",
-                'kraken': [f"{symbol}/USDT"],
-                'kucoin': f"{symbol}-USDT"
-            }
-        }
+        symbols = {symbol: exchange_symbols(symbol)}
         tasks = []
         for sym_key, config in symbols.items():
             watcher = LivePriceWatcher(sym_key)
@@ -229,8 +347,16 @@ async def main():
                 # listen_bybit_order_book(watcher, symbol=config['bybit'], crypto=sym_key),
                 # listen_kraken_order_book(watcher, symbol=config['kraken'], crypto=sim_key),
                 # listen_kucoin_order_book(watcher, symbol=config['kucoin'], crypto=sym_key),
-                check_opportunity_loop(watcher, taker_fee=0.0006)
+                check_opportunity_loop(watcher),
+                watcher.publisher.run(),
+                watcher.tick_stream.run(),
+                watcher.opportunities.run(),
+                monitor_loop_lag(watcher.loop_lag, LOOP_LAG_INTERVAL)
             ])
+            if watcher.tick_store is not None:
+                tasks.append(watcher.tick_store.run())
+            if METRICS_PORT:
+                tasks.append(MetricsServer(watcher).run())
     
         await asyncio.gather(*tasks)
 
@@ -0,0 +1,272 @@
+import asyncio
+import bisect
+import math
+import time
+from collections import deque
+from itertools import accumulate
+
+
+def _pick(ordered, p):
+    return ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)]
+
+
+class LatencyRecorder:
+    """Ventana de las últimas N latencias (segundos) con percentiles bajo demanda.
+
+    record() es O(1) y no asigna más allá de la ventana, así que se puede llamar
+    en cada decisión del detector. Además cada muestra va a `histogram`, que
+    reset() no borra: cubre todo el proceso y es lo que exporta /metrics.
+    """
+
+    def __init__(self, name, window=10000):
+        self.name = name
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.histogram = LatencyHistogram()
+
+    def record(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+        self.histogram.record(seconds)
+
+    def reset(self):
+        self.samples.clear()
+        self.count = 0
+
+    def percentile(self, p):
+        return _pick(sorted(self.samples), p) if self.samples else None
+
+    def summary(self):
+        """{count, p50, p99, max} en milisegundos; None si no hay muestras"""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return {'count': self.count, 'p50': _pick(ordered, 50) * 1000, 'p99': _pick(ordered, 99) * 1000, 'max': ordered[-1] * 1000}
+
+    def format(self):
+        stats = self.summary()
+        if stats is None:
+            return f"{self.name}: no samples"
+        return f"{self.name}: n={stats['count']} p50={stats['p50']:.3f}ms p99={stats['p99']:.3f}ms max={stats['max']:.3f}ms"
+
+
+async def monitor_loop_lag(recorder, interval=0.1):
+    """Mide cuánto tarda el event loop en despertar un sleep(interval) respecto a lo pedido.
+
+    Cualquier llamada bloqueante en el loop (I/O síncrono, cálculos largos)
+    aparece como lag en el recorder.
+    """
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        recorder.record(max(time.perf_counter() - start - interval, 0.0))
+
+
+# Log-linear buckets as in HdrHistogram: exact up to 2**HISTOGRAM_SUB_BITS us, then that many buckets
+# per power of two (under 1.6% relative error), up to 2**HISTOGRAM_MAX_BITS us (~19 h)
+HISTOGRAM_SUB_BITS = 6
+HISTOGRAM_MAX_BITS = 36
+HISTOGRAM_BUCKETS = (HISTOGRAM_MAX_BITS - HISTOGRAM_SUB_BITS + 1) << HISTOGRAM_SUB_BITS
+
+
+def _bucket(micros):
+    shift = micros.bit_length() - HISTOGRAM_SUB_BITS - 1
+    if shift <= 0:
+        return micros
+    return min((shift << HISTOGRAM_SUB_BITS) + (micros >> shift), HISTOGRAM_BUCKETS - 1)
+
+
+def _bucket_value(index):
+    """Mayor valor (us) que cae en el bucket"""
+    shift = max((index >> HISTOGRAM_SUB_BITS) - 1, 0)
+    return ((index - (shift << HISTOGRAM_SUB_BITS)) << shift) + (1 << shift) - 1
+
+
+class LatencyHistogram:
+    """Histograma de latencias (segundos) con buckets log-lineales en microsegundos, al estilo HdrHistogram.
+
+    Memoria acotada (solo se guardan los buckets no vacíos), record() en O(1) y
+    percentiles sobre todas las muestras, no solo una ventana. Dos histogramas
+    se suman con merge(). Las latencias negativas (relojes de exchange
+    adelantados) cuentan como 0 y se cuentan aparte en below_zero.
+    """
+
+    def __init__(self):
+        self.counts = {}  # {bucket index: samples}
+        self.count = 0
+        self.sum = 0.0  # exact, negatives counted as 0
+        self.max = 0.0
+        self.below_zero = 0
+
+    def record(self, seconds):
+        if seconds < 0:
+            self.below_zero += 1
+            seconds = 0.0
+        elif seconds > self.max:
+            self.max = seconds
+        index = _bucket(int(seconds * 1e6))
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.sum += seconds
+
+    def merge(self, other):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+        self.below_zero += other.below_zero
+        return self
+
+    def copy(self):
+        histogram = LatencyHistogram()
+        histogram.counts = dict(self.counts)
+        histogram.count, histogram.sum, histogram.max, histogram.below_zero = self.count, self.sum, self.max, self.below_zero
+        return histogram
+
+    def reset(self):
+        self.counts = {}
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.below_zero = 0
+
+    def percentiles(self, ps):
+        """Latencias (segundos) de los percentiles `ps`"""
+        if not self.count:
+            return [None] * len(ps)
+        indices = sorted(self.counts)
+        cumulative = list(accumulate(self.counts[index] for index in indices))
+        return [min(_bucket_value(indices[bisect.bisect_left(cumulative, max(1, math.ceil(self.count * p / 100)))]) / 1e6,
+                    self.max) for p in ps]
+
+    def percentile(self, p):
+        return self.percentiles((p,))[0]
+
+    def cumulative(self, bounds):
+        """Muestras <= cada límite (segundos, ascendentes), como los buckets `le` de Prometheus.
+
+        Un límite cuenta entero el bucket log-lineal en el que cae, así que el
+        error es el de los buckets (<1.6%).
+        """
+        indices = sorted(self.counts)
+        cumulative = list(accumulate(self.counts[index] for index in indices))
+        counts = []
+        for bound in bounds:
+            position = bisect.bisect_right(indices, _bucket(int(bound * 1e6)))
+            counts.append(cumulative[position - 1] if position else 0)
+        return counts
+
+    def summary(self):
+        """{count, p50, p90, p99, p999, max, below_zero} en milisegundos; None si no hay muestras"""
+        if not self.count:
+            return None
+        stats = {'count': self.count}
+        for name, value in zip(('p50', 'p90', 'p99', 'p999'), self.percentiles((50, 90, 99, 99.9))):
+            stats[name] = value * 1000
+        stats['max'] = self.max * 1000
+        stats['below_zero'] = self.below_zero
+        return stats
+
+    def to_dict(self):
+        """Forma compacta serializable: índices de los buckets no vacíos y sus cuentas, en orden"""
+        indices = sorted(self.counts)
+        return {'buckets': indices, 'counts': [self.counts[index] for index in indices],
+                'sum': self.sum, 'max': self.max, 'below_zero': self.below_zero}
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls()
+        histogram.counts = dict(zip(data['buckets'], data['counts']))
+        histogram.count = sum(data['counts'])
+        histogram.sum = data.get('sum', 0.0)
+        histogram.max = data['max']
+        histogram.below_zero = data['below_zero']
+        return histogram
+
+
+def _merge_into(target, histograms):
+    """Suma {exchange: {stage: LatencyHistogram}} en target, copiando los que target aún no tiene"""
+    for exchange, stages in histograms.items():
+        merged = target.get(exchange)
+        if merged is None:
+            target[exchange] = {stage: histogram.copy() for stage, histogram in stages.items()}
+            continue
+        for stage, histogram in stages.items():
+            merged[stage].merge(histogram)
+    return target
+
+
+# Stages of a venue update: exchange event -> local receive -> book applied -> detector evaluated
+LATENCY_STAGES = ('feed', 'apply', 'detect', 'total')
+
+
+class VenueLatency:
+    """Histogramas de latencia por venue y etapa de cada actualización de BBO.
+
+    feed = recepción local - hora del evento en el exchange (red + desfase de
+    relojes), apply = libro aplicado - recepción, detect = evaluación del
+    detector - libro aplicado y total = evaluación - evento. Para detect/total
+    cuenta la actualización más antigua de cada venue que el detector aún no
+    había evaluado. rotate() abre una ventana nueva; snapshot() suma la actual y
+    la anterior, así siempre cubre entre una y dos ventanas. Las ventanas
+    cerradas se acumulan en `totals`, y cumulative() cubre todo el proceso.
+    """
+
+    def __init__(self):
+        self.current = {}
+        self.previous = {}
+        self.totals = {}  # every window closed by rotate()
+        self._pending = {}  # {exchange: (event_time, applied)} of its oldest update not yet evaluated
+
+    def _histograms(self, exchange):
+        histograms = self.current.get(exchange)
+        if histograms is None:
+            histograms = self.current[exchange] = {stage: LatencyHistogram() for stage in LATENCY_STAGES}
+        return histograms
+
+    def update(self, exchange, event_time, received, applied):
+        """Tiempos epoch (segundos) de una actualización; event_time/received None si el listener no los da"""
+        histograms = self._histograms(exchange)
+        if received is not None:
+            if event_time is not None:
+                histograms['feed'].record(received - event_time)
+            histograms['apply'].record(applied - received)
+        if exchange not in self._pending:
+            self._pending[exchange] = (event_time, applied)
+
+    def evaluated(self, decided):
+        """El detector terminó de evaluar en `decided` (epoch): cierra las actualizaciones pendientes"""
+        for exchange, (event_time, applied) in self._pending.items():
+            histograms = self._histograms(exchange)
+            histograms['detect'].record(decided - applied)
+            if event_time is not None:
+                histograms['total'].record(decided - event_time)
+        self._pending.clear()
+
+    def rotate(self):
+        _merge_into(self.totals, self.current)
+        self.previous, self.current = self.current, {}
+
+    def merged(self):
+        """{exchange: {stage: LatencyHistogram}} de la ventana actual más la anterior"""
+        return _merge_into(_merge_into({}, self.previous), self.current)
+
+    def cumulative(self):
+        """{exchange: {stage: LatencyHistogram}} con todas las muestras desde el arranque"""
+        return _merge_into(_merge_into({}, self.totals), self.current)
+
+    def snapshot(self):
+        """{exchange: {stage: summary() + histograma compacto}} listo para JSON"""
+        return {exchange: {stage: {**histogram.summary(), 'histogram': histogram.to_dict()}
+                           for stage, histogram in histograms.items() if histogram.count}
+                for exchange, histograms in self.merged().items()}
+
+    def format(self):
+        parts = []
+        for exchange, histograms in sorted(self.merged().items()):
+            stages = [f"{stage} p50={histogram.percentile(50) * 1000:.1f}ms p99={histogram.percentile(99) * 1000:.1f}ms"
+                      for stage, histogram in histograms.items() if histogram.count]
+            if stages:
+                parts.append(f"{exchange}: {', '.join(stages)}")
+        return "venue_latency: " + ("; ".join(parts) if parts else "no samples")
@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import time
+
+from aiohttp import web
+
+from config.settings import METRICS_HOST, METRICS_PORT, METRICS_LATENCY_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+
+class Exposition:
+    """Texto en el formato de exposición de Prometheus (text/plain 0.0.4)"""
+
+    def __init__(self, labels=None):
+        self.labels = labels or {}  # added to every sample, e.g. {'symbol': 'BTC'}
+        self.lines = []
+
+    def family(self, name, kind, help_text, samples):
+        """samples: [(labels, value)]; los valores None se omiten"""
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            if value is not None:
+                self.lines.append(f"{name}{_format_labels({**self.labels, **labels})} {value}")
+
+    def histogram(self, name, help_text, series, bounds=METRICS_LATENCY_BUCKETS):
+        """series: [(labels, LatencyHistogram)] acumulados desde el arranque; buckets `le` más _sum y _count"""
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} histogram")
+        for labels, histogram in series:
+            labels = {**self.labels, **labels}
+            for bound, count in zip(bounds, histogram.cumulative(bounds)):
+                self.lines.append(f"{name}_bucket{_format_labels({**labels, 'le': repr(bound)})} {count}")
+            self.lines.append(f"{name}_bucket{_format_labels({**labels, 'le': '+Inf'})} {histogram.count}")
+            self.lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+            self.lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+
+    def render(self):
+        return "\n".join(self.lines) + "\n"
+
+
+def _venue_samples(counter):
+    return [({'venue': venue}, count) for venue, count in sorted(counter.items())]
+
+
+def render_metrics(watcher):
+    """Métricas de un LivePriceWatcher en formato Prometheus; solo lee contadores ya mantenidos en memoria"""
+    out = Exposition({'symbol': watcher.symbol})
+    now = time.time()
+    out.family("arb_messages_total", "counter", "Websocket frames received per venue", _venue_samples(watcher.messages))
+    out.family("arb_bbo_updates_total", "counter", "Best bid/ask changes per venue", _venue_samples(watcher.bbo_updates))
+    out.family("arb_ws_connects_total", "counter", "Websocket connections opened per venue (reconnects = connects - 1)",
+               _venue_samples(watcher.connects))
+    out.family("arb_disconnects_total", "counter", "Transitions of a venue to disconnected", _venue_samples(watcher.disconnects))
+    out.family("arb_resyncs_total", "counter", "Order book resyncs after a sequence gap or checksum mismatch",
+               _venue_samples(watcher.resyncs))
+    out.family("arb_venue_up", "gauge", "1 if the venue is connected", [
+        ({'venue': venue}, int(venue in watcher.connected)) for venue in sorted(watcher.prices)])
+    out.family("arb_bbo_age_seconds", "gauge", "Seconds since the venue's last best bid/ask change", [
+        ({'venue': venue}, now - data['timestamp']) for venue, data in sorted(watcher.prices.items())
+        if data.get('timestamp') is not None])
+    out.family("arb_book_levels", "gauge", "Price levels in the local order book", [
+        ({'venue': venue, 'side': side}, len(levels)) for venue, book in sorted(watcher.books.items())
+        for side, levels in (('bid', book.bids), ('ask', book.asks))])
+
+    out.family("arb_opportunities_total", "counter", "Opportunities recorded by the detector",
+               [({}, watcher.opportunities.recorded)])
+    buffers = {'tick_stream': watcher.tick_stream, 'opportunities': watcher.opportunities,
+               'recorder': watcher.recorder, 'tick_store': watcher.tick_store}
+    out.family("arb_dropped_total", "counter", "Rows dropped because a write buffer was full", [
+        ({'buffer': name}, buffer.dropped) for name, buffer in buffers.items() if buffer is not None])
+
+    # Cumulative since start: the detector's periodic report resets only its own windows
+    out.histogram("arb_tick_to_decision_seconds", "Oldest pending BBO change to detector decision",
+                  [({}, watcher.latency.histogram)])
+    out.histogram("arb_detector_evaluation_seconds", "Time spent by the detector evaluating one change",
+                  [({}, watcher.evaluation.histogram)])
+    out.histogram("arb_event_loop_lag_seconds", "Event loop wake-up delay", [({}, watcher.loop_lag.histogram)])
+    out.histogram("arb_status_flush_seconds", "Redis status flush latency", [({}, watcher.publisher.flush_latency.histogram)])
+    out.histogram("arb_venue_latency_seconds",
+                  "Per-venue latency by stage: feed (event to receive), apply, detect, total (event to decision)",
+                  [({'venue': venue, 'stage': stage}, histogram)
+                   for venue, histograms in sorted(watcher.venue_latency.cumulative().items())
+                   for stage, histogram in histograms.items() if histogram.count])
+    return out.render()
+
+
+class MetricsServer:
+    """Sirve GET /metrics con aiohttp en el mismo event loop que los listeners.
+
+    Cada scrape solo formatea contadores que el bot ya mantiene, así que no
+    toca Redis ni los logs. Si el puerto está ocupado se registra el error y
+    el bot sigue sin endpoint.
+    """
+
+    def __init__(self, watcher, host=METRICS_HOST, port=METRICS_PORT):
+        self.watcher = watcher
+        self.host = host
+        self.port = port
+
+    async def handle(self, request):
+        return web.Response(body=render_metrics(self.watcher).encode(), headers={'Content-Type': CONTENT_TYPE})
+
+    async def start(self):
+        """Arranca el servidor y devuelve su AppRunner (runner.addresses tiene el puerto real)"""
+        app = web.Application()
+        app.router.add_get('/metrics', self.handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, self.host, self.port).start()
+        except OSError:
+            await runner.cleanup()
+            raise
+        return runner
+
+    async def run(self):
+        try:
+            runner = await self.start()
+        except OSError as e:
+            logger.error(f"Metrics endpoint disabled, cannot listen on {self.host}:{self.port}: {e}")
+            return
+        logger.info(f"Metrics endpoint for {self.watcher.symbol} on http://{self.host}:{self.port}/metrics")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await runner.cleanup()
@@ -0,0 +1,207 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from config.settings import OPPORTUNITY_DB_PATH, OPPORTUNITY_FLUSH_INTERVAL, OPPORTUNITY_BUFFER
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = (
+    'ts', 'symbol', 'buy_exchange', 'buy_price', 'sell_exchange', 'sell_price', 'spread_pct', 'profit',
+    'buy_fee', 'sell_fee', 'size', 'buy_vwap', 'sell_vwap', 'executable_profit', 'latency_ms'
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS opportunities (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    symbol TEXT NOT NULL,
+    buy_exchange TEXT NOT NULL,
+    buy_price REAL NOT NULL,
+    sell_exchange TEXT NOT NULL,
+    sell_price REAL NOT NULL,
+    spread_pct REAL NOT NULL,
+    profit REAL NOT NULL,
+    buy_fee REAL,
+    sell_fee REAL,
+    size REAL,
+    buy_vwap REAL,
+    sell_vwap REAL,
+    executable_profit REAL,
+    latency_ms REAL
+);
+CREATE INDEX IF NOT EXISTS idx_opportunities_ts ON opportunities (ts);
+CREATE INDEX IF NOT EXISTS idx_opportunities_symbol_ts ON opportunities (symbol, ts, profit);
+CREATE INDEX IF NOT EXISTS idx_opportunities_pair_ts ON opportunities (buy_exchange, sell_exchange, ts);
+
+-- Hourly rollup kept in step by a trigger, so aggregates over days read a few hundred rows
+CREATE TABLE IF NOT EXISTS opportunity_hourly (
+    hour INTEGER NOT NULL,
+    symbol TEXT NOT NULL,
+    buy_exchange TEXT NOT NULL,
+    sell_exchange TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    total_profit REAL NOT NULL,
+    best_profit REAL NOT NULL,
+    total_latency_ms REAL NOT NULL,
+    latency_count INTEGER NOT NULL,
+    PRIMARY KEY (hour, symbol, buy_exchange, sell_exchange)
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS opportunities_rollup AFTER INSERT ON opportunities BEGIN
+    INSERT INTO opportunity_hourly VALUES (
+        CAST(NEW.ts / 3600 AS INTEGER), NEW.symbol, NEW.buy_exchange, NEW.sell_exchange,
+        1, NEW.profit, NEW.profit, COALESCE(NEW.latency_ms, 0), NEW.latency_ms IS NOT NULL
+    )
+    ON CONFLICT DO UPDATE SET
+        count = count + 1,
+        total_profit = total_profit + excluded.total_profit,
+        best_profit = MAX(best_profit, excluded.best_profit),
+        total_latency_ms = total_latency_ms + excluded.total_latency_ms,
+        latency_count = latency_count + excluded.latency_count;
+END;
+"""
+
+INSERT = f"INSERT INTO opportunities ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+
+
+def open_db(path):
+    """Conexión SQLite en modo WAL con el esquema creado; varios procesos pueden escribir y leer a la vez"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def format_ts(ts):
+    # Same format as the log lines the dashboard used to parse
+    return datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S,%f')[:-3]
+
+
+class OpportunityWriter:
+    """Registra cada oportunidad detectada como una fila en SQLite.
+
+    record() solo encola la fila en memoria; run() las escribe cada `interval`
+    segundos con un executemany en una transacción, en un hilo aparte
+    (asyncio.to_thread) para no bloquear el event loop. Si la escritura falla
+    el lote vuelve a la cola, acotada a `buffer` filas.
+    """
+
+    def __init__(self, path=OPPORTUNITY_DB_PATH, interval=OPPORTUNITY_FLUSH_INTERVAL, buffer=OPPORTUNITY_BUFFER):
+        self.path = path
+        self.interval = interval
+        self.pending = deque(maxlen=buffer)
+        self.conn = None
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+
+    def record(self, symbol, buy_exchange, buy_price, sell_exchange, sell_price, profit,
+               buy_fee=None, sell_fee=None, executable=None, latency=None, ts=None):
+        self.recorded += 1
+        if len(self.pending) == self.pending.maxlen:
+            self.dropped += 1
+        executable = executable or {}
+        self.pending.append((
+            time.time() if ts is None else ts, symbol, buy_exchange, buy_price, sell_exchange, sell_price,
+            (sell_price - buy_price) / buy_price * 100, profit, buy_fee, sell_fee,
+            executable.get('size'), executable.get('buy_vwap'), executable.get('sell_vwap'), executable.get('profit'),
+            None if latency is None else latency * 1000
+        ))
+
+    def _write(self, batch):
+        if self.conn is None:
+            self.conn = open_db(self.path)
+        with self.conn:
+            self.conn.executemany(INSERT, batch)
+
+    async def flush(self):
+        if not self.pending or not self.path:
+            return
+        batch = list(self.pending)
+        self.pending.clear()
+        try:
+            await asyncio.to_thread(self._write, batch)
+            self.written += len(batch)
+        except Exception as e:
+            logger.error(f"Error writing opportunities to {self.path}: {e}")
+            self.pending.extendleft(reversed(batch))
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+
+class OpportunityStore:
+    """Consultas SQL sobre las oportunidades registradas, para el dashboard"""
+
+    def __init__(self, path=OPPORTUNITY_DB_PATH):
+        self.path = path
+        self.conn = open_db(path)
+        self.conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def _window(self, since, symbol=None):
+        """Filas agregables desde `since`: horas completas del rollup más las filas crudas de la hora inicial parcial"""
+        first_hour = -(-since // 3600)
+        symbol_filter = "AND symbol = ?" if symbol else ""
+        sql = (
+            "SELECT symbol, buy_exchange, sell_exchange, count, total_profit, best_profit, total_latency_ms, latency_count "
+            f"FROM opportunity_hourly WHERE hour >= ? {symbol_filter} "
+            "UNION ALL "
+            "SELECT symbol, buy_exchange, sell_exchange, 1, profit, profit, COALESCE(latency_ms, 0), latency_ms IS NOT NULL "
+            f"FROM opportunities WHERE ts >= ? AND ts < ? {symbol_filter}"
+        )
+        params = [first_hour] + ([symbol] if symbol else []) + [since, first_hour * 3600] + ([symbol] if symbol else [])
+        return sql, params
+
+    def summary(self, since):
+        """{symbol: {count, total_profit, best_profit}} desde el epoch `since`"""
+        window, params = self._window(since)
+        rows = self._query(
+            "SELECT symbol, SUM(count) AS count, SUM(total_profit) AS total_profit, MAX(best_profit) AS best_profit "
+            f"FROM ({window}) GROUP BY symbol", params)
+        return {row.pop('symbol'): row for row in rows}
+
+    def by_pair(self, since, symbol=None):
+        """Agregados por (buy_exchange, sell_exchange), de más a menos oportunidades"""
+        window, params = self._window(since, symbol)
+        return self._query(
+            "SELECT buy_exchange, sell_exchange, SUM(count) AS count, SUM(total_profit) AS total_profit, "
+            "MAX(best_profit) AS best_profit, SUM(total_latency_ms) / NULLIF(SUM(latency_count), 0) AS avg_latency_ms "
+            f"FROM ({window}) GROUP BY buy_exchange, sell_exchange ORDER BY count DESC", params)
+
+    def history(self, symbol=None, buy_exchange=None, sell_exchange=None, since=None, until=None, limit=10):
+        """Oportunidades filtradas, de más nueva a más antigua, en el formato de recent_opportunities"""
+        conditions, params = [], []
+        for column, value in (('symbol', symbol), ('buy_exchange', buy_exchange), ('sell_exchange', sell_exchange)):
+            if value:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            conditions.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("ts < ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self._query(f"SELECT {', '.join(COLUMNS)} FROM opportunities {where} ORDER BY ts DESC LIMIT ?",
+                           params + [limit])
+        for row in rows:
+            row['timestamp'] = format_ts(row.pop('ts'))
+            row['spread_pct'] = round(row['spread_pct'], 4)
+        return rows
+
+    def close(self):
+        self.conn.close()
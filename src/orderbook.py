@@ -0,0 +1,164 @@
+from sortedcontainers import SortedDict
+
+
+_POW10 = [10 ** i for i in range(19)]
+
+
+def to_units(value, decimals):
+    """Convierte un decimal en string ('65000.10') a entero escalado sin pasar por float"""
+    whole, _, frac = value.partition('.')
+    pad = decimals - len(frac)
+    if pad >= 0:
+        return int(whole + frac) * _POW10[pad]
+    if frac[decimals:].strip('0'):
+        raise ValueError(f"{value} has more than {decimals} decimals")
+    return int(whole + frac[:decimals])
+
+
+def from_units(units, decimals):
+    """Inverso de to_units: entero escalado a string con exactamente `decimals` decimales"""
+    if not decimals:
+        return str(units)
+    s = str(units).rjust(decimals + 1, '0')
+    return f"{s[:-decimals]}.{s[-decimals:]}"
+
+
+def count_decimals(values):
+    """Máximo número de decimales en una serie de strings numéricos"""
+    return max((len(v.partition('.')[2]) for v in values), default=0)
+
+
+class OrderBook:
+    """Libro de órdenes local ordenado por precio.
+
+    Precios y cantidades se guardan como enteros escalados (ticks/lots) según
+    los decimales del mercado, así que comparar niveles y detectar cantidad
+    cero son operaciones enteras. Cada lado es un SortedDict: aplicar un nivel
+    cuesta O(log n) y el mejor bid/ask se lee en O(1).
+
+    Si no se indican decimales se infieren del primer snapshot cargado, lo que
+    reproduce exactamente el formato de exchanges que rellenan con ceros (Kraken).
+    Un valor con más decimales que los del libro no se redondea: widen() sube la
+    precisión y reescala los niveles existentes, una vez por mercado.
+
+    Con max_depth el libro queda acotado: trim() expulsa los peores niveles que
+    sobran de cada lado en O(log n) por nivel. Se llama una vez aplicado el
+    mensaje completo, porque un mensaje puede insertar un nivel antes del
+    borrado que le hace sitio.
+    """
+
+    def __init__(self, price_decimals=None, qty_decimals=None, max_depth=None):
+        self.price_decimals = price_decimals
+        self.qty_decimals = qty_decimals
+        self.max_depth = max_depth
+        # Bids keyed by negative ticks so index 0 is always the best level on both sides
+        self.bids = SortedDict()
+        self.asks = SortedDict()
+
+    def __len__(self):
+        return len(self.bids) + len(self.asks)
+
+    def clear(self):
+        self.bids.clear()
+        self.asks.clear()
+
+    def load(self, bids, asks):
+        """Reemplaza el libro con un snapshot de niveles (price, qty, ...)"""
+        self.clear()
+        if self.price_decimals is None or self.qty_decimals is None:
+            bids, asks = list(bids), list(asks)
+            levels = bids + asks
+            if self.price_decimals is None:
+                self.price_decimals = count_decimals(str(level[0]) for level in levels)
+            if self.qty_decimals is None:
+                self.qty_decimals = count_decimals(str(level[1]) for level in levels)
+        self.update_bids(bids)
+        self.update_asks(asks)
+        self.trim()
+
+    def set_bid(self, price, qty):
+        try:
+            lots = to_units(qty, self.qty_decimals)
+            ticks = to_units(price, self.price_decimals)
+        except ValueError:
+            if not self.widen(count_decimals((price,)), count_decimals((qty,))):
+                raise
+            return self.set_bid(price, qty)
+        if lots == 0:
+            self.bids.pop(-ticks, None)
+        else:
+            self.bids[-ticks] = lots
+
+    def set_ask(self, price, qty):
+        try:
+            lots = to_units(qty, self.qty_decimals)
+            ticks = to_units(price, self.price_decimals)
+        except ValueError:
+            if not self.widen(count_decimals((price,)), count_decimals((qty,))):
+                raise
+            return self.set_ask(price, qty)
+        if lots == 0:
+            self.asks.pop(ticks, None)
+        else:
+            self.asks[ticks] = lots
+
+    def widen(self, price_decimals, qty_decimals):
+        """Sube los decimales del libro reescalando sus niveles; False si ya alcanzaban"""
+        price_shift = max(price_decimals - self.price_decimals, 0)
+        qty_shift = max(qty_decimals - self.qty_decimals, 0)
+        if not price_shift and not qty_shift:
+            return False
+        price_factor, qty_factor = _POW10[price_shift], _POW10[qty_shift]
+        # Rebuilt in place: other components keep references to the side dicts
+        for side in (self.bids, self.asks):
+            levels = [(ticks * price_factor, lots * qty_factor) for ticks, lots in side.items()]
+            side.clear()
+            side.update(levels)
+        self.price_decimals += price_shift
+        self.qty_decimals += qty_shift
+        return True
+
+    def trim(self):
+        """Recorta cada lado a max_depth niveles quitando los peores"""
+        if self.max_depth is None:
+            return
+        while len(self.bids) > self.max_depth:
+            self.bids.popitem(-1)
+        while len(self.asks) > self.max_depth:
+            self.asks.popitem(-1)
+
+    def update_bids(self, levels):
+        for level in levels:
+            self.set_bid(level[0], level[1])
+
+    def update_asks(self, levels):
+        for level in levels:
+            self.set_ask(level[0], level[1])
+
+    def best_bid_ticks(self):
+        if not self.bids:
+            return None
+        return -self.bids.peekitem(0)[0]
+
+    def best_ask_ticks(self):
+        if not self.asks:
+            return None
+        return self.asks.peekitem(0)[0]
+
+    def best_bid(self):
+        ticks = self.best_bid_ticks()
+        return None if ticks is None else ticks / 10 ** self.price_decimals
+
+    def best_ask(self):
+        ticks = self.best_ask_ticks()
+        return None if ticks is None else ticks / 10 ** self.price_decimals
+
+    def format_level(self, ticks, lots):
+        return from_units(ticks, self.price_decimals), from_units(lots, self.qty_decimals)
+
+    def top_bids(self, n):
+        """Devuelve los n mejores bids como [(price, qty), ...] en formato del exchange"""
+        return [self.format_level(-ticks, lots) for ticks, lots in self.bids.items()[:n]]
+
+    def top_asks(self, n):
+        return [self.format_level(ticks, lots) for ticks, lots in self.asks.items()[:n]]
@@ -0,0 +1,236 @@
+import atexit
+import gzip
+import json
+import logging
+import os
+import struct
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from config.settings import (
+    RECORD_DIR, RECORD_CODEC, RECORD_SEGMENT_BYTES, RECORD_SEGMENT_SECONDS, RECORD_QUEUE, RECORD_FLUSH_INTERVAL,
+    RECORD_BATCH_INTERVAL
+)
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+logger = logging.getLogger(__name__)
+
+# Record: receive time (ns), len(source), len(channel), len(payload), then the three byte strings
+HEADER = struct.Struct("<QHHI")
+SEGMENT_SUFFIX = {'zstd': '.frames.zst', 'lz4': '.frames.lz4', 'gzip': '.frames.gz'}
+
+
+def default_codec():
+    if zstandard is not None:
+        return 'zstd'
+    if lz4 is not None:
+        return 'lz4'
+    return 'gzip'
+
+
+def open_segment(path, codec):
+    """Archivo comprimido de solo escritura para un segmento"""
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=3).stream_writer(open(path, 'wb'), closefd=True)
+    if codec == 'lz4':
+        return lz4.frame.open(path, 'wb')
+    return gzip.open(path, 'wb', compresslevel=1)
+
+
+def _flush_segment(segment, codec):
+    # Push buffered data into a complete block so a crash loses at most one flush interval
+    if codec == 'zstd':
+        segment.flush(zstandard.FLUSH_BLOCK)
+    else:
+        segment.flush()
+
+
+def encode_frame(ts_ns, source, channel, payload):
+    if isinstance(payload, str):
+        payload = payload.encode()
+    elif not isinstance(payload, (bytes, bytearray)):
+        # Snapshot responses arrive already parsed; store them as JSON
+        payload = json.dumps(payload).encode()
+    source = source.encode()
+    channel = channel.encode()
+    return HEADER.pack(ts_ns, len(source), len(channel), len(payload)) + source + channel + payload
+
+
+class FrameRecorder:
+    """Graba cada frame crudo recibido por los listeners en segmentos comprimidos de solo append.
+
+    record() solo añade (ts_ns, source, channel, frame) a una cola acotada; si
+    está llena el frame se descarta y se cuenta en `dropped`, sin bloquear el
+    event loop. Un hilo vacía la cola cada `batch_interval` segundos y la
+    escribe de una vez con zstd (o lz4, o gzip si no hay ninguno instalado);
+    rota de segmento cada `segment_bytes` sin comprimir o cada
+    `segment_seconds`. Los segmentos se leen con read_frames().
+    """
+
+    def __init__(self, directory=RECORD_DIR, prefix="session", codec=RECORD_CODEC, segment_bytes=RECORD_SEGMENT_BYTES,
+                 segment_seconds=RECORD_SEGMENT_SECONDS, queue_size=RECORD_QUEUE, flush_interval=RECORD_FLUSH_INTERVAL,
+                 batch_interval=RECORD_BATCH_INTERVAL):
+        self.directory = directory
+        self.prefix = prefix
+        self.codec = codec or default_codec()
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self.flush_interval = flush_interval
+        self.batch_interval = batch_interval
+        self.queue_size = queue_size
+        # deque.append/popleft are atomic, so the loop side takes no lock and never wakes the writer
+        self.queue = deque()
+        self.recorded = 0
+        self.dropped = 0
+        self.segments = []
+        self._segment = None
+        self._closing = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._closing.clear()
+            self._thread = threading.Thread(target=self._run, name="frame-recorder", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+        return self
+
+    def record(self, source, channel, frame):
+        if len(self.queue) >= self.queue_size:
+            self.dropped += 1
+            return
+        self.queue.append((time.time_ns(), source, channel, frame))
+
+    def close(self):
+        """Escribe lo pendiente y cierra el segmento actual"""
+        if self._thread is not None:
+            self._closing.set()
+            self._thread.join()
+            self._thread = None
+
+    def _open_next(self):
+        if self._segment is not None:
+            self._segment.close()
+        name = f"{self.prefix}-{datetime.now():%Y%m%d-%H%M%S}-{len(self.segments):05d}{SEGMENT_SUFFIX[self.codec]}"
+        path = os.path.join(self.directory, name)
+        self.segments.append(path)
+        self._segment = open_segment(path, self.codec)
+        self._segment_size = 0
+        self._segment_start = time.monotonic()
+
+    def _drain(self):
+        batch = []
+        popleft = self.queue.popleft
+        for _ in range(len(self.queue)):
+            batch.append(popleft())
+        return batch
+
+    def _run(self):
+        self._open_next()
+        last_flush = time.monotonic()
+        while True:
+            # Wake every batch_interval and write everything queued in one compressor call
+            closing = self._closing.wait(self.batch_interval)
+            batch = self._drain()
+            try:
+                if batch:
+                    data = b"".join([encode_frame(*frame) for frame in batch])
+                    self._segment.write(data)
+                    self._segment_size += len(data)
+                    self.recorded += len(batch)
+                now = time.monotonic()
+                if closing:
+                    self._segment.close()
+                    self._segment = None
+                    return
+                if self._segment_size >= self.segment_bytes or now - self._segment_start >= self.segment_seconds:
+                    self._open_next()
+                    last_flush = now
+                elif now - last_flush >= self.flush_interval:
+                    _flush_segment(self._segment, self.codec)
+                    last_flush = now
+            except Exception as e:
+                logger.error(f"Frame recorder write error: {e}")
+
+
+class RecordingWebSocket:
+    """Envuelve una conexión websockets y graba cada frame que devuelve recv()"""
+
+    def __init__(self, ws, recorder, source, channel="ws"):
+        self._ws = ws
+        self._recorder = recorder
+        self._source = source
+        self._channel = channel
+
+    async def recv(self):
+        frame = await self._ws.recv()
+        self._recorder.record(self._source, self._channel, frame)
+        return frame
+
+    def __getattr__(self, name):
+        return getattr(self._ws, name)
+
+
+def record_socket(ws, recorder, source):
+    """ws tal cual si no se graba, o envuelto para que recv() grabe cada frame"""
+    return ws if recorder is None else RecordingWebSocket(ws, recorder, source)
+
+
+def record_snapshot(recorder, source, snapshot):
+    if recorder is not None:
+        recorder.record(source, "snapshot", snapshot)
+
+
+def open_capture(path):
+    """Abre un segmento para lectura según su extensión"""
+    if path.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError(f"zstandard is required to read {path}")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    if path.endswith('.lz4'):
+        if lz4 is None:
+            raise RuntimeError(f"lz4 is required to read {path}")
+        return lz4.frame.open(path, 'rb')
+    return gzip.open(path, 'rb')
+
+
+def read_frames(path):
+    """Genera (ts_ns, source, channel, payload bytes) de un segmento; tolera un último registro truncado"""
+    with open_capture(path) as f:
+        while True:
+            try:
+                header = f.read(HEADER.size)
+                if len(header) < HEADER.size:
+                    return
+                ts_ns, source_len, channel_len, payload_len = HEADER.unpack(header)
+                body = f.read(source_len + channel_len + payload_len)
+            except EOFError:
+                # Compressed stream cut short (process killed mid-segment)
+                return
+            if len(body) < source_len + channel_len + payload_len:
+                return
+            yield (ts_ns, body[:source_len].decode(), body[source_len:source_len + channel_len].decode(),
+                   body[source_len + channel_len:])
+
+
+def capture_segments(directory, prefix=None):
+    """Segmentos de un directorio en orden de grabación"""
+    names = sorted(name for name in os.listdir(directory)
+                   if name.endswith(tuple(SEGMENT_SUFFIX.values())) and (prefix is None or name.startswith(f"{prefix}-")))
+    return [os.path.join(directory, name) for name in names]
+
+
+def read_session(directory, prefix=None):
+    for path in capture_segments(directory, prefix):
+        yield from read_frames(path)
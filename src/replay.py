@@ -0,0 +1,290 @@
+"""Reproduce una sesión grabada por el FrameRecorder a través de los listeners y el detector reales.
+
+    python -m src.replay data/captures --symbol BTC [--prefix btc] [--exchanges binance,kucoin] [--speed 1.0]
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import sys
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import asynccontextmanager, contextmanager
+
+import websockets.exceptions
+
+from config.settings import REPLAY_PATIENCE
+from src.recorder import read_session
+
+logger = logging.getLogger(__name__)
+
+# Listener module per exchange and the REST snapshot fetchers it calls
+LISTENER_MODULES = {
+    'coinbase': ('src.live_price_adv_cb_ws', ()),
+    'binance': ('src.live_price_binance_ws', ('fetch_snapshot',)),
+    'bybit': ('src.live_price_bybit_ws', ()),
+    'kraken': ('src.live_price_kraken_ws', ()),
+    'kucoin': ('src.live_price_kucoin_ws', ('fetch_snapshot',)),
+}
+
+
+class Sequencer:
+    """Entrega los frames de websocket en el orden global en que se grabaron.
+
+    El recv() de cada exchange espera su turno. Si el listener que tiene el
+    turno no lo toma en `patience` segundos (dormido tras una desconexión,
+    esperando un snapshot), los demás siguen y se cuenta en out_of_order. El
+    orden dentro de cada exchange siempre se respeta.
+    """
+
+    def __init__(self, sources, patience=REPLAY_PATIENCE):
+        self.pending = defaultdict(deque)  # {source: global indices not yet delivered}
+        for index, source in enumerate(sources):
+            self.pending[source].append(index)
+        self.consumed = bytearray(len(sources))
+        self.cursor = 0
+        self.patience = patience
+        self.out_of_order = 0
+        self.condition = asyncio.Condition()
+        self.done = asyncio.Event()
+        if not sources:
+            self.done.set()
+
+    async def take(self, source):
+        """Índice global del siguiente frame de `source`, o None si ya no quedan"""
+        queue = self.pending[source]
+        async with self.condition:
+            if queue and self.cursor != queue[0]:
+                try:
+                    await asyncio.wait_for(self.condition.wait_for(lambda: not queue or self.cursor == queue[0]),
+                                           self.patience)
+                except asyncio.TimeoutError:
+                    self.out_of_order += 1
+            if not queue:
+                return None
+            index = queue.popleft()
+            self.consumed[index] = 1
+            while self.cursor < len(self.consumed) and self.consumed[self.cursor]:
+                self.cursor += 1
+            self.condition.notify_all()
+        if self.cursor == len(self.consumed):
+            self.done.set()
+        return index
+
+
+class ReplaySocket:
+    """Sustituto de una conexión websockets que devuelve los frames grabados de un exchange"""
+
+    def __init__(self, engine, source):
+        self.engine = engine
+        self.source = source
+
+    async def recv(self):
+        index = await self.engine.sequencer.take(self.source)
+        if index is None:
+            # Capture exhausted for this exchange: stay silent until the replay is torn down
+            self.engine.exhausted(self.source)
+            await asyncio.Future()
+        ts_ns, frame = self.engine.frames[index]
+        await self.engine.pace(ts_ns)
+        self.engine.clock_ns = ts_ns
+        self.engine.replayed[self.source] += 1
+        return frame
+
+    async def send(self, message):
+        pass
+
+    async def close(self):
+        pass
+
+
+class ReplayWebsockets:
+    """Sustituto del módulo websockets dentro de un listener: connect() abre un ReplaySocket"""
+
+    exceptions = websockets.exceptions
+
+    def __init__(self, engine, source):
+        self.engine = engine
+        self.source = source
+
+    @asynccontextmanager
+    async def connect(self, url, **kwargs):
+        self.engine.connects[self.source] += 1
+        yield self.engine.socket_class(self.engine, self.source)
+
+
+class ReplayEngine:
+    """Alimenta LivePriceWatcher con una sesión grabada usando los mismos listeners que main().
+
+    Parchea en cada módulo de listener `websockets` y los fetchers de snapshot
+    REST (más el token de KuCoin) para que lean de la captura. Con speed=None
+    va tan rápido como puede; con speed=1.0 respeta los tiempos de recepción
+    grabados (2.0 = el doble de rápido).
+    """
+
+    socket_class = ReplaySocket
+
+    def __init__(self, records, speed=None, patience=REPLAY_PATIENCE, quiet=True):
+        self.frames = []  # [(ts_ns, frame text)] in capture order
+        sources = []
+        self.snapshots = defaultdict(deque)
+        for ts_ns, source, channel, payload in records:
+            if channel == 'snapshot':
+                self.snapshots[source].append(payload)
+            else:
+                self.frames.append((ts_ns, payload.decode('utf-8', errors='replace')))
+                sources.append(source)
+        self.sources = sorted(set(sources) | set(self.snapshots))
+        self.sequencer = Sequencer(sources, patience)
+        self.speed = speed
+        self.quiet = quiet
+        self.replayed = Counter()
+        self.connects = Counter()
+        self._t0 = self.frames[0][0] if self.frames else 0
+        self._start = None
+        self.clock_ns = self._t0  # capture receive time of the frame being processed
+        self._waiting = set()
+        self.drained = asyncio.Event()
+
+    def exhausted(self, source):
+        # A listener back in recv() with nothing left has fully processed its last frame
+        self._waiting.discard(source)
+        if not self._waiting:
+            self.drained.set()
+
+    async def pace(self, ts_ns):
+        if self.speed is None:
+            # Yield so the detector sees each change, as it would between network reads
+            await asyncio.sleep(0)
+            return
+        delay = self._start + (ts_ns - self._t0) / 1e9 / self.speed - asyncio.get_running_loop().time()
+        await asyncio.sleep(max(delay, 0))
+
+    def _fetcher(self, source):
+        async def fetch(*args, **kwargs):
+            if not self.snapshots[source]:
+                raise RuntimeError(f"No more recorded {source} snapshots")
+            return json.loads(self.snapshots[source].popleft())
+        return fetch
+
+    @contextmanager
+    def patched(self):
+        saved = []
+
+        def patch(target, name, value):
+            saved.append((target, name, getattr(target, name)))
+            setattr(target, name, value)
+
+        try:
+            for source, (module_name, fetchers) in LISTENER_MODULES.items():
+                module = importlib.import_module(module_name)
+                patch(module, 'websockets', ReplayWebsockets(self, source))
+                for name in fetchers:
+                    patch(module, name, self._fetcher(source))
+                if self.quiet:
+                    patch(module.hot_log, 'quiet', True)
+            kucoin = importlib.import_module(LISTENER_MODULES['kucoin'][0])
+
+            async def get_token():
+                return {'data': {'token': 'replay'}}
+            patch(kucoin, 'get_token', get_token)
+            if self.quiet:
+                patch(importlib.import_module('src.main').hot_log, 'quiet', True)
+            yield
+        finally:
+            for target, name, value in reversed(saved):
+                setattr(target, name, value)
+
+    async def _finished(self):
+        await self.sequencer.done.wait()
+        # Give the listeners time to process the last frames; one asleep after a disconnect won't come back
+        try:
+            await asyncio.wait_for(self.drained.wait(), max(1.0, self.sequencer.patience * 20))
+        except asyncio.TimeoutError:
+            logger.warning(f"Replay finished with listeners still busy: {sorted(self._waiting)}")
+
+    async def run(self, watcher, exchanges=None, detector=True):
+        """Lanza los listeners de `exchanges` (por defecto los de la captura) y el detector hasta agotar la captura"""
+        from src.main import LISTENERS, exchange_symbols, check_opportunity_loop
+
+        exchanges = [ex for ex in (exchanges or self.sources) if ex in LISTENERS]
+        self._waiting = {ex for ex in exchanges if self.sequencer.pending[ex]}
+        if not self._waiting:
+            self.drained.set()
+        config = exchange_symbols(watcher.symbol)
+        with self.patched():
+            self._start = asyncio.get_running_loop().time()
+            started = time.perf_counter()
+            listeners = [asyncio.create_task(LISTENERS[ex](watcher, symbol=config[ex], crypto=watcher.symbol))
+                         for ex in exchanges]
+            detector = asyncio.create_task(check_opportunity_loop(watcher) if detector else asyncio.Event().wait())
+            finished = asyncio.create_task(self._finished())
+            # Also stop if every listener gave up before the capture ran out
+            stopped = asyncio.gather(*listeners, return_exceptions=True)
+            await asyncio.wait([finished, stopped], return_when=asyncio.FIRST_COMPLETED)
+            # Let the detector evaluate the last change before tearing down
+            for _ in range(100):
+                if not watcher.changed.is_set():
+                    break
+                await asyncio.sleep(0)
+            await asyncio.sleep(0)
+            elapsed = time.perf_counter() - started
+            for task in [*listeners, detector, finished]:
+                task.cancel()
+            await asyncio.gather(*listeners, detector, finished, return_exceptions=True)
+
+        replayed = sum(self.replayed.values())
+        return {
+            'frames': replayed,
+            'seconds': elapsed,
+            'frames_per_second': replayed / elapsed if elapsed else 0.0,
+            'by_exchange': dict(self.replayed),
+            'connects': dict(self.connects),
+            'out_of_order': self.sequencer.out_of_order,
+            'snapshots_left': {source: len(snapshots) for source, snapshots in self.snapshots.items() if snapshots},
+            'opportunities': watcher.opportunities.recorded,
+            'detector_latency': watcher.latency.summary(),
+            'prices': {ex: (data['bid'], data['ask']) for ex, data in watcher.prices.items()},
+        }
+
+
+def replay_watcher(symbol, opportunity_db=""):
+    """LivePriceWatcher para replay: sin grabar ni guardar ticks, sin Redis, y oportunidades solo en memoria salvo opportunity_db"""
+    from src.main import LivePriceWatcher
+    from src.opportunity_store import OpportunityWriter
+
+    # Never started, whatever RECORD_FRAMES/TICK_STORE say: replay must not write a new capture or tick history
+    watcher = LivePriceWatcher(symbol, record_frames=False, tick_store=False)
+    watcher.opportunities = OpportunityWriter(opportunity_db)
+    return watcher
+
+
+async def replay(directory, symbol, prefix=None, exchanges=None, speed=None, opportunity_db=""):
+    engine = ReplayEngine(read_session(directory, prefix), speed=speed)
+    watcher = replay_watcher(symbol, opportunity_db)
+    stats = await engine.run(watcher, exchanges)
+    await watcher.opportunities.flush()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory", help="directory with the recorded segments")
+    parser.add_argument("--symbol", default="BTC")
+    parser.add_argument("--prefix", help="segment prefix (the recorder uses the symbol in lowercase)")
+    parser.add_argument("--exchanges", help="comma separated; default: every exchange in the capture")
+    parser.add_argument("--speed", type=float, help="1.0 = recorded timing; default: as fast as possible")
+    parser.add_argument("--opportunity-db", default="", help="also write detected opportunities to this SQLite file")
+    args = parser.parse_args()
+
+    # Replay must not append to the live bot logs: warnings go to stderr and setup_logging becomes a no-op
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr, format='%(asctime)s %(levelname)s %(name)s %(message)s')
+    exchanges = args.exchanges.split(',') if args.exchanges else None
+    stats = asyncio.run(replay(args.directory, args.symbol.upper(), args.prefix or args.symbol.lower(),
+                               exchanges, args.speed, args.opportunity_db))
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import json
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def load_taker_fees(path, overrides=None):
+    """{exchange: taker_fee} desde un exchange_fees.json (formato ccxt fetch_trading_fees); sin path, solo los overrides"""
+    fees = {}
+    if path is not None:
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            fees = {exchange: entry['fees']['taker'] for exchange, entry in data.items()}
+        except Exception as e:
+            logger.warning(f"Could not load fees from {path}: {e}")
+    fees.update(overrides or {})
+    return fees
+
+
+class SpreadMatrix:
+    """Matriz N x N de spread neto entre venues, con la comisión de cada venue.
+
+    spread[b, s] es lo que se gana por unidad comprando al ask de b y vendiendo
+    al bid de s, ya descontadas las comisiones taker de ambos. Cuando un venue
+    cambia solo se recalculan su fila y su columna (O(N)). Un venue sin precios
+    tiene bid neto -inf y ask neto +inf, así que sus pares quedan a -inf sin
+    producir nan y nunca aparecen en top_pairs.
+    """
+
+    def __init__(self, fees, default_fee=0.0):
+        self.fees = fees
+        self.default_fee = default_fee
+        self.venues = []
+        self._index = {}
+        self.net_bid = np.empty(0)
+        self.net_ask = np.empty(0)
+        self.spread = np.empty((0, 0))
+
+    def _venue_index(self, venue):
+        i = self._index.get(venue)
+        if i is None:
+            i = self._index[venue] = len(self.venues)
+            self.venues.append(venue)
+            self.net_bid = np.append(self.net_bid, -np.inf)
+            self.net_ask = np.append(self.net_ask, np.inf)
+            self.spread = np.pad(self.spread, ((0, 1), (0, 1)), constant_values=-np.inf)
+        return i
+
+    def fee(self, venue):
+        return self.fees.get(venue, self.default_fee)
+
+    def update(self, venue, bid, ask):
+        """Actualiza el BBO de un venue; sin bid o sin ask el venue queda fuera de la matriz"""
+        i = self._venue_index(venue)
+        if bid is None or ask is None or bid <= 0 or ask <= 0:
+            self.net_bid[i] = -np.inf
+            self.net_ask[i] = np.inf
+        else:
+            fee = self.fee(venue)
+            self.net_bid[i] = bid * (1 - fee)
+            self.net_ask[i] = ask * (1 + fee)
+        self.spread[i, :] = self.net_bid - self.net_ask[i]
+        self.spread[:, i] = self.net_bid[i] - self.net_ask
+        self.spread[i, i] = -np.inf
+
+    def remove(self, venue):
+        if venue in self._index:
+            self.update(venue, None, None)
+
+    def get(self, buy, sell):
+        if buy not in self._index or sell not in self._index:
+            return None
+        value = self.spread[self._index[buy], self._index[sell]]
+        return None if value == -np.inf else float(value)
+
+    def best_pair(self):
+        """(buy, sell, net_spread) del mejor par, o None; equivale a top_pairs(1) sin construir dicts"""
+        if not self.venues:
+            return None
+        position = int(self.spread.argmax())
+        value = self.spread.flat[position]
+        if value == -np.inf:
+            return None
+        b, s = divmod(position, len(self.venues))
+        return self.venues[b], self.venues[s], float(value)
+
+    def top_pairs(self, k):
+        """Los k mejores pares como [{buy, sell, net_spread, net_spread_pct}], de mayor a menor"""
+        flat = self.spread.ravel()
+        k = min(k, int(np.count_nonzero(flat > -np.inf)))
+        if k <= 0:
+            return []
+        best = np.argpartition(flat, -k)[-k:]
+        best = best[np.argsort(flat[best])[::-1]]
+        count = len(self.venues)
+        pairs = []
+        for position in best:
+            b, s = divmod(int(position), count)
+            pairs.append({
+                'buy': self.venues[b],
+                'sell': self.venues[s],
+                'net_spread': float(flat[position]),
+                'net_spread_pct': float(flat[position] / self.net_ask[b] * 100),
+            })
+        return pairs
@@ -2,6 +2,9 @@ class Dashboard {
     constructor() {
         this.currentLogFile = null;
         this.refreshInterval = null;
+        this.eventSource = null;
+        this.streaming = false;
+        this.streamStatus = {};
         this.init();
     }
     
@@ -9,6 +12,81 @@ class Dashboard {
         this.setupEventListeners();
         this.startAutoRefresh();
         this.loadInitialData();
+        this.startStream();
+    }
+    
+    startStream() {
+        // Push updates from /api/stream; polling /api/status stays as the fallback
+        if (!window.EventSource) return;
+        
+        this.eventSource = new EventSource('/api/stream');
+        
+        this.eventSource.addEventListener('snapshot', (e) => {
+            const data = JSON.parse(e.data);
+            this.streaming = true;
+            this.streamStatus = data.status;
+            this.renderStreamStatus();
+            this.applySummary(data.summary);
+        });
+        
+        this.eventSource.addEventListener('diff', (e) => {
+            const diff = JSON.parse(e.data);
+            Object.entries(diff).forEach(([symbol, changes]) => {
+                const current = this.streamStatus[symbol] || { exchanges: {}, top_pairs: [] };
+                Object.entries(changes.exchanges || {}).forEach(([exchange, fields]) => {
+                    current.exchanges[exchange] = { ...(current.exchanges[exchange] || {}), ...fields };
+                });
+                if (changes.top_pairs) current.top_pairs = changes.top_pairs;
+                if (changes.last_update) current.last_update = changes.last_update;
+                this.streamStatus[symbol] = current;
+            });
+            this.renderStreamStatus();
+        });
+        
+        this.eventSource.addEventListener('summary', (e) => {
+            this.applySummary(JSON.parse(e.data));
+        });
+        
+        this.eventSource.onerror = () => {
+            console.warn('Status stream unavailable, falling back to polling');
+            this.eventSource.close();
+            this.eventSource = null;
+            this.streaming = false;
+            this.fetchStatus();
+            // Try the stream again later
+            setTimeout(() => this.startStream(), 60000);
+        };
+    }
+    
+    stopStream() {
+        if (this.eventSource) {
+            this.eventSource.close();
+            this.eventSource = null;
+        }
+        this.streaming = false;
+    }
+    
+    renderStreamStatus() {
+        // Same rules as DashboardManager.get_exchange_status: data older than 60 s is stale
+        const now = Date.now() / 1000;
+        const exchanges = {};
+        Object.entries(this.streamStatus).forEach(([symbol, data]) => {
+            Object.entries(data.exchanges || {}).forEach(([exchange, info]) => {
+                let status = info.status || 'unknown';
+                if (info.timestamp && now - info.timestamp > 60) status = 'stale';
+                exchanges[`${symbol}-${exchange}`] = status;
+            });
+        });
+        this.updateExchangeStatus(exchanges);
+        this.updateTopPairs(this.streamStatus);
+        this.updateLastUpdate(new Date().toISOString());
+    }
+    
+    applySummary(summary) {
+        if (!summary) return;
+        if (summary.error_count) this.updateErrorCount(summary.error_count);
+        if (summary.recent_errors) this.updateRecentErrors(summary.recent_errors);
+        if (summary.opportunities) this.updateOpportunities(summary.opportunities);
     }
     
     setupEventListeners() {
@@ -30,6 +108,7 @@ class Dashboard {
     async loadInitialData() {
         await this.fetchStatus();
         await this.fetchLogFiles();
+        await this.fetchLatency();
     }
     
     async fetchStatus() {
@@ -45,6 +124,7 @@ class Dashboard {
             this.updateErrorCount(data.error_count);
             this.updateRecentErrors(data.recent_errors);
             this.updateOpportunities(data.opportunities);
+            this.updateTopPairs(data.file_status);
             this.updateLastUpdate(data.timestamp);
             
         } catch (error) {
@@ -53,6 +133,16 @@ class Dashboard {
         }
     }
     
+    async fetchLatency() {
+        try {
+            const response = await fetch('/api/latency');
+            const data = await response.json();
+            this.updateLatency(data.success ? data.data : null);
+        } catch (error) {
+            console.error('Error fetching latency:', error);
+        }
+    }
+    
     async fetchLogFiles() {
         try {
             const response = await fetch('/api/logs');
@@ -229,6 +319,66 @@ class Dashboard {
         container.innerHTML = opportunitiesHtml;
     }
     
+    updateTopPairs(fileStatus) {
+        const container = document.getElementById('top-pairs');
+        if (!container) return;
+        
+        const pairs = Object.entries(fileStatus || {})
+            .flatMap(([symbol, data]) => (data.top_pairs || []).map(pair => ({ symbol, ...pair })))
+            .sort((a, b) => b.net_spread_pct - a.net_spread_pct);
+        
+        if (pairs.length === 0) {
+            container.innerHTML = '<div class="no-data">No spread data available</div>';
+            return;
+        }
+        
+        const pairsHtml = pairs
+            .slice(0, 10)
+            .map(pair => 
+                `<div class="opportunity-entry">
+                    <div class="opportunity-timestamp">${pair.symbol}</div>
+                    <div class="opportunity-details">
+                        Net spread: ${pair.net_spread.toFixed(2)} USDT (${pair.net_spread_pct.toFixed(3)}%)
+                    </div>
+                    <div class="opportunity-trade">
+                        Buy ${pair.buy} → Sell ${pair.sell}
+                    </div>
+                </div>`
+            ).join('');
+        
+        container.innerHTML = pairsHtml;
+    }
+    
+    updateLatency(latency) {
+        const container = document.getElementById('venue-latency');
+        if (!container) return;
+        
+        const rows = Object.entries(latency || {})
+            .flatMap(([symbol, venues]) => Object.entries(venues).map(([exchange, stages]) => ({ symbol, exchange, stages })));
+        
+        if (rows.length === 0) {
+            container.innerHTML = '<div class="no-data">No latency data available</div>';
+            return;
+        }
+        
+        const cell = (stage) => stage ? `${stage.p50.toFixed(1)} / ${stage.p99.toFixed(1)}` : '-';
+        const rowsHtml = rows
+            .map(({ symbol, exchange, stages }) => 
+                `<tr>
+                    <td>${symbol} ${exchange}</td>
+                    <td>${cell(stages.feed)}</td>
+                    <td>${cell(stages.apply)}</td>
+                    <td>${cell(stages.detect)}</td>
+                    <td>${cell(stages.total)}</td>
+                </tr>`
+            ).join('');
+        
+        container.innerHTML = `<table class="latency-table">
+            <thead><tr><th>Venue</th><th>Feed</th><th>Apply</th><th>Detect</th><th>Total</th></tr></thead>
+            <tbody>${rowsHtml}</tbody>
+        </table>`;
+    }
+    
     updateLogTabs(files) {
         const container = document.getElementById('log-tabs');
         if (!container) return;
@@ -318,7 +468,11 @@ class Dashboard {
     
     refreshAll() {
         console.log('Refreshing all data...');
-        this.fetchStatus();
+        // While streaming, status and summaries are pushed; only the log view is refreshed
+        if (!this.streaming) {
+            this.fetchStatus();
+        }
+        this.fetchLatency();
         if (this.currentLogFile) {
             this.loadLogFile(this.currentLogFile);
         }
@@ -368,5 +522,6 @@ document.addEventListener('DOMContentLoaded', () => {
 window.addEventListener('beforeunload', () => {
     if (window.dashboard) {
         window.dashboard.stopAutoRefresh();
+        window.dashboard.stopStream();
     }
 });
\ No newline at end of file
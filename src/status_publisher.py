@@ -0,0 +1,117 @@
+import asyncio
+import json
+import logging
+import os
+import time
+
+import redis.asyncio as aioredis
+
+from src.metrics import LatencyRecorder
+from src.status_schema import STATUS_KEY, EXCHANGE_KEY, STATE_KEY, STATE_CHANNEL, LATENCY_KEY, flatten_status, changed_fields
+from config.settings import STATUS_FLUSH_INTERVAL, STATUS_TTL, REDIS_STATUS_JSON, LATENCY_PUBLISH_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+class StatusPublisher:
+    """Publica el estado de un LivePriceWatcher en Redis sin bloquear el event loop.
+
+    update_price/set_status solo marcan el estado como sucio (sin I/O). run()
+    vuelca el último estado cada `interval` segundos en un único pipeline con
+    redis.asyncio, así que todos los ticks entre dos flushes cuestan un round
+    trip y un Redis lento no frena los websockets. Si Redis no está disponible
+    o falla, el estado se escribe al archivo JSON en un hilo aparte.
+
+    En Redis el estado vive en el hash state:{symbol} y cada flush solo manda
+    con HSET los campos que cambiaron, y los mismos campos se publican en el
+    canal state_updates:{symbol}. Cada ttl / 2 se reescribe entero por si
+    la clave expiró o Redis se reinició. Con write_json también se escriben las
+    claves JSON legacy en el mismo pipeline. Cada latency_interval segundos se
+    añaden los histogramas de latencia por venue en latency:{symbol}.
+    """
+
+    def __init__(self, watcher, redis_url=None, interval=STATUS_FLUSH_INTERVAL, ttl=STATUS_TTL, write_json=REDIS_STATUS_JSON,
+                 latency_interval=LATENCY_PUBLISH_INTERVAL):
+        self.watcher = watcher
+        self.redis_url = redis_url or os.getenv('REDIS_URL')
+        self.interval = interval
+        self.ttl = ttl
+        self.write_json = write_json
+        self.redis_client = None
+        self.dirty = False
+        self._published = {}  # hash fields as last acknowledged by Redis
+        self._full_write_at = 0.0
+        self.latency_interval = latency_interval
+        self._latency_at = 0.0
+        self.flush_latency = LatencyRecorder("status_flush")
+
+    def mark_dirty(self):
+        self.dirty = True
+
+    async def connect(self):
+        """Configura conexión Redis con fallback"""
+        try:
+            client = aioredis.from_url(self.redis_url, decode_responses=True)
+            await client.ping()
+            self.redis_client = client
+            logger.info(f"Redis connected successfully for {self.watcher.symbol}")
+        except Exception as e:
+            logger.warning(f"Redis connection failed for {self.watcher.symbol}: {e}")
+            logger.warning(f"Falling back to JSON files")
+            self.redis_client = None
+
+    async def write_redis(self, status_data):
+        """Escribe el hash state:{symbol} (y las claves legacy) con TTL en un solo round trip"""
+        if not self.redis_client:
+            return False
+        symbol = self.watcher.symbol
+        fields = flatten_status(status_data)
+        full_write = time.time() - self._full_write_at >= self.ttl / 2
+        changed = fields if full_write else changed_fields(self._published, fields)
+        write_latency = time.time() - self._latency_at >= self.latency_interval
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                state_key = STATE_KEY.format(symbol=symbol)
+                if changed:
+                    pipe.hset(state_key, mapping=changed)
+                    # Push consumers (dashboard SSE) get the same diff without polling the hash
+                    pipe.publish(STATE_CHANNEL.format(symbol=symbol), json.dumps(changed))
+                pipe.expire(state_key, self.ttl)
+                if self.write_json:
+                    pipe.set(STATUS_KEY.format(symbol=symbol), json.dumps(status_data), ex=self.ttl)
+                    # También escribir datos individuales para queries más fáciles
+                    for exchange, data in status_data['exchanges'].items():
+                        pipe.set(EXCHANGE_KEY.format(symbol=symbol, exchange=exchange), json.dumps(data), ex=self.ttl)
+                if write_latency:
+                    pipe.set(LATENCY_KEY.format(symbol=symbol), json.dumps(self.watcher.venue_latency.snapshot()), ex=self.ttl)
+                await pipe.execute()
+            self._published = fields
+            if full_write:
+                self._full_write_at = time.time()
+            if write_latency:
+                self._latency_at = time.time()
+            return True
+        except Exception as e:
+            logger.error(f"Error writing to Redis: {e}")
+            return False
+
+    async def flush(self):
+        """Vuelca el estado si cambió desde el último flush: Redis primero, JSON como fallback"""
+        if not self.dirty:
+            return
+        self.dirty = False
+        start = time.perf_counter()
+        status_data = self.watcher.status_data()
+        if not await self.write_redis(status_data):
+            await asyncio.to_thread(self.watcher.write_status_file, status_data)
+        self.flush_latency.record(time.perf_counter() - start)
+
+    async def run(self):
+        await self.connect()
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+                await self.flush()
+        finally:
+            if self.redis_client:
+                await self.redis_client.aclose()
@@ -0,0 +1,66 @@
+import json
+
+# status:{symbol} (JSON blob) and exchange:{symbol}:{exchange} are the legacy layout,
+# kept behind REDIS_STATUS_JSON for readers that have not moved to the hash
+STATUS_KEY = "status:{symbol}"
+EXCHANGE_KEY = "exchange:{symbol}:{exchange}"
+STATE_KEY = "state:{symbol}"
+# Pub/sub channel carrying the hash fields changed by each flush (JSON), for push consumers
+STATE_CHANNEL = "state_updates:{symbol}"
+# Per-venue latency histograms (VenueLatency.snapshot() as JSON), refreshed every LATENCY_PUBLISH_INTERVAL
+LATENCY_KEY = "latency:{symbol}"
+
+EXCHANGE_FIELDS = ('bid', 'ask', 'timestamp', 'status')
+
+
+def flatten_status(status_data):
+    """Estado del watcher -> campos planos del hash state:{symbol}, todos strings.
+
+    Cada exchange ocupa '{exchange}:{campo}'; None se guarda como string vacío.
+    """
+    fields = {
+        'symbol': status_data['symbol'],
+        'last_update': repr(status_data['last_update']),
+        'last_update_readable': status_data.get('last_update_readable', ''),
+        'top_pairs': json.dumps(status_data.get('top_pairs', [])),
+    }
+    for exchange, data in status_data['exchanges'].items():
+        for name in EXCHANGE_FIELDS:
+            value = data.get(name)
+            fields[f"{exchange}:{name}"] = '' if value is None else str(value)
+    return fields
+
+
+def unflatten_status(fields):
+    """Inverso de flatten_status: devuelve el mismo dict que el blob JSON legacy"""
+    exchanges = {}
+    for key, value in fields.items():
+        exchange, sep, name = key.rpartition(':')
+        if not sep or name not in EXCHANGE_FIELDS:
+            continue
+        if name == 'status':
+            parsed = value or None
+        else:
+            parsed = float(value) if value else None
+        exchanges.setdefault(exchange, {})[name] = parsed
+    return {
+        'symbol': fields.get('symbol'),
+        'last_update': float(fields.get('last_update') or 0),
+        'last_update_readable': fields.get('last_update_readable', 'Unknown'),
+        'exchanges': exchanges,
+        'top_pairs': json.loads(fields.get('top_pairs') or '[]'),
+    }
+
+
+def status_diff(fields):
+    """Campos parciales de un flush -> solo las partes del estado que cambiaron, con el formato de unflatten_status"""
+    diff = unflatten_status(fields)
+    for key in ('symbol', 'last_update', 'last_update_readable', 'top_pairs'):
+        if key not in fields:
+            del diff[key]
+    return diff
+
+
+def changed_fields(previous, current):
+    """Campos de current cuyo valor difiere de previous (lo que hay que mandar con HSET)"""
+    return {key: value for key, value in current.items() if previous.get(key) != value}
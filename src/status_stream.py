@@ -0,0 +1,130 @@
+import json
+import logging
+import queue
+import threading
+import time
+
+from src.status_schema import STATE_KEY, STATE_CHANNEL, unflatten_status, status_diff
+
+logger = logging.getLogger(__name__)
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class StatusBroadcaster:
+    """Un único productor que empuja el estado de los bots a todos los navegadores por SSE.
+
+    Un hilo escucha los canales state_updates:{symbol} de Redis y reenvía cada
+    diff a la cola de cada cliente. Cada summary_interval segundos recalcula una
+    sola vez el resumen derivado de los logs y solo envía las claves que
+    cambiaron. Así el coste no depende del número de clientes conectados. Un
+    cliente nuevo recibe primero un snapshot completo. Un cliente lento cuya
+    cola se llena se desconecta, y EventSource reconecta con un snapshot nuevo.
+    """
+
+    def __init__(self, redis_client, symbols, summary=None, summary_interval=30, heartbeat=15, client_queue=256):
+        self.redis_client = redis_client
+        self.symbols = symbols
+        self.summary = summary
+        self.summary_interval = summary_interval
+        self.heartbeat = heartbeat
+        self.client_queue = client_queue
+        self.state = {}  # {symbol: flat hash fields}
+        self.last_summary = {}
+        self.clients = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="status-broadcaster", daemon=True)
+                self._thread.start()
+
+    def subscribe(self):
+        client = queue.Queue(maxsize=self.client_queue)
+        with self._lock:
+            client.put_nowait(self.snapshot_event())
+            self.clients.add(client)
+        return client
+
+    def unsubscribe(self, client):
+        with self._lock:
+            self.clients.discard(client)
+
+    def snapshot_event(self):
+        status = {symbol: unflatten_status(fields) for symbol, fields in self.state.items()}
+        return sse_event('snapshot', {'status': status, 'summary': self.last_summary})
+
+    def broadcast(self, message):
+        with self._lock:
+            for client in list(self.clients):
+                try:
+                    client.put_nowait(message)
+                except queue.Full:
+                    logger.warning("SSE client too slow, dropping it")
+                    self.clients.discard(client)
+                    # Wake its generator so it closes the response
+                    with client.mutex:
+                        client.queue.clear()
+                    client.put_nowait(None)
+
+    def stream(self):
+        """Generador de eventos SSE para una respuesta; heartbeat para mantener vivos los proxies"""
+        client = self.subscribe()
+        try:
+            while True:
+                try:
+                    message = client.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    yield ": ping\n\n"
+                    continue
+                if message is None:
+                    return
+                yield message
+        finally:
+            self.unsubscribe(client)
+
+    def _load_state(self):
+        with self.redis_client.pipeline(transaction=False) as pipe:
+            for symbol in self.symbols:
+                pipe.hgetall(STATE_KEY.format(symbol=symbol))
+            hashes = pipe.execute()
+        with self._lock:
+            self.state = {symbol: fields for symbol, fields in zip(self.symbols, hashes) if fields}
+
+    def _refresh_summary(self):
+        summary = self.summary()
+        changed = {key: value for key, value in summary.items() if self.last_summary.get(key) != value}
+        self.last_summary = summary
+        if changed:
+            self.broadcast(sse_event('summary', changed))
+
+    def _run(self):
+        channels = {STATE_CHANNEL.format(symbol=symbol): symbol for symbol in self.symbols}
+        next_summary = 0.0
+        while True:
+            pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(*channels)
+                # Subscribe before loading so no diff between the two is lost
+                self._load_state()
+                while True:
+                    if self.summary and time.time() >= next_summary:
+                        self._refresh_summary()
+                        next_summary = time.time() + self.summary_interval
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is None or message['type'] != 'message':
+                        continue
+                    symbol = channels[message['channel']]
+                    fields = json.loads(message['data'])
+                    with self._lock:
+                        self.state.setdefault(symbol, {}).update(fields)
+                    self.broadcast(sse_event('diff', {symbol: status_diff(fields)}))
+            except Exception as e:
+                logger.error(f"Status broadcaster error, retrying: {e}")
+                time.sleep(5)
+            finally:
+                pubsub.close()
@@ -0,0 +1,271 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+from collections import defaultdict, deque
+from itertools import islice
+
+import numpy as np
+
+from config.settings import TICK_STORE_DIR, TICK_STORE_DEPTH, TICK_STORE_FLUSH_INTERVAL, TICK_STORE_BUFFER
+
+logger = logging.getLogger(__name__)
+
+BBO_COLUMNS = ('ts', 'bid', 'ask')
+META_FILE = "meta.json"
+
+
+def segment_columns(depth):
+    """{columna: (dtype, forma por fila)}; con depth > 0 también los top-N niveles [(price, size)] de cada lado"""
+    columns = {'ts': ('<f8', ()), 'bid': ('<f8', ()), 'ask': ('<f8', ())}
+    if depth:
+        columns['bids'] = ('<f8', (depth, 2))
+        columns['asks'] = ('<f8', (depth, 2))
+    return columns
+
+
+def utc_day(ts):
+    return time.strftime('%Y%m%d', time.gmtime(ts))
+
+
+def _level_columns(rows, depth, side):
+    """Columna (filas, depth, 2) de precios/tamaños float a partir de los (ticks, lots) crudos; nan donde no hay nivel"""
+    units = np.full((len(rows), depth, 2), math.nan)
+    price_scale = np.ones(len(rows))
+    qty_scale = np.ones(len(rows))
+    for i, row in enumerate(rows):
+        levels = row[4]
+        if levels is not None and levels[side]:
+            units[i, :len(levels[side])] = levels[side]
+            price_scale[i], qty_scale[i] = levels[2], levels[3]
+    # Bids are keyed by negative ticks
+    units[:, :, 0] = np.abs(units[:, :, 0]) / price_scale[:, None]
+    units[:, :, 1] /= qty_scale[:, None]
+    return units
+
+
+class TickStoreWriter:
+    """Escribe cada cambio de BBO de un símbolo en segmentos columnares de solo append, por venue y día UTC.
+
+    Un segmento es un directorio {directory}/{symbol}/{venue}/{YYYYMMDD}.d{depth}
+    con un archivo binario por columna (ts, bid, ask y, con depth > 0, los
+    top-N niveles bids/asks) más meta.json con sus dtypes. append() solo encola
+    la fila; run() las vuelca cada `interval` segundos en un hilo aparte
+    (asyncio.to_thread), añadiendo al final de cada archivo. Se leen con
+    TickStore sin deserializar nada (np.memmap).
+    """
+
+    def __init__(self, symbol, directory=TICK_STORE_DIR, depth=TICK_STORE_DEPTH, interval=TICK_STORE_FLUSH_INTERVAL,
+                 buffer=TICK_STORE_BUFFER):
+        self.symbol = symbol
+        self.directory = directory
+        self.depth = depth
+        self.columns = segment_columns(depth)
+        self.interval = interval
+        self.pending = deque(maxlen=buffer)
+        self.written = 0
+        self.dropped = 0
+        self._segments = set()  # segment directories whose meta.json is already on disk
+
+    def append(self, venue, bid, ask, ts, book=None):
+        if len(self.pending) == self.pending.maxlen:
+            self.dropped += 1
+        levels = None
+        if self.depth and book is not None:
+            # Raw (ticks, lots) read now, since the book keeps changing; the float conversion happens in the flush thread
+            levels = (list(islice(book.bids.items(), self.depth)), list(islice(book.asks.items(), self.depth)),
+                      10 ** book.price_decimals, 10 ** book.qty_decimals)
+        self.pending.append((venue, ts, bid, ask, levels))
+
+    def segment_path(self, venue, day):
+        return os.path.join(self.directory, self.symbol, venue, f"{day}.d{self.depth}")
+
+    def _open_segment(self, path):
+        if path not in self._segments:
+            os.makedirs(path, exist_ok=True)
+            meta = os.path.join(path, META_FILE)
+            if not os.path.exists(meta):
+                with open(meta, 'w') as f:
+                    json.dump({'depth': self.depth, 'columns': {name: [dtype, list(shape)]
+                                                                for name, (dtype, shape) in self.columns.items()}}, f)
+            self._segments.add(path)
+
+    def _write(self, batch):
+        groups = defaultdict(list)
+        for row in batch:
+            groups[(row[0], utc_day(row[1]))].append(row)
+        for (venue, day), rows in groups.items():
+            path = self.segment_path(venue, day)
+            self._open_segment(path)
+            data = {
+                'ts': np.array([row[1] for row in rows], dtype='<f8'),
+                'bid': np.array([math.nan if row[2] is None else row[2] for row in rows], dtype='<f8'),
+                'ask': np.array([math.nan if row[3] is None else row[3] for row in rows], dtype='<f8'),
+            }
+            if self.depth:
+                data['bids'] = _level_columns(rows, self.depth, 0)
+                data['asks'] = _level_columns(rows, self.depth, 1)
+            # ts goes last: a row only counts once every column has it (readers use the shortest column)
+            for name in [*(name for name in self.columns if name != 'ts'), 'ts']:
+                with open(os.path.join(path, name), 'ab') as f:
+                    f.write(np.ascontiguousarray(data[name], dtype=self.columns[name][0]).tobytes())
+
+    async def flush(self):
+        if not self.pending:
+            return
+        batch = list(self.pending)
+        self.pending.clear()
+        try:
+            await asyncio.to_thread(self._write, batch)
+            self.written += len(batch)
+        except Exception as e:
+            logger.error(f"Error writing ticks to {self.directory}: {e}")
+            self.pending.extendleft(reversed(batch))
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+
+def open_segment(path, columns=BBO_COLUMNS):
+    """{columna: np.memmap de solo lectura} de un segmento, todas con el número de filas completas"""
+    with open(os.path.join(path, META_FILE)) as f:
+        meta = json.load(f)['columns']
+    names = [name for name in columns if name in meta]
+    rows = None
+    for name in meta:
+        dtype, shape = meta[name]
+        row_bytes = np.dtype(dtype).itemsize * int(np.prod(shape))
+        size = os.path.getsize(os.path.join(path, name)) if os.path.exists(os.path.join(path, name)) else 0
+        rows = size // row_bytes if rows is None else min(rows, size // row_bytes)
+    if not rows:
+        return {name: np.empty((0, *meta[name][1]), dtype=meta[name][0]) for name in names}
+    return {name: np.memmap(os.path.join(path, name), dtype=meta[name][0], mode='r', shape=(rows, *meta[name][1]))
+            for name in names}
+
+
+class TickStore:
+    """Lectura de los segmentos de TickStoreWriter: escaneos por rango de tiempo, series para gráficos y estadísticas de spread"""
+
+    def __init__(self, directory=TICK_STORE_DIR):
+        self.directory = directory
+
+    def venues(self, symbol):
+        path = os.path.join(self.directory, symbol)
+        return sorted(os.listdir(path)) if os.path.isdir(path) else []
+
+    def segments(self, symbol, venue, start=None, end=None):
+        """Segmentos de un venue cuyo día UTC se solapa con [start, end), en orden cronológico"""
+        path = os.path.join(self.directory, symbol, venue)
+        if not os.path.isdir(path):
+            return []
+        first = utc_day(start) if start is not None else None
+        last = utc_day(end) if end is not None else None
+        # Same-day segments written with different depths sort by name; rows are merged by ts in scan()
+        names = sorted(name for name in os.listdir(path)
+                       if (first is None or name[:8] >= first) and (last is None or name[:8] <= last))
+        return [os.path.join(path, name) for name in names]
+
+    def scan(self, symbol, venue, start=None, end=None, columns=BBO_COLUMNS):
+        """{columna: array} de las filas con start <= ts < end.
+
+        Dentro de un segmento es una vista del memmap (sin copia); si el rango
+        abarca varios segmentos se concatenan.
+        """
+        names = tuple(dict.fromkeys(('ts', *columns)))
+        parts = []
+        for path in self.segments(symbol, venue, start, end):
+            segment = open_segment(path, names)
+            ts = segment['ts']
+            lo = 0 if start is None else int(np.searchsorted(ts, start, side='left'))
+            hi = len(ts) if end is None else int(np.searchsorted(ts, end, side='left'))
+            if hi > lo:
+                parts.append({name: values[lo:hi] for name, values in segment.items()})
+        if not parts:
+            return {name: np.empty(0) for name in names}
+        if len(parts) == 1:
+            return parts[0]
+        merged = {}
+        for name in names:
+            sample = next((part[name] for part in parts if name in part), None)
+            if sample is None:
+                continue
+            # A segment written with depth 0 has no level columns: fill them with nan
+            merged[name] = np.concatenate([part[name] if name in part else np.full((len(part['ts']), *sample.shape[1:]), np.nan)
+                                           for part in parts])
+        if np.any(np.diff(merged['ts']) < 0):
+            # Two same-day segments (depth changed mid-day) interleave in time
+            order = np.argsort(merged['ts'], kind='stable')
+            merged = {name: values[order] for name, values in merged.items()}
+        return merged
+
+    def scan_all(self, symbol, start=None, end=None, venues=None, columns=BBO_COLUMNS):
+        """{venue: scan()} de todos los venues del símbolo (o los de `venues`)"""
+        return {venue: self.scan(symbol, venue, start, end, columns) for venue in (venues or self.venues(symbol))}
+
+    def history(self, symbol, start, end, points=500, venues=None):
+        """Serie bid/ask de cada venue reducida a `points` puntos: el último tick de cada intervalo"""
+        edges = np.linspace(start, end, points + 1)[1:]
+        series = {}
+        for venue, data in self.scan_all(symbol, start, end, venues).items():
+            if not len(data['ts']):
+                continue
+            # Index of the last tick at or before each bucket's end; buckets with no new tick are dropped
+            index = np.unique(np.searchsorted(data['ts'], edges, side='right') - 1)
+            index = index[index >= 0]
+            series[venue] = {
+                'ts': data['ts'][index].tolist(),
+                'bid': np.where(np.isnan(data['bid'][index]), None, data['bid'][index]).tolist(),
+                'ask': np.where(np.isnan(data['ask'][index]), None, data['ask'][index]).tolist(),
+            }
+        return series
+
+    def spread_stats(self, symbol, start, end, fees, default_fee=0.0, venues=None, resolution=0.1):
+        """Estadísticas del spread neto de comisiones de cada par (buy, sell) en [start, end).
+
+        Cada venue se muestrea cada `resolution` segundos con su último tick
+        vigente, así el coste no depende de cuántos ticks hubo; los tiempos
+        (positive_seconds) son exactos a esa resolución. De más a menos tiempo
+        con spread positivo.
+        """
+        grid = np.arange(start, end, resolution)
+        data = {venue: values for venue, values in self.scan_all(symbol, start, end, venues).items() if len(values['ts'])}
+        if len(data) < 2 or not len(grid):
+            return []
+        sampled = {}
+        for venue, values in data.items():
+            index = np.searchsorted(values['ts'], grid, side='right') - 1
+            known = index >= 0
+            index = np.maximum(index, 0)
+            fee = fees.get(venue, default_fee)
+            # Before the first tick (or while disconnected) the venue can't be on either side of a spread
+            net_bid = np.where(known, values['bid'][index] * (1 - fee), -np.inf)
+            net_ask = np.where(known, values['ask'][index] * (1 + fee), np.inf)
+            sampled[venue] = (np.nan_to_num(net_bid, nan=-np.inf), np.nan_to_num(net_ask, nan=np.inf))
+
+        stats = []
+        spread = np.empty(len(grid))
+        for buy, (_, net_ask) in sampled.items():
+            for sell, (net_bid, _) in sampled.items():
+                if buy == sell:
+                    continue
+                with np.errstate(over='ignore', invalid='ignore'):
+                    np.subtract(net_bid, net_ask, out=spread)
+                known = spread[np.isfinite(spread)]
+                if not len(known):
+                    continue
+                positive = int(np.count_nonzero(known > 0))
+                stats.append({
+                    'buy': buy,
+                    'sell': sell,
+                    'mean': float(known.mean()),
+                    'max': float(known.max()),
+                    'p99': float(np.percentile(known, 99)),
+                    'positive_seconds': positive * resolution,
+                    'positive_fraction': positive / len(known),
+                })
+        stats.sort(key=lambda row: row['positive_seconds'], reverse=True)
+        return stats
@@ -0,0 +1,109 @@
+import asyncio
+import json
+import logging
+from collections import deque
+
+from redis.exceptions import ResponseError
+
+from config.settings import TICK_STREAM_MAXLEN, TICK_STREAM_FLUSH_INTERVAL, TICK_STREAM_DEPTH, TICK_STREAM_BUFFER
+
+logger = logging.getLogger(__name__)
+
+TICK_STREAM_KEY = "ticks:{symbol}"
+
+
+class TickStream:
+    """Publica cada cambio de BBO del watcher en el stream Redis ticks:{symbol}.
+
+    append() solo encola el tick en memoria; run() los vuelca cada `interval`
+    segundos con un XADD por tick (MAXLEN ~) en un único pipeline, reutilizando
+    la conexión del StatusPublisher. Si Redis no está disponible la cola se
+    acota a `buffer` ticks descartando los más antiguos.
+    """
+
+    def __init__(self, watcher, publisher, maxlen=TICK_STREAM_MAXLEN, interval=TICK_STREAM_FLUSH_INTERVAL,
+                 depth=TICK_STREAM_DEPTH, buffer=TICK_STREAM_BUFFER):
+        self.watcher = watcher
+        self.publisher = publisher
+        self.key = TICK_STREAM_KEY.format(symbol=watcher.symbol)
+        self.maxlen = maxlen
+        self.interval = interval
+        self.depth = depth
+        self.pending = deque(maxlen=buffer)
+        self.published = 0
+        self.dropped = 0
+
+    def append(self, exchange, bid, ask, timestamp):
+        if len(self.pending) == self.pending.maxlen:
+            self.dropped += 1
+        fields = {'exchange': exchange, 'bid': repr(bid), 'ask': repr(ask), 'ts': repr(timestamp)}
+        # A disconnect (no bid/ask) carries no levels
+        order_book = self.watcher.books.get(exchange) if self.depth and bid is not None else None
+        if order_book is not None:
+            fields['bids'] = json.dumps(order_book.top_bids(self.depth))
+            fields['asks'] = json.dumps(order_book.top_asks(self.depth))
+        self.pending.append(fields)
+
+    async def flush(self):
+        redis_client = self.publisher.redis_client
+        if not self.pending or not redis_client:
+            return
+        batch = list(self.pending)
+        self.pending.clear()
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for fields in batch:
+                    pipe.xadd(self.key, fields, maxlen=self.maxlen, approximate=True)
+                await pipe.execute()
+            self.published += len(batch)
+        except Exception as e:
+            logger.error(f"Error writing ticks to {self.key}: {e}")
+            # Put the batch back in front; the deque bound drops the oldest if it overflows
+            self.pending.extendleft(reversed(batch))
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+
+def parse_tick(fields):
+    """Campos de una entrada del stream -> tick con precios float (y niveles si los hay)"""
+    tick = {
+        'exchange': fields['exchange'],
+        'bid': float(fields['bid']) if fields['bid'] != 'None' else None,
+        'ask': float(fields['ask']) if fields['ask'] != 'None' else None,
+        'ts': float(fields['ts']),
+    }
+    if 'bids' in fields:
+        tick['bids'] = json.loads(fields['bids'])
+        tick['asks'] = json.loads(fields['asks'])
+    return tick
+
+
+async def read_ticks(redis_client, symbol, group, consumer, count=500, block_ms=1000, start_id='$'):
+    """Lee ticks:{symbol} como parte de un consumer group y genera lotes [(entry_id, tick), ...].
+
+    Crea el grupo si no existe (desde start_id). Los IDs de un lote se confirman
+    con XACK cuando el consumidor pide el siguiente, así que un lote que no se
+    terminó de procesar se vuelve a entregar (al menos una vez). Requiere un
+    cliente redis.asyncio con decode_responses=True.
+    """
+    key = TICK_STREAM_KEY.format(symbol=symbol)
+    try:
+        await redis_client.xgroup_create(key, group, id=start_id, mkstream=True)
+    except ResponseError as e:
+        if 'BUSYGROUP' not in str(e):
+            raise
+
+    # Entries delivered to this consumer but never acked (e.g. a previous crash) come first
+    stream_id = '0'
+    while True:
+        response = await redis_client.xreadgroup(group, consumer, {key: stream_id}, count=count, block=block_ms)
+        entries = response[0][1] if response else []
+        if not entries:
+            if stream_id == '0':
+                stream_id = '>'
+            continue
+        yield [(entry_id, parse_tick(fields)) for entry_id, fields in entries]
+        await redis_client.xack(key, group, *[entry_id for entry_id, _ in entries])
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import logging
+import math
+import sys
+
+from src.backtest import (
+    make_ticks, run_backtest, save_ticks, scenarios, sweep, ticks_from_capture, ticks_from_redis, ticks_from_store
+)
+from src.recorder import FrameRecorder, read_session
+from src.tick_store import TickStoreWriter
+
+FEES = {'a': 0.0, 'b': 0.0}
+
+
+def ticks():
+    return make_ticks([
+        (0.0, 'a', 100.0, 101.0),
+        (0.0, 'b', 100.0, 101.0),
+        # Buy a at 101, sell b at 103 for a full second: both legs fill
+        (1.0, 'b', 103.0, 104.0),
+        (2.0, 'b', 100.0, 101.0),
+        # a's ask dips to 98 for 10 ms: the buy arrives too late, the sell fills and is unwound at a's ask
+        (3.0, 'a', 97.0, 98.0),
+        (3.01, 'a', 100.0, 101.0),
+        (4.0, 'b', 100.5, 101.0),
+    ])
+
+
+def test_fills_and_leg_risk():
+    result = run_backtest(ticks(), fees=FEES, order_latency=0.05, notional=1000)
+    assert result['opportunities'] == 2 and result['filled'] == 1
+    assert result['fill_rate'] == 0.5 and result['leg_fill_rate'] == 0.75
+    assert math.isclose(result['theoretical_pnl'], 1000 / 101 * 2 + 1000 / 98 * 2)
+    assert math.isclose(result['realized_pnl'], 1000 / 101 * 2 + 1000 / 98 * (100 - 101))
+    assert result['duration_max'] == 1.0 and math.isclose(result['duration_p50'], (1.0 + 0.01) / 2)
+    assert result['pairs'] == {'a->b': 2}
+
+
+def test_threshold_latency_and_fees():
+    # Zero order latency catches the 10 ms dip too
+    assert run_backtest(ticks(), fees=FEES, order_latency=0.0)['filled'] == 2
+    # Per-venue latency: only the slow venue misses it
+    assert run_backtest(ticks(), fees=FEES, order_latency={'a': 0.05})['filled'] == 1
+    assert run_backtest(ticks(), fees=FEES, min_profit=2.0)['opportunities'] == 0
+    # 2% taker on both sides leaves no net spread
+    assert run_backtest(ticks(), fees={'a': 0.02, 'b': 0.02})['opportunities'] == 0
+
+
+def test_feed_latency_reorders_and_stale_prices_disconnect():
+    rows = [(0.0, 'a', 100.0, 101.0), (8.0, 'b', 103.0, 104.0)]
+    result = run_backtest(make_ticks(rows), fees=FEES, stale_time=5)
+    assert result['opportunities'] == 0 and result['stale'] == 1
+    # A slow feed from a makes its price look recent enough
+    result = run_backtest(make_ticks(rows), fees=FEES, stale_time=5, feed_latency={'a': 4.0})
+    assert result['opportunities'] == 1 and result['stale'] == 0
+
+
+def test_disconnected_venue_leaves_the_matrix():
+    rows = [(0.0, 'a', 100.0, 101.0), (0.5, 'b', None, None), (1.0, 'b', 103.0, 104.0)]
+    result = run_backtest(make_ticks(rows), fees=FEES)
+    assert result['opportunities'] == 1 and result['ticks'] == 3
+
+
+def test_sweep_runs_every_scenario(tmp_path):
+    path = str(tmp_path / "ticks.npy")
+    save_ticks(path, ticks())
+    grid = {'order_latency': [0.0, 0.05], 'min_profit': [0.0, 5.0], 'fees': [FEES]}
+    assert len(scenarios(grid)) == 4
+    results = sweep(path, grid, processes=2)
+    assert [params for params, _ in results] == scenarios(grid)
+    filled = {(p['order_latency'], p['min_profit']): r['filled'] for p, r in results}
+    assert filled == {(0.0, 0.0): 2, (0.05, 0.0): 1, (0.0, 5.0): 0, (0.05, 5.0): 0}
+
+
+def test_ticks_from_redis_pages_through_the_stream():
+    class Redis:
+        def __init__(self, entries):
+            self.entries = entries
+
+        async def xrange(self, key, start, end, count):
+            assert key == "ticks:BTC"
+            begin = 0 if start == '-' else next(i for i, (entry_id, _) in enumerate(self.entries)
+                                                 if entry_id == start[1:]) + 1
+            return self.entries[begin:begin + count]
+
+    entries = [(f"{i}-0", {'exchange': 'a', 'bid': repr(100.0 + i), 'ask': repr(101.0 + i), 'ts': repr(float(i))})
+               for i in range(5)]
+    entries.append(("5-0", {'exchange': 'b', 'bid': 'None', 'ask': 'None', 'ts': '5.0'}))
+    result = asyncio.run(ticks_from_redis(Redis(entries), "BTC", count=2))
+    assert result['ts'].tolist() == [0.0, 1.0, 2.0, 3.0, 4.0, 5.0]
+    assert math.isnan(result['bid'][-1]) and result['exchange'][-1] == b'b'
+
+
+def test_ticks_from_capture_use_recorded_time(tmp_path, monkeypatch):
+    # src.main reads the symbol from argv and configures file logging on import
+    monkeypatch.setattr(sys, 'argv', ['backtest', 'BTC'])
+    # Restored by monkeypatch, so the handler doesn't outlive the test
+    monkeypatch.setattr(logging.getLogger(), 'handlers', [*logging.getLogger().handlers, logging.NullHandler()])
+
+    def frame(seq, channel, events):
+        return json.dumps({"channel": channel, "client_id": "", "timestamp": "", "sequence_num": seq, "events": events})
+
+    recorder = FrameRecorder(str(tmp_path), prefix="btc", codec="gzip").start()
+    recorder.record('coinbase', 'ws', frame(0, "subscriptions", [{"subscriptions": {"level2": ["BTC-USD"]}}]))
+    recorder.record('coinbase', 'ws', frame(1, "l2_data", [{"type": "snapshot", "product_id": "BTC-USD", "updates": [
+        {"side": "bid", "price_level": "99.0", "new_quantity": "1.0"},
+        {"side": "offer", "price_level": "100.0", "new_quantity": "1.0"}]}]))
+    recorder.record('coinbase', 'ws', frame(2, "l2_data", [{"type": "update", "product_id": "BTC-USD", "updates": [
+        {"side": "offer", "price_level": "99.5", "new_quantity": "0.5"}]}]))
+    recorder.close()
+    recorded = [ts_ns for ts_ns, *_ in read_session(str(tmp_path))]
+
+    result = ticks_from_capture(str(tmp_path), "BTC")
+    assert result['exchange'].tolist() == [b'coinbase'] and result['ask'].tolist() == [99.5]
+    assert result['ts'][0] == recorded[-1] / 1e9
+
+
+def test_ticks_from_store_merges_venues(tmp_path):
+    writer = TickStoreWriter("BTC", str(tmp_path), depth=0)
+    for ts, venue, bid, ask in ticks().tolist():
+        writer.append(venue.decode(), bid, ask, ts)
+    asyncio.run(writer.flush())
+    stored = ticks_from_store("BTC", directory=str(tmp_path))
+    assert stored['ts'].tolist() == ticks()['ts'].tolist()
+    assert run_backtest(stored, fees=FEES) == run_backtest(ticks(), fees=FEES)
@@ -0,0 +1,66 @@
+import math
+import random
+
+from src.bbo_index import BestPriceIndex
+from src.spreads import SpreadMatrix
+
+
+def test_best_prices_follow_updates_and_removals():
+    index = BestPriceIndex()
+    index.update('binance', 100.0, 101.0)
+    index.update('kraken', 100.5, 100.8)
+    index.update('coinbase', 99.0, 102.0)
+    assert index.best_bid() == ('kraken', 100.5)
+    assert index.best_ask() == ('kraken', 100.8)
+
+    index.update('kraken', 99.5, 101.5)
+    assert index.best_bid() == ('binance', 100.0)
+    assert index.best_ask() == ('binance', 101.0)
+
+    index.remove('binance')
+    assert index.best_bid() == ('kraken', 99.5)
+    assert index.best_ask() == ('kraken', 101.5)
+    assert len(index) == 2
+
+
+def test_incomplete_or_invalid_prices_are_not_indexed():
+    index = BestPriceIndex()
+    index.update('binance', None, 101.0)
+    index.update('kraken', 0, 100.8)
+    assert index.best_bid() is None
+    assert index.best_ask() == ('kraken', 100.8)
+    index.remove('bybit')
+    assert 'binance' not in index
+
+
+def test_best_pair_is_net_of_fees_and_skips_same_venue():
+    index = BestPriceIndex({'binance': 0.001, 'kraken': 0.0026})
+    index.update('binance', 100.0, 100.1)
+    assert index.best_pair() is None
+    index.update('kraken', 101.0, 101.2)
+    buy, sell, net_spread = index.best_pair()
+    assert (buy, sell) == ('binance', 'kraken')
+    assert math.isclose(net_spread, 101.0 * (1 - 0.0026) - 100.1 * (1 + 0.001))
+    # kraken now has both the best bid and the best ask: the pair falls back to a runner-up
+    index.update('kraken', 103.0, 99.0)
+    assert index.best_pair()[:2] in (('kraken', 'binance'), ('binance', 'kraken'))
+
+
+def test_best_pair_matches_spread_matrix():
+    random.seed(7)
+    venues = [f"venue{i}" for i in range(6)]
+    fees = {v: random.choice((0.0006, 0.001, 0.0026)) for v in venues}
+    index = BestPriceIndex(fees)
+    matrix = SpreadMatrix(fees)
+    for _ in range(2000):
+        venue = random.choice(venues)
+        if random.random() < 0.1:
+            index.remove(venue)
+            matrix.remove(venue)
+        else:
+            bid = 100 + random.uniform(-1, 1)
+            ask = bid + random.uniform(0.01, 0.5)
+            index.update(venue, bid, ask)
+            matrix.update(venue, bid, ask)
+        expected = matrix.best_pair()
+        assert index.best_pair() == expected
@@ -0,0 +1,46 @@
+from src.decoders import (
+    binance_decoder, kraken_decoder, kucoin_decoder, bybit_decoder,
+    BinanceDepth, KrakenMessage, KucoinMessage, BybitMessage, iso_timestamp,
+)
+
+
+def test_binance_depth_keeps_string_levels():
+    frame = b'{"e":"depthUpdate","E":1,"s":"BTCUSDT","U":10,"u":12,"b":[["65000.10","0.5"]],"a":[["65000.20","0"]]}'
+    data = binance_decoder.decode(frame)
+    assert isinstance(data, BinanceDepth)
+    assert (data.first_update_id, data.final_update_id) == (10, 12)
+    assert data.bids == [("65000.10", "0.5")]
+
+
+def test_kraken_prices_keep_exact_text():
+    frame = ('{"channel":"book","type":"update","data":[{"symbol":"BTC/USD",'
+             '"bids":[{"price":65000.10,"qty":0.50000000}],"asks":[],"checksum":123}]}')
+    data = kraken_decoder.decode(frame)
+    assert isinstance(data, KrakenMessage)
+    level = data.data[0].bids[0]
+    assert (str(level.price), str(level.qty)) == ("65000.10", "0.50000000")
+    assert data.data[0].checksum == 123
+
+
+def test_kucoin_welcome_and_level2():
+    assert kucoin_decoder.decode('{"id":"x","type":"welcome"}').data is None
+    frame = ('{"type":"message","topic":"/market/level2:BTC-USDT","subject":"trade.l2update",'
+             '"data":{"changes":{"asks":[["65000.2","0.1","7"]],"bids":[]},'
+             '"sequenceStart":7,"sequenceEnd":7,"symbol":"BTC-USDT","time":1}}')
+    data = kucoin_decoder.decode(frame)
+    assert isinstance(data, KucoinMessage)
+    assert data.data.sequence_end == 7
+    assert data.data.changes.asks == [("65000.2", "0.1", "7")]
+
+
+def test_unexpected_frame_falls_back_to_dict():
+    data = bybit_decoder.decode('{"topic":123}')
+    assert not isinstance(data, BybitMessage)
+    assert data == {"topic": 123}
+
+
+def test_iso_timestamp_to_epoch():
+    # Coinbase sends nanoseconds; microsecond precision is kept
+    assert iso_timestamp("2023-11-14T22:13:20.123456789Z") == 1700000000.123456
+    assert iso_timestamp("") is None
+    assert iso_timestamp("not a date") is None
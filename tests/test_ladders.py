@@ -0,0 +1,76 @@
+import random
+
+import numpy as np
+import pytest
+
+from src.ladders import fill_curve, ladder_arrays, pair_size
+from src.orderbook import OrderBook
+
+
+def make_book(mid, levels):
+    order_book = OrderBook(2, 8)
+    order_book.load(
+        [(f"{mid - (i + 1) * 0.5:.2f}", f"{random.uniform(0.01, 1):.8f}") for i in range(levels)],
+        [(f"{mid + (i + 1) * 0.5:.2f}", f"{random.uniform(0.01, 1):.8f}") for i in range(levels)],
+    )
+    return order_book
+
+
+def ladder(asks=(), bids=()):
+    """(bid_prices, bid_sizes, ask_prices, ask_sizes) desde listas [(price, size), ...]"""
+    bids, asks = np.array(bids, dtype=float).reshape(-1, 2), np.array(asks, dtype=float).reshape(-1, 2)
+    return bids[:, 0], bids[:, 1], asks[:, 0], asks[:, 1]
+
+
+def test_ladder_arrays_match_levels():
+    order_book = make_book(100.0, 5)
+    bid_prices, bid_sizes, ask_prices, ask_sizes = ladder_arrays(order_book, 3)
+    assert list(zip(bid_prices, bid_sizes)) == pytest.approx([(float(p), float(q)) for p, q in order_book.top_bids(3)])
+    assert list(zip(ask_prices, ask_sizes)) == pytest.approx([(float(p), float(q)) for p, q in order_book.top_asks(3)])
+
+
+def test_fill_curve():
+    prices = np.array([100.0, 101.0])
+    sizes = np.array([1.0, 2.0])
+    notional = fill_curve(prices, sizes, np.array([0.5, 1.0, 2.0, 3.0, 3.5]))
+    assert notional[:4] == pytest.approx([50.0, 100.0, 201.0, 302.0])
+    assert np.isnan(notional[4])
+
+
+def test_pair_size_walks_levels_until_unprofitable():
+    buy = ladder(asks=[(100.0, 1.0), (100.5, 2.0), (102.0, 5.0)])
+    sell = ladder(bids=[(101.5, 0.5), (101.0, 2.0), (100.0, 5.0)])
+    result = pair_size(buy, sell, 0.0, 0.0)
+    # 0.5 @ 100 vs 101.5, 0.5 @ 100 vs 101, 1.5 @ 100.5 vs 101; then 102 > 100 stops
+    assert result['size'] == pytest.approx(2.5)
+    assert result['buy_vwap'] == pytest.approx((1.0 * 100 + 1.5 * 100.5) / 2.5)
+    assert result['sell_vwap'] == pytest.approx((0.5 * 101.5 + 2.0 * 101) / 2.5)
+    assert result['profit'] == pytest.approx(0.5 * 1.5 + 0.5 * 1.0 + 1.5 * 0.5)
+
+
+def test_pair_size_fees_cut_the_walk():
+    buy = ladder(asks=[(100.0, 1.0), (100.5, 1.0)])
+    sell = ladder(bids=[(101.0, 2.0)])
+    # 0.3% per side: 101 * 0.997 = 100.697 > 100.3 but < 100.8015
+    result = pair_size(buy, sell, 0.003, 0.003)
+    assert result['size'] == pytest.approx(1.0)
+    assert result['profit'] == pytest.approx(101 * 0.997 - 100 * 1.003)
+
+
+def test_pair_size_without_profitable_level():
+    assert pair_size(ladder(asks=[(101.0, 1.0)]), ladder(bids=[(100.0, 1.0)]), 0.0, 0.0) is None
+    assert pair_size(ladder(), ladder(bids=[(100.0, 1.0)]), 0.0, 0.0) is None
+
+
+def test_pair_size_on_crossed_books():
+    random.seed(5)
+    buy_book = make_book(99.0, 20)
+    sell_book = make_book(101.0, 20)
+    result = pair_size(ladder_arrays(buy_book, 20), ladder_arrays(sell_book, 20), 0.0006, 0.001)
+    assert result is not None and result['profit'] > 0
+    assert result['buy_vwap'] < result['sell_vwap']
+    # Not a single extra level pays: the best size is at a level boundary of one of the ladders
+    _, _, ask_prices, ask_sizes = ladder_arrays(buy_book, 20)
+    bid_prices, bid_sizes, _, _ = ladder_arrays(sell_book, 20)
+    boundaries = np.concatenate((np.cumsum(ask_sizes), np.cumsum(bid_sizes)))
+    assert np.isclose(boundaries, result['size']).any()
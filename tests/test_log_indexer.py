@@ -0,0 +1,83 @@
+import os
+from datetime import datetime, timedelta
+
+from src.log_indexer import LogIndexer, classify_error
+
+
+def ts(minutes_ago=0):
+    return (datetime.now() - timedelta(minutes=minutes_ago)).strftime('%Y-%m-%d %H:%M:%S,000')
+
+
+def opportunity(profit, minutes_ago=0, symbol="BTC"):
+    return (f"{ts(minutes_ago)} - INFO - {symbol} Arbitrage opportunity! Profit: {profit} USDT | "
+            f"Buy on binance at 100.0 | Sell on bybit at 101.0\n")
+
+
+def error(minutes_ago=0, module="live_price_binance_ws"):
+    return f"{ts(minutes_ago)} - {module} - ERROR - boom\n"
+
+
+def test_incremental_and_partial_lines(tmp_path):
+    path = tmp_path / "arb_op_btc.log"
+    path.write_text(opportunity(1.5) + opportunity(2.5))
+    index = LogIndexer(str(tmp_path))
+    index.poll()
+    by_symbol, recent = index.opportunities_summary()
+    assert by_symbol == {'BTC': {'count': 2, 'total_profit': 4.0, 'best_profit': 2.5}}
+    assert recent[0]['profit'] == 2.5 and recent[0]['spread_pct'] == 1.0
+
+    # A half-written line is not counted until it is completed
+    line = opportunity(7.0)
+    with open(path, 'a') as f:
+        f.write(line[:30])
+    index.poll()
+    assert index.opportunities_summary()[0]['BTC']['count'] == 2
+    with open(path, 'a') as f:
+        f.write(line[30:])
+    index.poll()
+    assert index.opportunities_summary()[0]['BTC'] == {'count': 3, 'total_profit': 11.0, 'best_profit': 7.0}
+
+
+def test_rotation_and_truncation(tmp_path):
+    path = tmp_path / "arb_op_eth.log"
+    path.write_text(opportunity(1.0, symbol="ETH") + error())
+    index = LogIndexer(str(tmp_path))
+    index.poll()
+
+    os.rename(path, tmp_path / "arb_op_eth.log.1")
+    path.write_text(opportunity(3.0, symbol="ETH"))
+    index.poll()
+    assert index.opportunities_summary()[0]['ETH']['count'] == 2
+
+    path.write_text("")
+    index.poll()
+    with open(path, 'a') as f:
+        f.write(opportunity(4.0, symbol="ETH"))
+    index.poll()
+    assert index.opportunities_summary()[0]['ETH'] == {'count': 3, 'total_profit': 8.0, 'best_profit': 4.0}
+    assert index.error_summary()[0] == {'ETH-Binance': 1}
+
+
+def test_window_expiry(tmp_path):
+    (tmp_path / "arb_op_btc.log").write_text(opportunity(9.0, minutes_ago=25 * 60) + opportunity(1.0))
+    (tmp_path / "btc_bot.log").write_text(error(minutes_ago=25 * 60) + error(module="live_price_bybit_ws"))
+    index = LogIndexer(str(tmp_path))
+    index.poll()
+    assert index.opportunities_summary()[0] == {'BTC': {'count': 1, 'total_profit': 1.0, 'best_profit': 1.0}}
+    counts, recent = index.error_summary()
+    assert counts == {'BTC-Bybit': 1}
+    assert recent[-1]['exchange'] == 'Bybit'
+
+
+def test_initial_scan_skips_partial_first_line(tmp_path):
+    path = tmp_path / "arb_op_btc.log"
+    path.write_text(opportunity(5.0) * 3)
+    line_length = len(opportunity(5.0))
+    index = LogIndexer(str(tmp_path), initial_scan_bytes=line_length + 10)
+    index.poll()
+    assert index.opportunities_summary()[0]['BTC']['count'] == 1
+
+
+def test_classify_error():
+    assert classify_error("arb_op_eth.log", "x live_price_adv_cb_ws ERROR") == "ETH-Coinbase"
+    assert classify_error("other.log", "ERROR") == "Unknown-Unknown"
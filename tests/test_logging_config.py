@@ -0,0 +1,45 @@
+import logging
+
+from src.logging_config import HotPathLog
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_prints_when_not_quiet(capsys):
+    hot_log = HotPathLog(logging.getLogger("test.hot"), quiet=False)
+    hot_log("bbo", "%s Binance: highest bid=%s", "BTC", 1.5)
+    hot_log("plain", "100% literal")
+    assert capsys.readouterr().out == "BTC Binance: highest bid=1.5\n100% literal\n"
+
+
+def test_quiet_rate_limits_per_key(monkeypatch, caplog, capsys):
+    clock = Clock()
+    monkeypatch.setattr("src.logging_config.time.monotonic", clock)
+    hot_log = HotPathLog(logging.getLogger("test.hot"), interval=5.0, quiet=True)
+    with caplog.at_level(logging.INFO, logger="test.hot"):
+        for i in range(10):
+            hot_log("bbo", "bid=%s", i)
+        hot_log("other", "skip")
+        clock.now = 5.0
+        hot_log("bbo", "bid=%s", 10)
+    assert [r.getMessage() for r in caplog.records] == ["bid=0", "skip", "bid=10 (9 similar suppressed)"]
+    # INFO, the level setup_logging leaves the loggers at
+    assert {r.levelno for r in caplog.records} == {logging.INFO}
+    assert capsys.readouterr().out == ""
+
+
+def test_quiet_skips_formatting_when_info_disabled(caplog):
+    class Unprintable:
+        def __str__(self):
+            raise AssertionError("formatted")
+
+    hot_log = HotPathLog(logging.getLogger("test.hot.off"), quiet=True)
+    with caplog.at_level(logging.WARNING, logger="test.hot.off"):
+        hot_log("bbo", "%s", Unprintable())
+    assert not caplog.records
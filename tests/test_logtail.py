@@ -0,0 +1,31 @@
+import random
+
+import pytest
+
+from src.logtail import tail_lines
+
+
+def readlines_tail(path, n):
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        return f.readlines()[-n:]
+
+
+@pytest.mark.parametrize("trailing_newline", [True, False])
+@pytest.mark.parametrize("block_size", [7, 64, 65536])
+def test_matches_readlines(tmp_path, trailing_newline, block_size):
+    random.seed(block_size)
+    lines = [f"2024-01-01 00:00:{i % 60:02d},000 INFO x {'ñ' * random.randint(0, 40)}" for i in range(300)]
+    text = "\n".join(lines) + ("\n" if trailing_newline else "")
+    path = tmp_path / "arb_op_btc.log"
+    path.write_bytes(text.encode())
+    for n in (1, 10, 299, 300, 1000):
+        assert tail_lines(path, n, block_size=block_size) == readlines_tail(path, n)
+
+
+def test_crlf_and_empty(tmp_path):
+    path = tmp_path / "a.log"
+    path.write_bytes(b"one\r\ntwo\r\n\r\nthree")
+    assert tail_lines(path, 3, block_size=4) == readlines_tail(path, 3)
+    path.write_bytes(b"")
+    assert tail_lines(path, 5) == []
+    assert tail_lines(path, 0) == []
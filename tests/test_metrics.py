@@ -0,0 +1,83 @@
+import random
+
+from src.metrics import LatencyRecorder, LatencyHistogram, VenueLatency
+
+
+def test_latency_summary_in_ms():
+    recorder = LatencyRecorder("test", window=100)
+    assert recorder.summary() is None
+    for i in range(1, 101):
+        recorder.record(i / 1000)
+    stats = recorder.summary()
+    assert stats['count'] == 100
+    assert round(stats['p50'], 6) == 51
+    assert round(stats['max'], 6) == 100
+
+
+def test_window_is_bounded():
+    recorder = LatencyRecorder("test", window=10)
+    for i in range(50):
+        recorder.record(i)
+    assert len(recorder.samples) == 10
+    assert recorder.count == 50
+    assert recorder.percentile(0) == 40
+
+
+def test_histogram_percentiles_within_bucket_precision():
+    rng = random.Random(1)
+    samples = sorted(rng.lognormvariate(-5, 1.5) for _ in range(20000))
+    histogram = LatencyHistogram()
+    for value in samples:
+        histogram.record(value)
+    for p in (50, 90, 99, 99.9):
+        exact = samples[int(len(samples) * p / 100) - 1]
+        assert abs(histogram.percentile(p) / exact - 1) < 0.02
+    assert histogram.percentile(100) == histogram.max == samples[-1]
+
+
+def test_histogram_cumulative_buckets():
+    rng = random.Random(2)
+    samples = [rng.expovariate(1 / 0.01) for _ in range(5000)]
+    histogram = LatencyHistogram()
+    for sample in samples:
+        histogram.record(sample)
+    bounds = (0.001, 0.01, 0.1)
+    for bound, count in zip(bounds, histogram.cumulative(bounds)):
+        exact = sum(sample <= bound for sample in samples)
+        assert exact <= count <= sum(sample <= bound * 1.016 for sample in samples)
+    assert abs(histogram.sum - sum(samples)) < 1e-9
+
+
+def test_histogram_clamps_negative_and_merges():
+    first, second = LatencyHistogram(), LatencyHistogram()
+    first.record(-0.002)
+    first.record(0.001)
+    second.record(0.5)
+    merged = LatencyHistogram.from_dict(first.to_dict()).merge(second)
+    stats = merged.summary()
+    assert stats['count'] == 3 and stats['below_zero'] == 1
+    # Percentiles report the highest value of their bucket, within 1.6%
+    assert 1.0 <= stats['p50'] < 1.016 and stats['max'] == 500.0
+    assert LatencyHistogram().summary() is None
+
+
+def test_venue_latency_stages():
+    latency = VenueLatency()
+    # Event at 100.0, received 20 ms later, book applied 1 ms after that
+    latency.update('binance', 100.0, 100.02, 100.021)
+    latency.update('binance', 100.01, 100.025, 100.026)
+    latency.update('kraken', None, None, 100.03)
+    latency.evaluated(100.031)
+    snapshot = latency.snapshot()
+    binance = snapshot['binance']
+    assert binance['feed']['count'] == 2 and abs(binance['feed']['max'] - 20) < 0.01
+    assert abs(binance['apply']['p50'] - 1) < 0.05
+    # The oldest pending update of each venue is the one that waited for the detector
+    assert binance['detect']['count'] == 1 and abs(binance['detect']['p50'] - 10) < 0.2
+    assert abs(binance['total']['p50'] - 31) < 0.5
+    assert set(snapshot['kraken']) == {'detect'}
+
+    latency.rotate()
+    assert latency.snapshot()['binance']['feed']['count'] == 2
+    latency.rotate()
+    assert latency.snapshot() == {}
@@ -0,0 +1,87 @@
+import asyncio
+import logging
+import sys
+
+import aiohttp
+import pytest
+
+from src.orderbook import OrderBook
+from src.metrics_server import MetricsServer, render_metrics
+
+
+@pytest.fixture
+def watcher(monkeypatch):
+    # src.main reads the symbol from argv and configures file logging on import
+    monkeypatch.setattr(sys, 'argv', ['metrics', 'BTC'])
+    handler = logging.NullHandler()
+    logging.getLogger().addHandler(handler)
+    from src.replay import replay_watcher
+    yield replay_watcher("BTC")
+    logging.getLogger().removeHandler(handler)
+
+
+def samples(text):
+    return dict(line.rsplit(' ', 1) for line in text.splitlines() if not line.startswith('#'))
+
+
+def test_render_counters_and_gauges(watcher):
+    watcher.messages['binance'] += 3
+    watcher.connects['binance'] += 2
+    watcher.resyncs['binance'] += 1
+    book = OrderBook(2, 8)
+    book.load([("100.00", "1")], [("101.00", "1"), ("102.00", "1")])
+    watcher.set_book('binance', book)
+    watcher.update_price('binance', 100.0, 101.0, event_time=1.0, received=1.01)
+    watcher.set_status('coinbase', 'disconnected')
+    watcher.loop_lag.record(0.002)
+
+    text = render_metrics(watcher)
+    values = samples(text)
+    assert values['arb_messages_total{symbol="BTC",venue="binance"}'] == '3'
+    assert values['arb_ws_connects_total{symbol="BTC",venue="binance"}'] == '2'
+    assert values['arb_resyncs_total{symbol="BTC",venue="binance"}'] == '1'
+    assert values['arb_disconnects_total{symbol="BTC",venue="coinbase"}'] == '1'
+    assert values['arb_venue_up{symbol="BTC",venue="binance"}'] == '1'
+    assert values['arb_venue_up{symbol="BTC",venue="coinbase"}'] == '0'
+    assert values['arb_book_levels{symbol="BTC",venue="binance",side="ask"}'] == '2'
+    assert values['arb_opportunities_total{symbol="BTC"}'] == '0'
+    assert '# TYPE arb_event_loop_lag_seconds histogram' in text
+    assert values['arb_event_loop_lag_seconds_bucket{symbol="BTC",le="0.001"}'] == '0'
+    assert values['arb_event_loop_lag_seconds_bucket{symbol="BTC",le="0.0025"}'] == '1'
+    assert values['arb_event_loop_lag_seconds_bucket{symbol="BTC",le="+Inf"}'] == '1'
+    assert float(values['arb_event_loop_lag_seconds_sum{symbol="BTC"}']) == pytest.approx(0.002)
+    assert values['arb_venue_latency_seconds_count{symbol="BTC",venue="binance",stage="feed"}'] == '1'
+    # Recorders with no samples yet export empty histograms
+    assert values['arb_status_flush_seconds_count{symbol="BTC"}'] == '0'
+
+
+def test_histograms_survive_the_detector_report(watcher):
+    watcher.update_price('binance', 100.0, 101.0, event_time=1.0, received=1.01)
+    watcher.loop_lag.record(0.002)
+    # What check_opportunity_loop does every LATENCY_REPORT_INTERVAL
+    watcher.venue_latency.rotate()
+    watcher.venue_latency.rotate()
+    watcher.loop_lag.reset()
+    watcher.update_price('binance', 100.5, 101.0, event_time=2.0, received=2.01)
+
+    values = samples(render_metrics(watcher))
+    assert values['arb_event_loop_lag_seconds_count{symbol="BTC"}'] == '1'
+    assert values['arb_venue_latency_seconds_count{symbol="BTC",venue="binance",stage="feed"}'] == '2'
+
+
+def test_server_serves_metrics(watcher):
+    async def scrape():
+        runner = await MetricsServer(watcher, host="127.0.0.1", port=0).start()
+        try:
+            host, port = runner.addresses[0][:2]
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"http://{host}:{port}/metrics") as response:
+                    return response.status, response.headers['Content-Type'], await response.text()
+        finally:
+            await runner.cleanup()
+
+    watcher.messages['kraken'] += 1
+    status, content_type, text = asyncio.run(scrape())
+    assert status == 200
+    assert content_type.startswith("text/plain")
+    assert 'arb_messages_total{symbol="BTC",venue="kraken"} 1' in text
@@ -0,0 +1,49 @@
+import asyncio
+import time
+
+from src.opportunity_store import OpportunityStore, OpportunityWriter
+
+
+def write(path, rows):
+    writer = OpportunityWriter(str(path))
+    for row in rows:
+        writer.record(**row)
+    asyncio.run(writer.flush())
+    return writer
+
+
+def test_writer_batches_and_store_queries(tmp_path):
+    path = tmp_path / "data" / "opportunities.db"
+    now = time.time()
+    writer = write(path, [
+        dict(symbol="BTC", buy_exchange="binance", buy_price=100.0, sell_exchange="bybit", sell_price=101.0,
+             profit=1.5, buy_fee=0.001, sell_fee=0.001, latency=0.0002, ts=now - 10,
+             executable={'size': 0.5, 'buy_vwap': 100.1, 'sell_vwap': 100.9, 'profit': 0.3}),
+        dict(symbol="BTC", buy_exchange="coinbase", buy_price=100.0, sell_exchange="bybit", sell_price=102.0,
+             profit=3.0, ts=now - 5),
+        dict(symbol="ETH", buy_exchange="binance", buy_price=10.0, sell_exchange="bybit", sell_price=10.1,
+             profit=0.5, ts=now - 2 * 86400),
+    ])
+    assert writer.written == 3 and not writer.pending
+
+    store = OpportunityStore(str(path))
+    assert store.summary(now - 86400) == {'BTC': {'count': 2, 'total_profit': 4.5, 'best_profit': 3.0}}
+
+    recent = store.history(limit=10)
+    assert [row['profit'] for row in recent] == [3.0, 1.5, 0.5]
+    assert recent[1]['spread_pct'] == 1.0 and recent[1]['size'] == 0.5
+    assert abs(recent[1]['latency_ms'] - 0.2) < 1e-9
+    assert recent[0]['timestamp'][10] == ' ' and ',' in recent[0]['timestamp']
+
+    pair = store.history(buy_exchange="binance", sell_exchange="bybit", since=now - 86400)
+    assert [row['symbol'] for row in pair] == ["BTC"]
+    assert [(row['buy_exchange'], row['count']) for row in store.by_pair(0)] == [("binance", 2), ("coinbase", 1)]
+
+
+def test_failed_write_keeps_batch(tmp_path):
+    blocker = tmp_path / "not_a_dir"
+    blocker.write_text("")
+    writer = OpportunityWriter(str(blocker / "opportunities.db"))
+    writer.record("BTC", "binance", 100.0, "bybit", 101.0, 1.0)
+    asyncio.run(writer.flush())
+    assert len(writer.pending) == 1 and writer.written == 0
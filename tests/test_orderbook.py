@@ -0,0 +1,98 @@
+import pytest
+
+from src.orderbook import OrderBook, to_units, from_units
+
+
+def make_book():
+    order_book = OrderBook()
+    order_book.load(
+        [("100.5", "1.0"), ("100.1", "2.0"), ("99.9", "0.5")],
+        [("100.7", "1.5"), ("101.0", "3.0"), ("100.9", "0.2")],
+    )
+    return order_book
+
+
+def test_best_levels_after_snapshot():
+    order_book = make_book()
+    assert order_book.best_bid() == 100.5
+    assert order_book.best_ask() == 100.7
+    assert order_book.top_bids(2) == [("100.5", "1.0"), ("100.1", "2.0")]
+    assert order_book.top_asks(2) == [("100.7", "1.5"), ("100.9", "0.2")]
+
+
+def test_zero_qty_removes_level():
+    order_book = make_book()
+    order_book.update_bids([("100.5", "0"), ("100.2", "4.0")])
+    order_book.update_asks([("100.7", "0.00000000")])
+    assert order_book.best_bid() == 100.2
+    assert order_book.best_ask() == 100.9
+    assert len(order_book) == 5
+
+
+def test_levels_with_extra_fields():
+    # Kucoin sends (price, qty, sequence)
+    order_book = OrderBook(8, 8)
+    order_book.load([("10", "1", "7")], [("11", "1", "8")])
+    order_book.update_asks([("10.5", "2", "9")])
+    assert order_book.best_ask() == 10.5
+
+
+def test_empty_book():
+    order_book = OrderBook()
+    assert order_book.best_bid() is None
+    assert order_book.best_ask() is None
+
+
+def test_units_round_trip():
+    assert to_units("65000.10", 2) == 6500010
+    assert to_units("0.00100000", 8) == 100000
+    assert to_units("1.50000000", 2) == 150
+    assert from_units(6500010, 2) == "65000.10"
+    assert from_units(100000, 8) == "0.00100000"
+    assert from_units(7, 0) == "7"
+
+
+def test_units_rejects_lost_precision():
+    with pytest.raises(ValueError):
+        to_units("1.005", 2)
+
+
+def test_inferred_precision_keeps_exchange_format():
+    order_book = OrderBook()
+    order_book.load([("105906.7", "0.09440620")], [("105910.0", "0.70000000")])
+    assert (order_book.price_decimals, order_book.qty_decimals) == (1, 8)
+    assert order_book.top_asks(1) == [("105910.0", "0.70000000")]
+    assert order_book.best_ask_ticks() == 1059100
+
+
+def test_max_depth_evicts_worst_level():
+    order_book = OrderBook(1, 1, max_depth=2)
+    order_book.load([("100.0", "1.0"), ("99.0", "1.0")], [("101.0", "1.0"), ("102.0", "1.0")])
+    order_book.set_bid("99.5", "2.0")
+    order_book.set_ask("103.0", "2.0")
+    order_book.trim()
+    assert order_book.top_bids(5) == [("100.0", "1.0"), ("99.5", "2.0")]
+    assert order_book.top_asks(5) == [("101.0", "1.0"), ("102.0", "1.0")]
+
+
+def test_trim_after_insert_before_delete():
+    # A Kraken update may list the insert before the delete that frees its room
+    order_book = OrderBook(1, 1, max_depth=3)
+    order_book.load([("100.0", "1.0"), ("99.0", "1.0"), ("98.0", "1.0")], [("101.0", "1.0")])
+    order_book.update_bids([("97.0", "1.0"), ("99.0", "0.0")])
+    order_book.trim()
+    assert order_book.top_bids(5) == [("100.0", "1.0"), ("98.0", "1.0"), ("97.0", "1.0")]
+
+
+def test_more_decimals_widen_the_book():
+    order_book = OrderBook(2, 2)
+    order_book.load([("100.10", "1.50")], [("100.20", "0.25")])
+    order_book.set_bid("100.125", "0.001")
+    order_book.set_ask("100.15", "2")
+    assert (order_book.price_decimals, order_book.qty_decimals) == (3, 3)
+    assert order_book.top_bids(2) == [("100.125", "0.001"), ("100.100", "1.500")]
+    assert order_book.top_asks(2) == [("100.150", "2.000"), ("100.200", "0.250")]
+    order_book.set_bid("100.125", "0")
+    assert order_book.best_bid() == 100.1
+    with pytest.raises(ValueError):
+        order_book.set_bid("abc", "1")
@@ -0,0 +1,74 @@
+import asyncio
+import gzip
+import json
+
+import pytest
+
+from src.recorder import FrameRecorder, RecordingWebSocket, read_frames, read_session, capture_segments, zstandard, lz4
+
+CODECS = ['gzip'] + (['zstd'] if zstandard is not None else []) + (['lz4'] if lz4 is not None else [])
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_round_trip_and_rotation(tmp_path, codec):
+    recorder = FrameRecorder(str(tmp_path), prefix="btc", codec=codec, segment_bytes=200).start()
+    frames = [('coinbase', 'ws', '{"channel": "l2_data", "n": %d}' % i) for i in range(20)]
+    for frame in frames:
+        recorder.record(*frame)
+    recorder.record('binance', 'snapshot', {'lastUpdateId': 7, 'bids': [["1.0", "2"]], 'asks': []})
+    recorder.record('kraken', 'ws', b'\x00raw bytes')
+    recorder.close()
+
+    assert recorder.recorded == 22 and recorder.dropped == 0
+    assert capture_segments(str(tmp_path), "btc") == recorder.segments
+    records = list(read_session(str(tmp_path), "btc"))
+    assert [(source, channel, payload.decode()) for _, source, channel, payload in records[:20]] == frames
+    assert json.loads(records[20][3]) == {'lastUpdateId': 7, 'bids': [["1.0", "2"]], 'asks': []}
+    assert records[21][1:] == ('kraken', 'ws', b'\x00raw bytes')
+    timestamps = [ts for ts, *_ in records]
+    assert timestamps == sorted(timestamps)
+
+
+def test_truncated_segment_stops_cleanly(tmp_path):
+    recorder = FrameRecorder(str(tmp_path), codec="gzip").start()
+    recorder.record('bybit', 'ws', 'x' * 100)
+    recorder.record('bybit', 'ws', 'y' * 100)
+    recorder.close()
+    path = recorder.segments[0]
+    data = gzip.decompress(open(path, 'rb').read())
+    with gzip.open(path, 'wb') as f:
+        f.write(data[:-10])
+    assert [payload for *_, payload in read_frames(path)] == [b'x' * 100]
+    # A compressed stream that was never closed
+    open(path, 'wb').write(gzip.compress(data)[:-20])
+    assert len(list(read_frames(path))) <= 2
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    recorder = FrameRecorder(str(tmp_path), codec="gzip", queue_size=2)
+    for _ in range(5):
+        recorder.record('binance', 'ws', '{}')
+    assert recorder.dropped == 3
+
+
+def test_recording_websocket_records_recv(tmp_path):
+    class FakeSocket:
+        def __init__(self):
+            self.frames = ['a', 'b']
+
+        async def recv(self):
+            return self.frames.pop(0)
+
+        async def send(self, message):
+            self.sent = message
+
+    recorder = FrameRecorder(str(tmp_path), codec="gzip", queue_size=10)
+    ws = RecordingWebSocket(FakeSocket(), recorder, 'kucoin')
+
+    async def use():
+        await ws.send('ping')
+        return [await ws.recv(), await ws.recv()]
+
+    assert asyncio.run(use()) == ['a', 'b']
+    assert ws.sent == 'ping'
+    assert [item[1:] for item in list(recorder.queue)] == [('kucoin', 'ws', 'a'), ('kucoin', 'ws', 'b')]
@@ -0,0 +1,206 @@
+import asyncio
+import json
+import logging
+import sys
+import threading
+
+import pytest
+
+from src.recorder import FrameRecorder
+from src.replay import ReplayEngine, Sequencer, replay
+
+
+@pytest.fixture
+def main_module(monkeypatch):
+    # src.main reads the symbol from argv and configures file logging on import
+    monkeypatch.setattr(sys, 'argv', ['replay', 'BTC'])
+    handler = logging.NullHandler()
+    logging.getLogger().addHandler(handler)
+    import src.main
+    yield src.main
+    logging.getLogger().removeHandler(handler)
+
+
+def binance(first, last, bids=(), asks=()):
+    return json.dumps({"e": "depthUpdate", "E": 1, "s": "BTCUSDT", "U": first, "u": last,
+                       "b": [list(level) for level in bids], "a": [list(level) for level in asks]})
+
+
+def coinbase(seq, channel, events):
+    return json.dumps({"channel": channel, "client_id": "", "timestamp": "", "sequence_num": seq, "events": events})
+
+
+def capture(tmp_path):
+    """Binance with a sequence gap (desync -> second snapshot) and a cheaper Coinbase book"""
+    recorder = FrameRecorder(str(tmp_path), prefix="btc", codec="gzip").start()
+    rec = recorder.record
+    rec('coinbase', 'ws', coinbase(0, "subscriptions", [{"subscriptions": {"level2": ["BTC-USD"]}}]))
+    rec('binance', 'ws', binance(100, 101))
+    rec('binance', 'snapshot', {"lastUpdateId": 100, "bids": [["200.0", "1.0"]], "asks": [["201.0", "1.0"]]})
+    rec('coinbase', 'ws', coinbase(1, "l2_data", [{"type": "snapshot", "product_id": "BTC-USD", "updates": [
+        {"side": "bid", "price_level": "99.0", "new_quantity": "1.0"},
+        {"side": "offer", "price_level": "100.0", "new_quantity": "1.0"}]}]))
+    rec('binance', 'ws', binance(102, 103, bids=[("200.5", "2.0")]))
+    rec('binance', 'ws', binance(110, 111, bids=[("199.0", "1.0")]))
+    rec('binance', 'snapshot', {"lastUpdateId": 111, "bids": [["202.0", "1.0"]], "asks": [["203.0", "1.0"]]})
+    rec('binance', 'ws', binance(112, 113, asks=[("202.5", "1.0")]))
+    rec('coinbase', 'ws', coinbase(2, "l2_data", [{"type": "update", "product_id": "BTC-USD", "updates": [
+        {"side": "offer", "price_level": "99.5", "new_quantity": "0.5"}]}]))
+    recorder.close()
+
+
+def test_replay_drives_listeners_and_detector(tmp_path, main_module):
+    capture(tmp_path)
+    stats = asyncio.run(replay(str(tmp_path), "BTC", prefix="btc"))
+    assert stats['by_exchange'] == {'binance': 4, 'coinbase': 3}
+    assert stats['connects'] == {'binance': 1, 'coinbase': 1}
+    # The desync consumed the second snapshot and the book continued from it
+    assert stats['snapshots_left'] == {}
+    assert stats['prices'] == {'binance': (202.0, 202.5), 'coinbase': (99.0, 99.5)}
+    assert stats['opportunities'] > 0
+    assert stats['out_of_order'] == 0
+
+
+def test_replay_is_deterministic(tmp_path, main_module):
+    capture(tmp_path)
+    first = asyncio.run(replay(str(tmp_path), "BTC", prefix="btc"))
+    second = asyncio.run(replay(str(tmp_path), "BTC", prefix="btc"))
+    for key in ('by_exchange', 'prices', 'opportunities'):
+        assert first[key] == second[key]
+
+
+def test_replay_watcher_never_starts_recorder(main_module, monkeypatch):
+    from src.replay import replay_watcher
+
+    # As if RECORD_FRAMES=1 and TICK_STORE=1 were set for the live bot
+    monkeypatch.setattr(main_module.LivePriceWatcher.__init__, '__defaults__', (True, True))
+    threads = threading.active_count()
+    watcher = replay_watcher("ETH")
+    assert watcher.recorder is None and watcher.tick_store is None
+    assert threading.active_count() == threads
+
+
+def test_sequencer_keeps_global_order():
+    async def run():
+        sequencer = Sequencer(['a', 'b', 'a', 'b'], patience=1.0)
+        order = []
+
+        async def consume(source):
+            while (index := await sequencer.take(source)) is not None:
+                order.append(index)
+
+        await asyncio.wait_for(asyncio.gather(consume('b'), consume('a')), 2)
+        return order, sequencer
+
+    order, sequencer = asyncio.run(run())
+    assert order == [0, 1, 2, 3]
+    assert sequencer.done.is_set() and sequencer.out_of_order == 0
+
+
+def test_sequencer_skips_a_stalled_source():
+    async def run():
+        sequencer = Sequencer(['a', 'b'], patience=0.01)
+        return await sequencer.take('b'), sequencer
+
+    index, sequencer = asyncio.run(run())
+    assert index == 1 and sequencer.out_of_order == 1 and not sequencer.done.is_set()
+
+
+def test_engine_splits_snapshots_from_frames():
+    engine = ReplayEngine([(1, 'binance', 'ws', b'{}'), (2, 'binance', 'snapshot', b'{"lastUpdateId": 1}')])
+    assert engine.frames == [(1, '{}')]
+    assert list(engine.snapshots['binance']) == [b'{"lastUpdateId": 1}']
+
+
+def kraken_book(kind, bids, asks, checksum):
+    return json.dumps({"channel": "book", "type": kind, "data": [{
+        "symbol": "BTC/USDT", "bids": [{"price": p, "qty": q} for p, q in bids],
+        "asks": [{"price": p, "qty": q} for p, q in asks], "checksum": checksum,
+        "timestamp": "2024-01-01T00:00:00.000000Z"}]})
+
+
+def test_kraken_checksum_mismatch_resubscribes(main_module):
+    from src.kraken_checksum import KrakenChecksum
+    from src.orderbook import OrderBook
+    from src.replay import replay_watcher
+
+    # The second snapshot uses a different number format than the first; the checksum must follow it
+    expected = OrderBook()
+    expected.load([("100.50", "1.000")], [("101.25", "2.000")])
+    expected.set_bid("100.75", "0.500")
+    ack = {"method": "subscribe", "success": True, "result": {"channel": "book", "depth": 10, "snapshot": True}}
+    frames = [
+        json.dumps(ack),
+        kraken_book("snapshot", [("100.5", "1.0")], [("101.2", "2.0")], 0),
+        kraken_book("update", [("100.6", "1.0")], [], 1),
+        json.dumps({**ack, "method": "unsubscribe"}),
+        json.dumps(ack),
+        kraken_book("snapshot", [("100.50", "1.000")], [("101.25", "2.000")], 0),
+        kraken_book("update", [("100.75", "0.500")], [], KrakenChecksum(expected).compute()),
+    ]
+    watcher = replay_watcher("BTC")
+    engine = ReplayEngine([(i, 'kraken', 'ws', frame.encode()) for i, frame in enumerate(frames)])
+    asyncio.run(engine.run(watcher, ['kraken'], detector=False))
+    assert watcher.resyncs['kraken'] == 1
+    assert watcher.connects['kraken'] == 1
+    assert watcher.prices['kraken']['bid'] == 100.75
+    assert watcher.get_status('kraken') == 'connected'
+
+
+def test_detector_records_each_episode_once(main_module):
+    from src.replay import replay_watcher
+
+    async def run():
+        watcher = replay_watcher("BTC")
+        detector = asyncio.create_task(main_module.check_opportunity_loop(watcher))
+
+        async def tick(exchange, bid, ask):
+            watcher.update_price(exchange, bid, ask)
+            for _ in range(3):
+                await asyncio.sleep(0)
+
+        await tick('coinbase', 99.0, 100.0)
+        for i in range(50):
+            # The same pair stays profitable while its prices keep moving
+            await tick('binance', 200.0 + i, 201.0 + i)
+        await tick('binance', 99.5, 100.5)  # closes the episode
+        await tick('binance', 200.0, 201.0)  # opens a new one
+        detector.cancel()
+        return watcher.opportunities.recorded
+
+    assert asyncio.run(run()) == 2
+
+
+def test_coinbase_sequence_mismatch_keeps_detector_alive(main_module):
+    from src.replay import replay_watcher
+
+    def cb_book(seq, kind, bid, ask):
+        return coinbase(seq, "l2_data", [{"type": kind, "product_id": "BTC-USD", "updates": [
+            {"side": "bid", "price_level": bid, "new_quantity": "1.0"},
+            {"side": "offer", "price_level": ask, "new_quantity": "1.0"}]}])
+
+    subscribed = coinbase(0, "subscriptions", [{"subscriptions": {"level2": ["BTC-USD"]}}])
+    frames = [
+        ('coinbase', 'ws', subscribed),
+        ('binance', 'ws', binance(100, 101)),
+        ('binance', 'snapshot', {"lastUpdateId": 100, "bids": [["200.0", "1.0"]], "asks": [["201.0", "1.0"]]}),
+        ('coinbase', 'ws', cb_book(1, "snapshot", "99.0", "100.0")),
+        ('coinbase', 'ws', cb_book(2, "update", "99.1", "100.1")),
+        ('binance', 'ws', binance(102, 103, bids=[("200.5", "1.0")])),
+        # Sequence gap: the listener drops its prices and reconnects
+        ('coinbase', 'ws', cb_book(9, "update", "99.2", "100.2")),
+        # The detector evaluates while coinbase is gone
+        *[('binance', 'ws', binance(104 + 2 * i, 105 + 2 * i, bids=[(f"200.6{i}", "1.0")])) for i in range(5)],
+        ('coinbase', 'ws', subscribed),
+        ('coinbase', 'ws', cb_book(1, "snapshot", "99.0", "100.0")),
+        ('coinbase', 'ws', cb_book(2, "update", "99.3", "100.3")),
+        ('binance', 'ws', binance(114, 115, bids=[("200.7", "1.0")])),
+    ]
+    records = [(i, source, channel, (frame if isinstance(frame, str) else json.dumps(frame)).encode())
+               for i, (source, channel, frame) in enumerate(frames)]
+    watcher = replay_watcher("BTC")
+    stats = asyncio.run(ReplayEngine(records).run(watcher, ['binance', 'coinbase']))
+    assert watcher.resyncs['coinbase'] == 1
+    assert stats['prices']['coinbase'] == (99.3, 100.0)
+    # One episode before the gap, a new one after the resync: the detector survived the dropped venue
+    assert stats['opportunities'] == 2
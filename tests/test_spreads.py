@@ -0,0 +1,42 @@
+import json
+import math
+
+from src.spreads import SpreadMatrix, load_taker_fees
+
+
+def test_net_spread_uses_each_venue_fee():
+    matrix = SpreadMatrix({'binance': 0.001, 'kraken': 0.0026})
+    matrix.update('binance', 100.0, 100.1)
+    matrix.update('kraken', 101.0, 101.2)
+    # Buy binance ask, sell kraken bid
+    assert math.isclose(matrix.get('binance', 'kraken'), 101.0 * (1 - 0.0026) - 100.1 * (1 + 0.001))
+    assert matrix.get('binance', 'binance') is None
+    top = matrix.top_pairs(5)
+    assert [(p['buy'], p['sell']) for p in top] == [('binance', 'kraken'), ('kraken', 'binance')]
+
+
+def test_tick_updates_only_that_venue_and_removal_drops_pairs():
+    matrix = SpreadMatrix({}, default_fee=0.0)
+    matrix.update('a', 100.0, 101.0)
+    matrix.update('b', 102.0, 103.0)
+    matrix.update('c', 99.0, 100.0)
+    assert matrix.top_pairs(1)[0] == {'buy': 'c', 'sell': 'b', 'net_spread': 2.0, 'net_spread_pct': 2.0}
+    assert matrix.best_pair() == ('c', 'b', 2.0)
+    matrix.update('c', 99.0, 104.0)
+    assert matrix.get('c', 'b') == -2.0
+    assert matrix.get('a', 'b') == 1.0
+    matrix.remove('b')
+    assert matrix.get('a', 'b') is None
+    assert all('b' not in (p['buy'], p['sell']) for p in matrix.top_pairs(10))
+    assert len(matrix.top_pairs(10)) == 2
+    matrix.remove('a')
+    assert matrix.best_pair() is None
+
+
+def test_load_taker_fees_with_overrides(tmp_path):
+    path = tmp_path / "fees.json"
+    path.write_text(json.dumps({'binance': {'fees': {'taker': 0.001}}, 'coinbase': {'fees': {'taker': 0.012}}}))
+    assert load_taker_fees(path, {'coinbase': 0.0006}) == {'binance': 0.001, 'coinbase': 0.0006}
+    assert load_taker_fees(tmp_path / "missing.json") == {}
+    # Without USE_EXCHANGE_FEES there is no fee file: only the overrides
+    assert load_taker_fees(None, {'kraken': 0.0016}) == {'kraken': 0.0016}
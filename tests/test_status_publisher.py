@@ -0,0 +1,27 @@
+import asyncio
+
+from src.status_publisher import StatusPublisher
+
+
+class Watcher:
+    symbol = "BTC"
+
+    def __init__(self):
+        self.written = []
+
+    def status_data(self):
+        return {'symbol': self.symbol, 'exchanges': {}}
+
+    def write_status_file(self, status_data):
+        self.written.append(status_data)
+
+
+def test_flush_coalesces_and_falls_back_to_file_without_redis():
+    watcher = Watcher()
+    publisher = StatusPublisher(watcher, redis_url="redis://localhost:1/0")
+    for _ in range(100):
+        publisher.mark_dirty()
+    asyncio.run(publisher.flush())
+    asyncio.run(publisher.flush())
+    assert watcher.written == [{'symbol': 'BTC', 'exchanges': {}}]
+    assert publisher.flush_latency.count == 1
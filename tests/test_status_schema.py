@@ -0,0 +1,31 @@
+from src.status_schema import flatten_status, unflatten_status, changed_fields
+
+
+STATUS = {
+    'symbol': 'BTC',
+    'last_update': 1700000000.123456,
+    'last_update_readable': '2023-11-14 22:13:20',
+    'exchanges': {
+        'binance': {'bid': 65000.1, 'ask': 65000.2, 'timestamp': 1700000000.1, 'status': 'connected'},
+        'kraken': {'bid': None, 'ask': None, 'timestamp': None, 'status': 'disconnected'},
+    },
+    'top_pairs': [{'buy': 'binance', 'sell': 'kraken', 'net_spread': 1.5, 'net_spread_pct': 0.01}],
+}
+
+
+def test_hash_round_trip_matches_json_blob():
+    assert unflatten_status(flatten_status(STATUS)) == STATUS
+
+
+def test_only_changed_fields_are_sent():
+    before = flatten_status(STATUS)
+    ticked = dict(STATUS, exchanges=dict(STATUS['exchanges'], binance=dict(STATUS['exchanges']['binance'], bid=65000.3)))
+    assert changed_fields(before, flatten_status(ticked)) == {'binance:bid': '65000.3'}
+
+
+def test_diff_only_contains_changed_parts():
+    from src.status_schema import status_diff
+    assert status_diff({'binance:bid': '65000.3', 'last_update': '1.5'}) == {
+        'last_update': 1.5,
+        'exchanges': {'binance': {'bid': 65000.3}},
+    }
@@ -0,0 +1,22 @@
+from src.status_stream import StatusBroadcaster, sse_event
+
+
+def test_clients_get_snapshot_then_broadcasts():
+    broadcaster = StatusBroadcaster(None, ['BTC'])
+    broadcaster.state = {'BTC': {'symbol': 'BTC', 'last_update': '1.0', 'binance:status': 'connected'}}
+    stream = broadcaster.stream()
+    assert next(stream).startswith('event: snapshot\n')
+    broadcaster.broadcast(sse_event('diff', {'BTC': {'exchanges': {}}}))
+    assert next(stream) == 'event: diff\ndata: {"BTC": {"exchanges": {}}}\n\n'
+    stream.close()
+    assert not broadcaster.clients
+
+
+def test_slow_client_is_dropped():
+    broadcaster = StatusBroadcaster(None, ['BTC'], client_queue=2)
+    stream = broadcaster.stream()
+    next(stream)
+    for i in range(3):
+        broadcaster.broadcast(sse_event('diff', {'i': i}))
+    assert not broadcaster.clients
+    assert list(stream) == []
@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import math
+import os
+import sys
+
+import numpy as np
+
+from src.orderbook import OrderBook
+from src.tick_store import TickStore, TickStoreWriter, open_segment
+
+DAY = 86400
+T0 = 1700006400.0  # 2023-11-15 00:00 UTC
+
+
+def write(directory, rows, depth=0, book=None):
+    writer = TickStoreWriter("BTC", str(directory), depth=depth)
+    for venue, ts, bid, ask in rows:
+        writer.append(venue, bid, ask, ts, book)
+    asyncio.run(writer.flush())
+    return writer
+
+
+def test_writes_columns_per_venue_and_day_and_scans_by_range(tmp_path):
+    rows = [('binance', T0 + i, 100.0 + i, 101.0 + i) for i in range(10)]
+    rows += [('binance', T0 + DAY + i, 200.0 + i, 201.0 + i) for i in range(5)]
+    rows += [('kraken', T0 + 2.5, 99.0, None)]
+    writer = write(tmp_path, rows)
+    assert writer.written == 16
+    assert sorted(os.listdir(tmp_path / "BTC" / "binance")) == ["20231115.d0", "20231116.d0"]
+    assert sorted(os.listdir(tmp_path / "BTC" / "binance" / "20231115.d0")) == ["ask", "bid", "meta.json", "ts"]
+
+    store = TickStore(str(tmp_path))
+    assert store.venues("BTC") == ["binance", "kraken"]
+    data = store.scan("BTC", "binance", T0 + 3, T0 + 6)
+    assert data['ts'].tolist() == [T0 + 3, T0 + 4, T0 + 5]
+    assert data['bid'].tolist() == [103.0, 104.0, 105.0]
+    # Single segment: a view over the memory map, nothing deserialized
+    assert isinstance(data['bid'].base, np.memmap) or isinstance(data['bid'], np.memmap)
+
+    across = store.scan("BTC", "binance", T0 + 8, T0 + DAY + 2)
+    assert across['bid'].tolist() == [108.0, 109.0, 200.0, 201.0]
+    assert math.isnan(store.scan("BTC", "kraken")['ask'][0])
+    assert store.scan("BTC", "bybit")['ts'].size == 0
+
+
+def test_depth_levels_and_partial_rows(tmp_path):
+    book = OrderBook(2, 4)
+    book.load([("100.00", "1.5"), ("99.50", "2")], [("101.00", "0.5")])
+    write(tmp_path, [('coinbase', T0, 100.0, 101.0)], depth=3, book=book)
+    write(tmp_path, [('coinbase', T0 + 1, 100.0, 101.0)], depth=3)
+    segment = tmp_path / "BTC" / "coinbase" / "20231115.d3"
+    # A crash between column appends leaves ts short: the row is not visible yet
+    with open(segment / "bid", 'ab') as f:
+        f.write(np.array([1.0]).tobytes())
+
+    data = TickStore(str(tmp_path)).scan("BTC", "coinbase", columns=('bid', 'bids', 'asks'))
+    assert len(data['ts']) == 2
+    assert data['bids'][0, :2].tolist() == [[100.0, 1.5], [99.5, 2.0]] and math.isnan(data['bids'][0, 2, 0])
+    assert data['asks'][0, 0].tolist() == [101.0, 0.5]
+    assert np.isnan(data['bids'][1]).all()
+    assert set(open_segment(str(segment), ('ts',))) == {'ts'}
+
+
+def test_history_downsamples_to_last_tick_per_bucket(tmp_path):
+    write(tmp_path, [('binance', T0 + i * 0.1, 100.0 + i, 101.0 + i) for i in range(100)])
+    history = TickStore(str(tmp_path)).history("BTC", T0, T0 + 10, points=10)
+    assert len(history['binance']['ts']) == 10
+    assert history['binance']['bid'][-1] == 199.0
+
+
+def test_spread_stats_sampled_on_a_grid(tmp_path):
+    write(tmp_path, [
+        ('a', T0, 100.0, 101.0),
+        ('b', T0, 100.0, 101.0),
+        ('b', T0 + 10, 103.0, 104.0),  # buy a at 101, sell b at 103 for 5 s
+        ('b', T0 + 15, 100.0, 101.0),
+    ])
+    stats = TickStore(str(tmp_path)).spread_stats("BTC", T0, T0 + 20, fees={}, resolution=0.5)
+    best = stats[0]
+    assert (best['buy'], best['sell']) == ('a', 'b')
+    assert best['max'] == 2.0 and best['positive_seconds'] == 5.0 and best['positive_fraction'] == 0.25
+    assert math.isclose(best['mean'], (10 * -1.0 + 5 * 2.0 + 5 * -1.0) / 20)
+    # A venue with no ticks yet is left out of every pair
+    assert TickStore(str(tmp_path)).spread_stats("BTC", T0 - 5, T0, fees={}) == []
+
+
+def test_disconnect_writes_a_nan_row(tmp_path, monkeypatch):
+    # src.main reads the symbol from argv and configures file logging on import
+    monkeypatch.setattr(sys, 'argv', ['ticks', 'BTC'])
+    monkeypatch.setattr(logging.getLogger(), 'handlers', [*logging.getLogger().handlers, logging.NullHandler()])
+    from src.replay import replay_watcher
+
+    watcher = replay_watcher("BTC")
+    watcher.tick_store = TickStoreWriter("BTC", str(tmp_path), depth=0)
+    watcher.update_price('a', 100.0, 101.0)
+    watcher.update_price('b', 103.0, 104.0)
+    watcher.set_status('b', 'disconnected')
+    watcher.set_status('b', 'disconnected')  # already out: no second row
+    assert [fields['bid'] for fields in watcher.tick_stream.pending] == ['100.0', '103.0', 'None']
+    asyncio.run(watcher.tick_store.flush())
+
+    store = TickStore(str(tmp_path))
+    data = store.scan("BTC", "b")
+    assert data['bid'][0] == 103.0 and math.isnan(data['bid'][1]) and math.isnan(data['ask'][1])
+    # After the disconnect b is on neither side: only the seconds before it count
+    start = store.scan("BTC", "a")['ts'][0]
+    stats = {(row['buy'], row['sell']): row for row in store.spread_stats("BTC", start, data['ts'][1] + 10, fees={}, resolution=0.001)}
+    assert stats[('a', 'b')]['positive_seconds'] < 1.0
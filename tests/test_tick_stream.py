@@ -0,0 +1,42 @@
+import asyncio
+
+from src.orderbook import OrderBook
+from src.tick_stream import TickStream, parse_tick
+
+
+class Watcher:
+    symbol = "BTC"
+
+    def __init__(self):
+        self.books = {}
+
+
+class Publisher:
+    redis_client = None
+
+
+def test_append_round_trips_through_stream_fields():
+    stream = TickStream(Watcher(), Publisher())
+    stream.append('binance', 65000.1, 65000.2, 1700000000.5)
+    assert parse_tick(stream.pending[0]) == {'exchange': 'binance', 'bid': 65000.1, 'ask': 65000.2, 'ts': 1700000000.5}
+
+
+def test_depth_levels_are_included_when_enabled():
+    watcher = Watcher()
+    order_book = OrderBook(2, 8)
+    order_book.load([("100.00", "1.5"), ("99.00", "2")], [("101.00", "0.5")])
+    watcher.books['kraken'] = order_book
+    stream = TickStream(watcher, Publisher(), depth=1)
+    stream.append('kraken', 100.0, 101.0, 1.0)
+    tick = parse_tick(stream.pending[0])
+    assert tick['bids'] == [["100.00", "1.50000000"]]
+    assert tick['asks'] == [["101.00", "0.50000000"]]
+
+
+def test_buffer_is_bounded_without_redis():
+    stream = TickStream(Watcher(), Publisher(), buffer=3)
+    for i in range(5):
+        stream.append('binance', float(i), float(i + 1), float(i))
+    asyncio.run(stream.flush())
+    assert [parse_tick(f)['bid'] for f in stream.pending] == [2.0, 3.0, 4.0]
+    assert stream.dropped == 2